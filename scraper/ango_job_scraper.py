@@ -16,11 +16,17 @@ Fontes configuradas:
 Funcionalidades:
   ✅ JOBS_CONFIG — dicionário unificado de adaptadores
   ✅ Chrome v122 User-Agent real (anti-403/bloqueios)
-  ✅ Deduplicação dupla: por source_url E por (title + company)
+  ✅ Deduplicação dupla: por url_key (URL canónica, url_canon.py) E por (title + company)
   ✅ Categorização automática por palavras-chave no título
+  ✅ Província/município normalizados (gazetteer.py) → province_code / municipality_code
+  ✅ Salário estruturado (salary_parser.py) → salary_min/max, moeda, período e AOA mensal
+  ✅ content_hash por linha; --update re-verifica as vagas recentes e faz PATCH só do que mudou
+  ✅ Escritas pela fila durável (outbox.py): uma falha da base não perde a vaga extraída
   ✅ Extração de imagem: og:image → logo img → None
   ✅ Extração de e-mail por regex na página de detalhe
-  ✅ 2-5s de delay aleatório entre requests (simulação humana)
+  ✅ 2-5s de delay aleatório entre requests ao mesmo host (simulação humana)
+  ✅ Pipeline em estágios com filas limitadas e métricas por estágio
+  ✅ Arquivo WARC das respostas (--archive) para re-extração offline (replay.py)
   ✅ Per-site try-except blindado — falha isolada por fonte
   ✅ Log de estatísticas completo no final
 
@@ -30,31 +36,50 @@ Dependências:
 
 import re
 import os
-import time
 import json
-import random
 import logging
+import argparse
+import threading
 import unicodedata
-from datetime import datetime, timezone
-from typing import Optional, List, Dict
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, Iterator
 from urllib.parse import urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+from source_scheduler import SourceScheduler
+from circuit_breaker import HostCircuitBreaker, CircuitOpenError
+from charset import CharsetResolver
+from parse_pool import ParsePool, default_workers
+from pipeline import Pipeline, Stage, HostThrottle
+from run_profiler import PROFILE_DIR, RunProfiler
+from response_archive import ResponseArchive
+from outbox import Outbox
+from sinks import SINK_KINDS, SupabaseSink, make_sink
+from search_index import SearchIndex, INDEX_PATH
+from selector_tuner import SelectorTuner, best_selector, cards_look_healthy, score_selector
+from gazetteer import resolve as resolve_location, resolve_first
+from salary_parser import EMPTY_COLUMNS as NO_SALARY, find_salary, load_rates, parse_salary
+from url_canon import canonical_url, dedup_filters, ensure_url_keys, url_key
+from content_hash import PatchQueue, content_hash
+from run_logging import item_logger, log_context, setup_logging
+from time_budget import TimeBudget
+from sharding import Shard, parse_shard
+from reclassify import JobCategorizer
+
 # ─────────────────────────────────────────────
 # CONFIGURAÇÃO DE LOGGING
 # ─────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("jobs_scraper.log", encoding="utf-8"),
-    ],
-)
+# Configurado no arranque (run_logging.setup_logging): fila + listener, consola em
+# texto e jobs_scraper.jsonl estruturado; mensagens por item em `item_log`, amostradas
+LOG_FILE = "jobs_scraper.jsonl"
 log = logging.getLogger("AngoJobScraper")
+item_log = item_logger("AngoJobScraper")
 
 # ─────────────────────────────────────────────────────────────────────────
 # INTELIGÊNCIA: Categorização automática de vagas por título
@@ -102,6 +127,8 @@ CATEGORY_MAP = {
         "Público", "Municipal", "Provincial", "Administração Pública"
     ],
 }
+# Listas compiladas numa regex por categoria (partilhadas com o reclassify.py)
+CATEGORIZER = JobCategorizer(CATEGORY_MAP)
 
 # ─────────────────────────────────────────────────────────────────────────
 # JOBS_CONFIG — Dicionário Unificado de Adaptadores
@@ -225,6 +252,31 @@ JOBS_CONFIG: Dict[str, dict] = {
 
 
 
+# ─────────────────────────────────────────────
+# REGISTO COMPACTO DE CARD (SEM ÁRVORE HTML)
+# ─────────────────────────────────────────────
+class CardRecord:
+    """
+    Dados de um card de listagem, extraídos logo após o fetch.
+    Só strings simples: nenhum atributo aponta para a árvore BeautifulSoup,
+    que pode assim ser libertada antes de começar o deep scraping.
+    """
+    __slots__ = ("url", "title", "company", "location", "snippet")
+
+    def __init__(self, url: str, title: str, company: str, location: str, snippet: str):
+        self.url = url
+        self.title = title
+        self.company = company
+        self.location = location
+        self.snippet = snippet
+
+    def __repr__(self) -> str:
+        return f"CardRecord({self.title[:40]!r}, {self.url!r})"
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
 # ─────────────────────────────────────────────
 # CLIENTE SUPABASE REST (SEM supabase-py)
 # ─────────────────────────────────────────────
@@ -259,9 +311,6 @@ class SupabaseRestClient:
                 json=data,
                 timeout=10,
             )
-            # Depuração solicitada pelo utilizador: Resposta do Supabase
-            log.info(f"Resposta do Supabase: {resp.status_code} {resp.text}")
-            
             if resp.status_code >= 400:
                 log.error(f"❌ Erro na inserção: {resp.text}")
                 log.error(f"Payload com erro: {json.dumps(data, ensure_ascii=False)[:300]}")
@@ -271,6 +320,24 @@ class SupabaseRestClient:
             log.error(f"💥 Falha de conexão Supabase: {e}")
             return False
 
+    def update(self, table: str, filters: dict, data: dict) -> bool:
+        """PATCH das linhas que satisfazem `filters` (sintaxe PostgREST, p.ex. {"id": "eq.42"})."""
+        try:
+            resp = requests.patch(
+                f"{self.base_url}/rest/v1/{table}",
+                headers=self.headers,
+                params=filters,
+                json=data,
+                timeout=10,
+            )
+            if resp.status_code >= 400:
+                log.error(f"❌ Erro na atualização: {resp.text}")
+                return False
+            return True
+        except Exception as e:
+            log.error(f"💥 Falha de conexão Supabase: {e}")
+            return False
+
 
 # ─────────────────────────────────────────────
 # MOTOR PRINCIPAL — AngoJobScraper v2
@@ -291,15 +358,67 @@ class AngoJobScraper:
         "Cache-Control": "no-cache",
     }
 
+    # Threads por estágio do pipeline (o parse sobe para o nº de workers do ParsePool)
+    STAGE_CONCURRENCY = {"discover": 4, "dedup": 2, "fetch": 4, "parse": 1, "enrich": 1, "write": 2}
+
     EMAIL_REGEX = re.compile(
         r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}"
     )
 
-    def __init__(self, db: SupabaseRestClient):
+    def __init__(
+        self,
+        db: SupabaseRestClient,
+        scheduler: Optional[SourceScheduler] = None,
+        breaker: Optional[HostCircuitBreaker] = None,
+        parser: Optional[ParsePool] = None,
+        archive: Optional[ResponseArchive] = None,
+        sink=None,
+        tuner: Optional[SelectorTuner] = None,
+        index: Optional[SearchIndex] = None,
+        profiler: Optional[RunProfiler] = None,
+        budget: Optional[TimeBudget] = None,
+        shard: Optional[Shard] = None,
+    ):
         self.db = db
         self.session = requests.Session()
         self.session.headers.update(self.BASE_HEADERS)
         self.stats = {"processed": 0, "saved": 0, "skipped_dup": 0, "errors": 0}
+        # Agendador adaptativo: decide que fontes estão "em janela" e por que ordem
+        self.scheduler = scheduler or SourceScheduler("jobs")
+        # Disjuntor por host: portais mortos custam zero segundos em vez de minutos
+        self.breaker = breaker or HostCircuitBreaker()
+        # Parsing em linha (omissão) ou num pool de processos (--workers N)
+        self.parser = parser or ParsePool(0)
+        # Respostas brutas gravadas para replay (None = não arquiva)
+        self.archive = archive
+        # Destino das linhas: Supabase (omissão) ou ficheiros locais (--sink ndjson|parquet)
+        self.sink = sink or SupabaseSink(db)
+        # Índice full-text local, atualizado a cada linha guardada (None = desligado)
+        self.index = index
+        # Perfil de CPU por fonte + snapshots de memória (--profile; None = desligado)
+        self.profiler = profiler
+        # Prazo da execução e custo esperado por ação (--time-budget; None = sem prazo)
+        self.budget = budget
+        # Parte das fontes / URLs que cabe a este processo (--shard i/N; None = todas)
+        self.shard = shard
+        # Seletores de recurso afinados + saúde dos seletores configurados
+        self.tuner = tuner or SelectorTuner("jobs")
+        # Taxas de câmbio (AOA por unidade) para os salários em USD/EUR; lidas em run()
+        self.rates: Dict[str, float] = {}
+        # Cortesia por host partilhada pelos estágios de fetch
+        self.throttle = HostThrottle()
+        # Codificação: header → <meta> → memo do host → deteção num prefixo (não o corpo todo)
+        self.charsets = CharsetResolver()
+        self._stats_lock = threading.Lock()
+        # PATCHes mínimos do modo --update (content_hash.py)
+        self._patches: Optional[PatchQueue] = None
+        self._pipeline: Optional[Pipeline] = None
+        self._max_total = 0
+        self._reserved = 0
+        self._saved_per_site: Dict[str, int] = {}
+        self._reached_sites = set()
+        # url_key já vistas na base ou guardadas nesta execução: sem novo SELECT
+        self._known_keys: set = set()
 
     # ── Utilidades ────────────────────────────────────────────────────────
     def _clean(self, text: Optional[str]) -> str:
@@ -322,7 +441,7 @@ class AngoJobScraper:
 
     # ── Extração de Salário ──────────────────────────────────────────────────
     def _extract_salary(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extrai salário: meta tags → schema.org → texto visível com padrões conhecidos."""
+        """Extrai salário: meta tags → schema.org → valores no texto visível → "Negociável" & afins."""
         # Nível 1: meta tags
         salary_meta = soup.find("meta", property="og:salary") or soup.find("meta", attrs={"name": "salary"})
         if salary_meta and salary_meta.get("content"):
@@ -337,22 +456,28 @@ class AngoJobScraper:
                 if isinstance(data, dict) and data.get("@type") == "JobPosting":
                     salary = data.get("baseSalary")
                     if salary and isinstance(salary, dict):
-                        value = salary.get("value", {}).get("value")
-                        currency = salary.get("value", {}).get("currency", "Kz")
-                        if value:
-                            return f"{value} {currency}"
+                        value = salary.get("value", {})
+                        currency = value.get("currency") or salary.get("currency") or "Kz"
+                        amount = value.get("value")
+                        if amount is None and value.get("minValue") is not None:
+                            amount = f"{value['minValue']} - {value.get('maxValue', value['minValue'])}"
+                        unit = {"MONTH": " / mês", "YEAR": " / ano", "DAY": " / dia", "HOUR": " / hora"}
+                        if amount is not None:
+                            return f"{amount} {currency}{unit.get(str(value.get('unitText')).upper(), '')}"
             except Exception:
                 pass
         
-        # Nível 3: Busca por padrões no texto
+        # Nível 3: valores com moeda (Kz, AOA, USD, €, "mil", "M") ou após "Salário:"
         text = soup.get_text()
+        found = find_salary(text)
+        if found:
+            return found.text + (f" / {found.period_label}" if found.period != "month" else "")
+
+        # Nível 4: sem valor
         patterns = [
-            r'[\d.,]+\s*[KM]?[kzKZ]\s*/?\s*m[eê]s',
-            r'[\d.,]+\s*[KM]?[kzKZ](?!\w)',
             r'[Aa]\s*[Cc]ombinar',
             r'[Cc]ompetitiv[oa]',
             r'[Nn]egoci[aá]vel',
-            r'[Ss]al[aá]rio\s*:?\s*[\d.,]+\s*[KM]?[kzKZ]',
         ]
         for pattern in patterns:
             match = re.search(pattern, text, re.IGNORECASE)
@@ -361,26 +486,36 @@ class AngoJobScraper:
         
         return None
 
-    def _human_delay(self, delay_range: tuple):
-        """Simula atraso humano aleatório entre requests."""
-        secs = random.uniform(*delay_range)
-        log.info(f"  ⏳ Aguardando {secs:.1f}s (simulação humana)...")
-        time.sleep(secs)
-
-    def _fetch(self, url: str, extra_headers: dict = None) -> Optional[BeautifulSoup]:
+    def _fetch(self, url: str, extra_headers: dict = None, source: str = None) -> Optional[BeautifulSoup]:
         """Faz o request e retorna BeautifulSoup, ou None se falhar."""
+        raw = self._fetch_raw(url, extra_headers, source)
+        if not raw:
+            return None
+        content, encoding = raw
+        return BeautifulSoup(content.decode(encoding, errors="replace"), "html.parser")
+
+    def _fetch_raw(self, url: str, extra_headers: dict = None, source: str = None) -> Optional[Tuple[bytes, str]]:
+        """
+        Faz o request e retorna (bytes, encoding) para parse posterior, ou None se falhar.
+        Com `source` e arquivo ativo, a resposta fica gravada para replay.
+        """
         try:
             # Mescla headers se extra_headers for fornecido
             headers = self.session.headers.copy()
             if extra_headers:
                 headers.update(extra_headers)
                 
-            resp = self.session.get(url, headers=headers, timeout=45)
+            resp = self.breaker.get(self.session, url, headers=headers)
             # log.debug(f"Fetch {url} - Status: {resp.status_code} - KB: {len(resp.text)/1024:.1f}")
             
             resp.raise_for_status()
-            resp.encoding = resp.apparent_encoding or "utf-8"
-            return BeautifulSoup(resp.text, "html.parser")
+            encoding = self.charsets.resolve(url, resp.content, resp.headers.get("Content-Type"))
+            if self.archive and source:
+                self.archive.record(source, url, resp.status_code, resp.content, encoding)
+            return resp.content, encoding
+        except CircuitOpenError:
+            item_log.info(f"  ⛔ Host em pausa (circuito aberto): {url}")
+            return None
         except requests.RequestException as e:
             log.warning(f"  ⚠️  Falha no request para {url}: {e}")
             return None
@@ -401,29 +536,32 @@ class AngoJobScraper:
     # ── Categorização Automática ──────────────────────────────────────────
     def _categorize(self, title: str, fixed_category: str = None) -> str:
         """Atribui categoria com base em palavras-chave no título."""
-        if fixed_category:
-            return fixed_category
-        title_lower = title.lower()
-        for category, keywords in CATEGORY_MAP.items():
-            if any(kw.lower() in title_lower for kw in keywords):
-                return category
-        return "Geral"
+        return CATEGORIZER(title, fixed_category)
 
     # ── Deduplicação Dupla ────────────────────────────────────────────────
     def _is_duplicate_url(self, source_url: str) -> bool:
-        """Verifica se a URL de origem já existe."""
+        """Verifica se a URL de origem (pela url_key canónica) já existe."""
+        key = url_key(source_url)
+        with self._stats_lock:
+            if key in self._known_keys:
+                return True
+        if self.db is None:  # sink local sem credenciais
+            return False
         try:
-            res = self.db.select("jobs", filters={"source_url": f"eq.{source_url}"}, columns="id")
-            return len(res) > 0
+            res = self.db.select("jobs", filters=dedup_filters("jobs", source_url), columns="id")
         except Exception:
             return False
+        if res:
+            with self._stats_lock:
+                self._known_keys.add(key)
+        return len(res) > 0
 
     def _is_duplicate_composite(self, title: str, company: str) -> bool:
         """
         Deduplicação inteligente: mesma vaga publicada em múltiplos sites.
         Se título E empresa forem idênticos, é considerado duplicado.
         """
-        if not title or not company or company == "Empresa Confidencial":
+        if self.db is None or not title or not company or company == "Empresa Confidencial":
             return False
         try:
             res = self.db.select(
@@ -436,199 +574,475 @@ class AngoJobScraper:
             return False
 
     # ── Auto-Detecção de Seletor ──────────────────────────────────────────
-    def _auto_detect_selector(self, soup: BeautifulSoup) -> Optional[str]:
-        candidates = [
-            "li.job_listing", "article.job_listing", ".job-listing",
-            ".job-item", ".vacancy-item", "li.job", ".job_item",
-            ".base-card", "article.post", ".post", "article",
-        ]
-        for sel in candidates:
-            items = soup.select(sel)
-            if len(items) >= 2:
-                log.info(f"  🔍 Seletor auto-detectado: '{sel}' ({len(items)} itens)")
-                return sel
+    def _auto_detect_selector(self, soup: BeautifulSoup, cfg: dict) -> Optional[Tuple[str, float]]:
+        """Candidatos pontuados (links, unicidade, títulos) em vez do primeiro com 2+ itens."""
+        best = best_selector(soup, cfg, exclude=[cfg["job_card_selector"]])
+        if not best:
+            return None
+        sel, score = best
+        log.info(f"  🔍 Seletor auto-detectado: '{sel}' ({score['matches']} itens, score {score['score']:.2f})")
+        return sel, score["score"]
+
+    # ── Listagem → Registos Compactos ─────────────────────────────────────
+    def _extract_cards(self, soup: BeautifulSoup, site_name: str, cfg: dict, probe: dict = None) -> List[CardRecord]:
+        """
+        Reduz a página de listagem a CardRecords e liberta a árvore HTML.
+        Cards sem link são descartados aqui, como antes no loop principal.
+        Com `probe`, devolve nele a pontuação do seletor configurado e o seletor detetado.
+        O seletor configurado só é pontuado sem referência (`cfg["score_configured"]`) ou
+        quando os seus cards parecem degradados; numa listagem saudável fica None.
+        """
+        cards = soup.select(cfg["job_card_selector"])
+        configured = len(cards)
+        if probe is not None and not cards:
+            probe["configured_score"] = 0.0
+        if not cards and cfg.get("fallback_selector"):
+            # Seletor afinado em cache (SelectorTuner): sem custo de deteção
+            log.warning(f"  ⚠️  Nenhum card em {site_name}. Usando seletor afinado '{cfg['fallback_selector']}'")
+            cards = soup.select(cfg["fallback_selector"])
+            if not cards and probe is not None:
+                probe["fallback_failed"] = True
+        if not cards:
+            log.warning(f"  ⚠️  Nenhum card em {site_name}. Tentando auto-deteção...")
+            detected = self._auto_detect_selector(soup, cfg)
+            if detected:
+                cards = soup.select(detected[0])
+                if probe is not None:
+                    probe["detected"] = detected
+
+        records = []
+        for card in cards:
+            link_tag = card.select_one(cfg["link_selector"]) or card.find("a")
+            raw_url = link_tag.get("href", "") if link_tag else ""
+            job_url = canonical_url(self._normalize_url(raw_url, cfg["base_url"]))
+            if not job_url:
+                continue
+
+            title_tag = card.select_one(cfg["title_selector"])
+            title = self._clean(title_tag.get_text() if title_tag else "")
+
+            company = cfg.get("fixed_company", "")
+            if not company and cfg.get("company_selector"):
+                comp_tag = card.select_one(cfg["company_selector"])
+                company = self._clean(comp_tag.get_text() if comp_tag else "")
+
+            loc_tag = card.select_one(cfg["location_selector"]) if cfg.get("location_selector") else None
+            location = self._clean(loc_tag.get_text() if loc_tag else "Angola")
+
+            snippet = self._clean(card.get_text(" "))[:300]
+            records.append(CardRecord(job_url, title, company, location, snippet))
+
+        if probe is not None and configured:
+            healthy = cards_look_healthy(configured, [(r.url, r.title) for r in records])
+            probe["configured_score"] = (
+                score_selector(soup, cfg["job_card_selector"], cfg)["score"]
+                if cfg.get("score_configured") or not healthy else None
+            )
+
+        # Sem referências vivas para a árvore: liberta-a já
+        soup.decompose()
+        return records
+
+    # ── Página de Detalhe → Campos ────────────────────────────────────────
+    def _extract_detail(self, detail_soup: BeautifulSoup, cfg: dict) -> dict:
+        """Extrai descrição, requisitos, imagem, e-mail e salário de uma página de detalhe."""
+        description = ""
+        requirements_list = []
+
+        # Descrição
+        desc_sel = cfg.get("detail_description_selector")
+        desc_tag = detail_soup.select_one(desc_sel) if desc_sel else None
+        if desc_tag:
+            description = self._clean(desc_tag.get_text(separator="\n"))
+
+        # Requisitos (Convertendo para Lista)
+        req_sel = cfg.get("detail_requirements_selector")
+        req_tag = detail_soup.select_one(req_sel) if req_sel else None
+        if req_tag:
+            req_text = self._clean(req_tag.get_text(separator="\n"))
+            # Split por quebra de linha, filtra vazios e limpa espaços
+            requirements_list = [r.strip("- •").strip() for r in req_text.split("\n") if r.strip()]
+
+        detail = {
+            "description": description,
+            "requirements": requirements_list,
+            # Imagem/Logo
+            "image_url": self._extract_image(detail_soup, cfg["base_url"]),
+            # Email por Regex na descrição profunda
+            "email": self._extract_email(detail_soup.get_text()),
+            # Salário
+            "salary": self._extract_salary(detail_soup),
+        }
+
+        # Árvore com ciclos pai↔filho: liberta já em vez de esperar pelo GC
+        detail_soup.decompose()
+        return detail
+
+    # ── Modo --update: vagas recentes re-pedidas, PATCH só do que mudou ──
+    def _site_for_url(self, url: str) -> Optional[str]:
+        host = (urlparse(url).hostname or "").removeprefix("www.")
+        for name, cfg in JOBS_CONFIG.items():
+            if (urlparse(cfg["base_url"]).hostname or "").removeprefix("www.") == host:
+                return name
         return None
 
-    # ── Loop Principal: Round-Robin (Rodízio) ─────────────────────────────
-    def run(self, max_total_vagas: int = 100):
+    def _stage_reparse(self, item: dict) -> Optional[dict]:
+        # Sem detalhe (404, circuito aberto) não há nada a comparar: um detalhe vazio
+        # pareceria uma descrição apagada
+        return self._stage_parse(item) if item.get("raw") else None
+
+    def _stage_compare(self, item: dict) -> dict:
+        row = item["row"]
+        self._patches.compare(row["id"], row.get("content_hash"), item["payload"])
+        return item
+
+    def run_update(self, days: int = 7, limit: int = 500) -> int:
+        """Re-pede o detalhe das vagas dos últimos `days` dias e atualiza só as colunas alteradas."""
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        rows = self.db.select("jobs", {
+            "posted_at": f"gte.{since}", "expired_at": "is.null",
+            "order": "posted_at.desc", "limit": str(limit),
+        }, columns="id,title,company,location,source_url,content_hash")
+        items = []
+        for row in rows:
+            site_name = self._site_for_url(row.get("source_url") or "")
+            cfg = JOBS_CONFIG.get(site_name)
+            if self.shard and not self.shard.owns(row.get("source_url") or ""):
+                continue
+            # Fontes sem página de detalhe: o conteúdo vem todo do card, já comparado no insert
+            if cfg and cfg.get("detail_enabled"):
+                card = CardRecord(row["source_url"], row["title"], row.get("company") or "", row.get("location") or "", "")
+                items.append({"site": site_name, "cfg": cfg, "card": card, "row": row})
+        log.info(f"🔁 --update: {len(items)}/{len(rows)} vaga(s) dos últimos {days} dia(s) com detalhe a re-verificar")
+
+        self.rates = load_rates(self.db)
+        self._patches = PatchQueue(self.db, "jobs")
+        c = self.STAGE_CONCURRENCY
+        finish = self.budget is not None
+        metrics = Pipeline("jobs-update", [
+            Stage("fetch", self._traced(self._stage_fetch), concurrency=c["fetch"], queue_size=8),
+            Stage("parse", self._traced(self._stage_reparse), concurrency=max(c["parse"], self.parser.workers),
+                  queue_size=8, finish_on_stop=finish),
+            Stage("enrich", self._traced(self._stage_enrich), concurrency=c["enrich"], finish_on_stop=finish),
+            Stage("compare", self._traced(self._stage_compare), concurrency=1, finish_on_stop=finish),
+        ]).run(iter(items), deadline=self._deadline())
+        self.stats["errors"] += sum(m["errors"] for m in metrics.values())
+        updated = self._patches.flush()
+        self.breaker.save()
+        return updated
+
+    # ── Loop Principal: Pipeline em Estágios ──────────────────────────────
+    def run(self, max_total_vagas: int = 100, force_all: bool = False):
         """
-        Executa o motor em ciclos: 5 vagas por fonte em cada iteração.
-        Garante diversidade de fontes no banco de dados.
+        Executa o motor como pipeline: discover → dedup → fetch → parse → enrich → write.
+        A descoberta entrega as vagas em rodízio (5 por fonte em cada volta), o que
+        garante diversidade de fontes no banco de dados; as fontes em janela
+        (agendador) são visitadas por ordem de yield.
         """
         start = datetime.now(timezone.utc)
+        sources = self.shard.sources(JOBS_CONFIG) if self.shard else JOBS_CONFIG
+        if self.shard:
+            # A meta é da varredura inteira: cada shard fica com a sua fração
+            max_total_vagas = -(-max_total_vagas // self.shard.count)
+        site_order = self.scheduler.plan(sources, force=force_all)
+        if self.budget:
+            site_order = self.budget.plan(site_order, self.scheduler.score, self._item_cost)
         log.info(f"\n{'█' * 60}")
-        log.info(f"  AngoJobScraper v2.5 — MODO RODÍZIO ATIVADO")
-        log.info(f"  {len(JOBS_CONFIG)} fontes em ciclo | Meta: {max_total_vagas} vagas")
+        log.info(f"  AngoJobScraper v2.5 — MODO PIPELINE (RODÍZIO)")
+        log.info(f"  {len(site_order)}/{len(sources)} fontes em ciclo | Meta: {max_total_vagas} vagas"
+                 + (f" | Shard {self.shard}" if self.shard else ""))
+        log.info(f"  Ordem: {' → '.join(site_order) or '—'}")
         log.info(f"{'█' * 60}\n")
 
-        # Cache de sopas por fonte para não pedir a home 1000 vezes
-        soups_cache = {}
-        processed_links_per_site = {name: set() for name in JOBS_CONFIG}
-        indices_per_site = {name: 0 for name in JOBS_CONFIG}
+        self.rates = load_rates(self.db)
+        ensure_url_keys(self.db, "jobs")
+        self._max_total = max_total_vagas
+        self._reserved = 0
+        self._saved_per_site = {name: 0 for name in site_order}
+        self._reached_sites = set()
+        failed_sites = set()
 
-        while self.stats["saved"] < max_total_vagas:
-            saved_this_cycle = 0
-            
-            for site_name, cfg in JOBS_CONFIG.items():
-                if self.stats["saved"] >= max_total_vagas:
-                    break
-                
-                log.info(f"🔄 Ciclo: {site_name} (Início no índice {indices_per_site[site_name]})")
-                
-                try:
-                    if site_name not in soups_cache:
-                        soups_cache[site_name] = self._fetch(cfg["list_url"], cfg.get("extra_headers"))
-                    
-                    soup = soups_cache[site_name]
-                    if not soup:
-                        continue
-                        
-                    cards = soup.select(cfg["job_card_selector"])
-                    if not cards:
-                        log.warning(f"  ⚠️  Nenhum card em {site_name}. Tentando auto-deteção...")
-                        detected = self._auto_detect_selector(soup)
-                        if detected: cards = soup.select(detected)
-                    
-                    if not cards:
-                        continue
-
-                    # Pega as próximas 5 vagas não processadas
-                    count_in_cycle = 0
-                    current_idx = indices_per_site[site_name]
-                    
-                    while count_in_cycle < 5 and current_idx < len(cards):
-                        card = cards[current_idx]
-                        current_idx += 1
-                        
-                        # Extração de Link
-                        link_tag = card.select_one(cfg["link_selector"]) or card.find("a")
-                        raw_url = link_tag.get("href", "") if link_tag else ""
-                        job_url = self._normalize_url(raw_url, cfg["base_url"])
-                        
-                        if not job_url:
-                            continue
-                        if job_url in processed_links_per_site[site_name]:
-                            log.debug(f"  ⏭️  Link já visto neste ciclo: {job_url}")
-                            continue
-                        
-                        processed_links_per_site[site_name].add(job_url)
-                        
-                        # Processar Vaga
-                        success = self._process_card(card, job_url, site_name, cfg)
-                        if success:
-                            count_in_cycle += 1
-                            saved_this_cycle += 1
-                            self.stats["saved"] += 1
-                    
-                    indices_per_site[site_name] = current_idx
-                    
-                except Exception as e:
-                    log.error(f"❌ Erro no ciclo de {site_name}: {e}")
-                    continue
+        if site_order:
+            self._pipeline = self._build_pipeline()
+            metrics = self._pipeline.run(self._discover(site_order, failed_sites), deadline=self._deadline())
+            self.stats["errors"] += sum(m["errors"] for m in metrics.values())
 
-            if saved_this_cycle == 0:
-                log.info("🏁 Nenhuma nova vaga encontrada em todas as fontes. Finalizando.")
-                break
-            
-            log.info(f"📊 Fim do Ciclo. Total guardado: {self.stats['saved']}/{max_total_vagas}")
+        # Só as fontes efetivamente visitadas alimentam o agendador; as cortadas pelo
+        # prazo ficam por registar (o yield observado seria só uma parte do real)
+        cut = self.budget.cut if self.budget else {}
+        for site_name in site_order:
+            if site_name in cut and site_name not in failed_sites:
+                continue
+            if site_name in failed_sites or site_name in self._reached_sites:
+                self.scheduler.record(site_name, self._saved_per_site[site_name], error=site_name in failed_sites)
+        self.scheduler.save()
+        self.breaker.save()
+        self.tuner.save()
+        if self.budget:
+            self.budget.save()
+            log.info(self.budget.summary())
+        log.info(f"🗓️  Agendador:\n{self.scheduler.summary()}")
+        for line in self.tuner.regressions():
+            log.warning(f"📉 Seletor em degradação — {line}")
 
         elapsed = (datetime.now(timezone.utc) - start).seconds
         log.info(f"\n{'█' * 60}")
         log.info(f"  🏁 VARREDURA CONCLUÍDA em {elapsed}s")
         log.info(f"  📊 Estatísticas Finais:")
         log.info(f"     → Guardados:   {self.stats['saved']}")
+        log.info(f"     → Duplicados:  {self.stats['skipped_dup']}")
         log.info(f"     → Erros:       {self.stats['errors']}")
         log.info(f"{'█' * 60}\n")
 
-    def _process_card(self, card, job_url, site_name, cfg) -> bool:
-        """Extração e inserção de uma única vaga."""
-        try:
-            # 1. Deduplicação URL
-            if self._is_duplicate_url(job_url):
-                return False
+    # ── Orçamento de tempo (--time-budget) ────────────────────────────────
+    def _timed(self, site_name: str, action: str):
+        return self.budget.timed(site_name, action) if self.budget else nullcontext()
 
-            # 2. Título & Empresa (Obrigatórios)
-            title_tag = card.select_one(cfg["title_selector"])
-            title = self._clean(title_tag.get_text() if title_tag else "")
-            
-            company = cfg.get("fixed_company", "")
-            if not company and cfg.get("company_selector"):
-                comp_tag = card.select_one(cfg["company_selector"])
-                company = self._clean(comp_tag.get_text() if comp_tag else "")
-            if not company: company = "Empresa Confidencial"
+    def _deadline(self) -> Optional[float]:
+        return self.budget.work_deadline if self.budget else None
 
-            if not title or not company:
-                log.warning(f"  ⏭️  Card sem título ou empresa em {site_name}")
-                return False
+    def _item_cost(self, site_name: str) -> float:
+        """Segundos esperados por vaga nova: fetch do detalhe + atraso de cortesia do host."""
+        cfg = JOBS_CONFIG[site_name]
+        if not cfg.get("detail_enabled"):
+            return 0.0
+        low, high = cfg.get("request_delay_range", (2, 4))
+        return self.budget.cost(site_name, "detail") + (low + high) / 2
 
-            # 3. Localização
-            loc_tag = card.select_one(cfg["location_selector"]) if cfg.get("location_selector") else None
-            location = self._clean(loc_tag.get_text() if loc_tag else "Angola")
+    def _start_by(self, site_name: str) -> Optional[float]:
+        """Último instante para começar um fetch de detalhe da fonte (sem --time-budget: None)."""
+        return self.budget.start_by(site_name) if self.budget else None
 
-            # 4. DEEP SCRAPING (Página de Detalhe)
-            description = ""
-            requirements_list = []
-            image_url = ""
-            email = ""
-            salary = ""
-
-            if cfg.get("detail_enabled") and job_url:
-                self._human_delay(cfg.get("request_delay_range", (2, 4)))
-                detail_soup = self._fetch(job_url, cfg.get("extra_headers"))
-                if detail_soup:
-                    # Descrição
-                    desc_sel = cfg.get("detail_description_selector")
-                    desc_tag = detail_soup.select_one(desc_sel) if desc_sel else None
-                    if desc_tag:
-                        description = self._clean(desc_tag.get_text(separator="\n"))
-                    
-                    # Requisitos (Convertendo para Lista)
-                    req_sel = cfg.get("detail_requirements_selector")
-                    req_tag = detail_soup.select_one(req_sel) if req_sel else None
-                    if req_tag:
-                        req_text = self._clean(req_tag.get_text(separator="\n"))
-                        # Split por quebra de linha, filtra vazios e limpa espaços
-                        requirements_list = [r.strip("- •").strip() for r in req_text.split("\n") if r.strip()]
-                    
-                    # Imagem/Logo
-                    image_url = self._extract_image(detail_soup, cfg["base_url"])
-                    
-                    # Email por Regex na descrição profunda
-                    email = self._extract_email(detail_soup.get_text())
-                    
-                    # Salário
-                    salary = self._extract_salary(detail_soup)
-            
-            # 5. Fallbacks e Limpeza
-            if not image_url:
-                image_url = self._get_category_placeholder(title)
-            
-            if not email:
-                # Se não houver email, guardamos o link de candidatura
-                email = f"Candidatar via: {job_url}"
-
-            categoria = self._categorize(title, cfg.get("fixed_category"))
-
-            payload = {
-                "title": title[:255],
-                "company": company[:255],
-                "location": location[:255],
-                "description": description[:5000],
-                "requirements": requirements_list,
-                "application_email": email[:255],
-                "imagem_url": image_url,
-                "source_url": job_url,
-                "categoria": categoria,
-                "status": "pendente",
-                "posted_at": datetime.now(timezone.utc).isoformat(),
-                "salary": salary or None,
+    def _traced(self, fn):
+        """Estágio com a fonte marcada para o perfil (sem --profile devolve `fn` tal como está)."""
+        return self.profiler.stage(fn) if self.profiler else fn
+
+    def _in_source(self, site_name: str, fn, *args):
+        with log_context(source=site_name, stage="discover"), self._timed(site_name, "listing"):
+            return self.profiler.task(site_name, fn, *args) if self.profiler else fn(*args)
+
+    def _build_pipeline(self) -> Pipeline:
+        c = self.STAGE_CONCURRENCY
+        # No prazo (--time-budget) as páginas já descarregadas ainda são gravadas
+        finish = self.budget is not None
+        return Pipeline("jobs", [
+            Stage("dedup", self._traced(self._stage_dedup), concurrency=c["dedup"]),
+            Stage("fetch", self._traced(self._stage_fetch), concurrency=c["fetch"], queue_size=8),
+            Stage("parse", self._traced(self._stage_parse), concurrency=max(c["parse"], self.parser.workers),
+                  queue_size=8, finish_on_stop=finish),
+            Stage("enrich", self._traced(self._stage_enrich), concurrency=c["enrich"], finish_on_stop=finish),
+            Stage("write", self._traced(self._stage_write), concurrency=c["write"], queue_size=8, finish_on_stop=finish),
+        ])
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # ── Estágio: discover ─────────────────────────────────────────────────
+    def _discover(self, site_order: List[str], failed_sites: set) -> Iterator[dict]:
+        """Listagens pedidas em paralelo; vagas entregues em rodízio, 5 por fonte por volta."""
+        with ThreadPoolExecutor(max_workers=self.STAGE_CONCURRENCY["discover"]) as ex:
+            futures = {
+                name: ex.submit(self._in_source, name, self._fetch_cards, name, JOBS_CONFIG[name])
+                for name in site_order
             }
+            backlog: Dict[str, deque] = {}
+            for site_name in site_order:
+                try:
+                    cards = futures[site_name].result()
+                except Exception as e:
+                    log.error(f"❌ Erro na listagem de {site_name}: {e}")
+                    cards = None
+                if not cards:
+                    failed_sites.add(site_name)
+                    continue
+                # Links repetidos na mesma listagem contam uma só vez
+                seen, unique = set(), deque()
+                for card in cards:
+                    key = url_key(card.url)
+                    if key not in seen:
+                        seen.add(key)
+                        unique.append(card)
+                backlog[site_name] = unique
+        if self.profiler:
+            self.profiler.snapshot("meio")
+
+        while backlog:
+            for site_name in list(backlog):
+                cfg = JOBS_CONFIG[site_name]
+                cards = backlog[site_name]
+                for _ in range(min(5, len(cards))):
+                    yield {"site": site_name, "cfg": cfg, "card": cards.popleft()}
+                if not cards:
+                    del backlog[site_name]
+
+    # ── Estágio: dedup ────────────────────────────────────────────────────
+    def _stage_dedup(self, item: dict) -> Optional[dict]:
+        card: CardRecord = item["card"]
+        self._bump("processed")
+        self._reached_sites.add(item["site"])
+
+        # 1. Deduplicação URL (antes do fetch: uma URL conhecida não custa pedidos)
+        if self._is_duplicate_url(card.url):
+            self._bump("skipped_dup")
+            return None
+
+        # 2. Título & Empresa (Obrigatórios)
+        if not card.title:
+            log.warning(f"  ⏭️  Card sem título ou empresa em {item['site']}")
+            return None
+        return item
+
+    # ── Estágio: fetch ────────────────────────────────────────────────────
+    def _stage_fetch(self, item: dict) -> Optional[dict]:
+        """4. DEEP SCRAPING — pedidos ao mesmo host em série e espaçados; hosts diferentes em paralelo."""
+        cfg = item["cfg"]
+        item["raw"] = None
+        if cfg.get("detail_enabled"):
+            job_url = item["card"].url
+            delay = cfg.get("request_delay_range", (2, 4))
+            with self.throttle.slot(job_url, delay, deadline=self._start_by(item["site"])) as on_time:
+                # Prazo: vagas cujo fetch já não caberia ficam para a próxima execução
+                if not on_time:
+                    if self.budget is not None:
+                        self.budget.postpone(item["site"])
+                    return None
+                with self._timed(item["site"], "detail"):
+                    item["raw"] = self._fetch_raw(job_url, cfg.get("extra_headers"), item["site"])
+        return item
+
+    # ── Estágio: parse ────────────────────────────────────────────────────
+    def _stage_parse(self, item: dict) -> dict:
+        raw = item.pop("raw", None)
+        if raw:
+            content, encoding = raw
+            item["detail"] = self.parser.submit(parse_detail_page, content, encoding, item["cfg"]).result()
+        else:
+            item["detail"] = {}
+        return item
+
+    # ── Estágio: enrich ───────────────────────────────────────────────────
+    def _stage_enrich(self, item: dict) -> dict:
+        """Campos do card + detalhe + fallbacks → payload final."""
+        card: CardRecord = item["card"]
+        cfg, detail = item["cfg"], item.pop("detail")
+
+        # 2-3. Campos do card (título, empresa, localização)
+        job_url = card.url
+        title = card.title
+        company = card.company or "Empresa Confidencial"
+        location = card.location
+
+        # 4. Campos do detalhe
+        description = detail.get("description", "")
+        requirements_list = detail.get("requirements", [])
+        image_url = detail.get("image_url") or ""
+        email = detail.get("email") or ""
+        salary = detail.get("salary") or ""
+
+        # 5. Fallbacks e Limpeza
+        if not image_url:
+            image_url = self._get_category_placeholder(title)
 
-            return self.db.insert("jobs", payload)
+        if not email:
+            # Se não houver email, guardamos o link de candidatura
+            email = f"Candidatar via: {job_url}"
 
+        # Província/município pelo gazetteer; quando o card não traz uma localização
+        # reconhecível (omissão "Angola", datas), tenta o título e o resumo do card
+        place = resolve_location(location)
+        if place is None:
+            place = resolve_first(title, card.snippet)
+            if place:
+                location = place.label
+
+        categoria = self._categorize(title, cfg.get("fixed_category"))
+
+        item["payload"] = {
+            "title": title[:255],
+            "company": company[:255],
+            "location": location[:255],
+            "province_code": place.province_code if place else None,
+            "municipality_code": place.municipality_code if place else None,
+            "description": description[:5000],
+            "requirements": requirements_list,
+            "application_email": email[:255],
+            "imagem_url": image_url,
+            "source_url": job_url,
+            "url_key": url_key(job_url),
+            "categoria": categoria,
+            # Rótulo da máquina: uma categoria diferente desta foi corrigida pelo admin
+            "categoria_auto": categoria,
+            "status": "pendente",
+            "posted_at": datetime.now(timezone.utc).isoformat(),
+            "salary": salary or None,
+        }
+        # Intervalo numérico (moeda do anúncio + equivalente mensal em AOA) para filtros
+        parsed = parse_salary(salary)
+        item["payload"].update(parsed.to_columns(self.rates) if parsed else NO_SALARY)
+        item["payload"]["content_hash"] = content_hash("jobs", item["payload"])
+        return item
+
+    # ── Estágio: write ────────────────────────────────────────────────────
+    def _stage_write(self, item: dict) -> Optional[dict]:
+        # Reserva de quota: com vários writers em paralelo a meta nunca é ultrapassada
+        with self._stats_lock:
+            if self._reserved >= self._max_total:
+                return None
+            self._reserved += 1
+
+        ok = self.sink.write("jobs", item["payload"])
+
+        if ok and self.index:
+            try:
+                self.index.add_job(item["payload"], fonte=item["site"])
+            except Exception as e:
+                log.warning(f"  ⚠️  Índice de pesquisa: {e}")
+
+        with self._stats_lock:
+            if ok:
+                self._known_keys.add(item["payload"]["url_key"])
+                self.stats["saved"] += 1
+                self._saved_per_site[item["site"]] = self._saved_per_site.get(item["site"], 0) + 1
+            else:
+                self._reserved -= 1
+            quota_reached = self.stats["saved"] >= self._max_total
+        if quota_reached and self._pipeline:
+            self._pipeline.stop()
+        return item if ok else None
+
+    def _fetch_cards(self, site_name: str, cfg: dict) -> Optional[List[CardRecord]]:
+        """Fetch da listagem + parse (no pool, se ativo) → CardRecords."""
+        with self.throttle.slot(cfg["list_url"]):
+            raw = self._fetch_raw(cfg["list_url"], cfg.get("extra_headers"), site_name)
+        if not raw:
+            return None
+        content, encoding = raw
+        cfg = {
+            **cfg,
+            "fallback_selector": self.tuner.cached(site_name),
+            "score_configured": self.tuner.needs_score(site_name, cfg["job_card_selector"]),
+        }
+        page = self.parser.submit(parse_listing_page, content, encoding, site_name, cfg).result()
+        self.tuner.observe(site_name, cfg["job_card_selector"], page["configured_score"])
+        if page.get("fallback_failed"):
+            self.tuner.invalidate(site_name)
+        if page.get("detected"):
+            self.tuner.remember(site_name, *page["detected"])
+        return [CardRecord(**c) for c in page["cards"]]
+
+    def _process_card(self, card: CardRecord, site_name: str, cfg: dict) -> bool:
+        """Extração e inserção de uma única vaga (os mesmos estágios, em série)."""
+        item = {"site": site_name, "cfg": cfg, "card": card}
+        try:
+            for stage in (self._stage_dedup, self._stage_fetch, self._stage_parse, self._stage_enrich, self._stage_write):
+                item = stage(item)
+                if item is None:
+                    return False
+            return True
         except Exception as e:
             log.warning(f"  ⚠️ Erro ao processar card: {e}")
-            self.stats["errors"] += 1
+            self._bump("errors")
             return False
 
     def _get_category_placeholder(self, title: str) -> str:
@@ -646,22 +1060,116 @@ class AngoJobScraper:
         return placeholders.get(cat, placeholders["Geral"])
 
 
+# ─────────────────────────────────────────────
+# FUNÇÕES DE PARSE (executáveis num ParsePool)
+# ─────────────────────────────────────────────
+# Funções de módulo (picklable) que recebem bytes e devolvem apenas dicts
+# pequenos. Usam uma instância sem sessão nem DB: os métodos de extração
+# do AngoJobScraper não dependem de estado da instância.
+_EXTRACTOR: Optional[AngoJobScraper] = None
+
+
+def _extractor() -> AngoJobScraper:
+    global _EXTRACTOR
+    if _EXTRACTOR is None:
+        _EXTRACTOR = AngoJobScraper.__new__(AngoJobScraper)
+    return _EXTRACTOR
+
+
+def parse_listing_page(content: bytes, encoding: str, site_name: str, cfg: dict) -> dict:
+    """{"cards": [...], "configured_score": float | None, "detected": (seletor, score) | ausente}"""
+    soup = BeautifulSoup(content.decode(encoding, errors="replace"), "html.parser")
+    probe = {}
+    cards = _extractor()._extract_cards(soup, site_name, cfg, probe)
+    return {"cards": [card.to_dict() for card in cards], **probe}
+
+
+def parse_detail_page(content: bytes, encoding: str, cfg: dict) -> dict:
+    soup = BeautifulSoup(content.decode(encoding, errors="replace"), "html.parser")
+    return _extractor()._extract_detail(soup, cfg)
+
+
 # ─────────────────────────────────────────────
 # PONTO DE ENTRADA
 # ─────────────────────────────────────────────
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AngoJobScraper v2 — motor de vagas")
+    parser.add_argument("--all", action="store_true", help="ignora o agendador e visita todas as fontes")
+    parser.add_argument(
+        "--update", action="store_true",
+        help="re-verifica as vagas recentes e faz PATCH só das colunas alteradas (content_hash)",
+    )
+    parser.add_argument("--days", type=int, default=7, help="janela do --update (omissão: 7 dias)")
+    parser.add_argument("--limit", type=int, default=500, help="máx. de vagas re-verificadas no --update")
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="processos de parsing em paralelo com a rede (0 = em linha; -1 = nº de cores - 1)",
+    )
+    parser.add_argument(
+        "--archive", metavar="DIR", default=os.getenv("SCRAPER_ARCHIVE_DIR"),
+        help="grava as respostas brutas (WARC comprimido) para replay offline",
+    )
+    parser.add_argument(
+        "--sink", choices=SINK_KINDS, default="supabase",
+        help="destino das linhas: supabase (omissão) ou ficheiros locais para o bulk_load.py",
+    )
+    parser.add_argument("--out", metavar="DIR", help="diretório do sink local (omissão: scraper/.out)")
+    parser.add_argument("--no-index", action="store_true", help="não atualiza o índice de pesquisa local")
+    parser.add_argument(
+        "--profile", metavar="DIR", nargs="?", const=PROFILE_DIR,
+        help="perfil de CPU por fonte (.prof + .collapsed) e snapshots tracemalloc (omissão: scraper/.profile)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="todas as mensagens por item (sem amostragem)")
+    parser.add_argument(
+        "--time-budget", metavar="SEGUNDOS", type=float,
+        help="prazo da execução: prioriza o maior yield/segundo e termina (gravando tudo) antes dele",
+    )
+    parser.add_argument(
+        "--shard", metavar="i/N", type=parse_shard,
+        help="só a parte i de N das fontes (e das vagas do --update), por hash estável",
+    )
+    args = parser.parse_args()
+    logs = setup_logging(LOG_FILE, verbose=args.verbose)
+    budget = TimeBudget(args.time_budget, "jobs") if args.time_budget else None
+
     load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
     SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
 
     if not SUPABASE_URL or not SUPABASE_KEY:
-        log.critical(
-            "❌ Credenciais Supabase em falta. "
-            "Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local"
-        )
-        exit(1)
+        if args.sink == "supabase" or args.update:
+            log.critical(
+                "❌ Credenciais Supabase em falta. "
+                "Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local"
+            )
+            exit(1)
+        # Execução offline: sem deduplicação contra a base (o bulk_load faz upsert)
+        log.warning("⚠️  Sem credenciais Supabase: deduplicação só local")
+        db = None
+    else:
+        log.info(f"🔗 Supabase: {SUPABASE_URL}")
+        db = SupabaseRestClient(url=SUPABASE_URL, key=SUPABASE_KEY)
 
-    log.info(f"🔗 Supabase: {SUPABASE_URL}")
-    db = SupabaseRestClient(url=SUPABASE_URL, key=SUPABASE_KEY)
-    scraper = AngoJobScraper(db=db)
-    scraper.run()
+    # Escritas na base passam pela fila durável em .state (reenviadas na execução seguinte)
+    outbox = Outbox("jobs") if args.sink == "supabase" else None
+    sink = make_sink(args.sink, db, args.out, outbox=outbox)
+    index = None if args.no_index else SearchIndex(INDEX_PATH)
+    profiler = RunProfiler(args.profile, "jobs") if args.profile else None
+    if profiler:
+        profiler.start()
+    try:
+        with ParsePool(default_workers() if args.workers < 0 else args.workers) as pool:
+            archive = ResponseArchive(args.archive) if args.archive else None
+            scraper = AngoJobScraper(db=db, parser=pool, archive=archive, sink=sink, index=index,
+                                     profiler=profiler, budget=budget, shard=args.shard)
+            if args.update:
+                scraper.run_update(days=args.days, limit=args.limit)
+            else:
+                scraper.run(force_all=args.all)
+    finally:
+        sink.close()
+        if index:
+            index.close()
+        if profiler:
+            profiler.stop()
+        logs.stop()
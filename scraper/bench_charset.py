@@ -0,0 +1,69 @@
+"""
+Benchmark da resolução de codificação + decode por página
+=========================================================
+Antes: `resp.apparent_encoding` (charset_normalizer sobre o corpo inteiro,
+o que o requests faz) e decode. Depois: CharsetResolver (header → BOM →
+<meta> → memo do host → deteção num prefixo) e decode.
+
+Variantes de cada fixture: tal como está (com <meta charset>), sem o <meta>
+(memo do host / UTF-8 estrito) e re-codificada em windows-1252 sem <meta>
+(a deteção limitada a sério).
+
+Uso:
+    python bench_charset.py
+    python bench_charset.py --rounds 10
+"""
+
+import re
+import time
+import argparse
+
+import charset_normalizer
+
+from bench_common import FIXTURES, load_fixture_bytes
+from charset import CharsetResolver
+
+_META = re.compile(rb"<meta[^>]+charset[^>]*>", re.I)
+
+
+def apparent_encoding(content: bytes) -> str:
+    # O mesmo que requests.Response.apparent_encoding
+    return charset_normalizer.detect(content)["encoding"] or "utf-8"
+
+
+def variants():
+    for i, (filename, _) in enumerate(FIXTURES.items()):
+        raw = load_fixture_bytes(filename)
+        bare = _META.sub(b"", raw)
+        host = f"https://site{i}.ao/vagas"
+        yield "meta", host, raw
+        yield "sem meta", host, bare
+        yield "cp1252", f"https://latin{i}.ao/vagas", bare.decode("utf-8").encode("cp1252", "replace")
+
+
+def bench(rounds: int) -> None:
+    pages = list(variants())
+    print(f"páginas: {len(pages)} × {rounds} rondas")
+    for label in ("meta", "sem meta", "cp1252"):
+        subset = [(host, content) for kind, host, content in pages if kind == label]
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for _, content in subset:
+                content.decode(apparent_encoding(content), errors="replace")
+        before = (time.perf_counter() - t0) / (rounds * len(subset))
+
+        resolver = CharsetResolver()
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for host, content in subset:
+                content.decode(resolver.resolve(host, content, "text/html"), errors="replace")
+        after = (time.perf_counter() - t0) / (rounds * len(subset))
+        print(f"  {label:9s} antes {before * 1000:7.2f} ms/página | depois {after * 1000:6.2f} ms/página"
+              f" | ×{before / after:5.1f} | origens {resolver.sources}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    bench(args.rounds)
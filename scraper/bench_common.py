@@ -0,0 +1,43 @@
+"""
+Fixtures partilhadas pelos benchmarks (bench_*.py)
+==================================================
+Páginas de listagem reais guardadas no repositório (UTF-16, exportadas do
+browser) associadas ao adaptador de JOBS_CONFIG correspondente, e o trabalho
+submetido ao ParsePool pelos benchmarks (função de módulo: importável pelos
+workers com qualquer método de arranque, não só fork).
+"""
+
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ficheiro → nome do adaptador em JOBS_CONFIG
+FIXTURES = {
+    "angoemprego_home.html": "Ango Emprego",
+    "angovagas_home.html": "AngoVagas",
+    "contrata_vagas.html": "Contrata.ao",
+    "empregangola_vagas.html": "Emprega Angola",
+    "jobartis_home.html": "Jobartis",
+    "verangola_vagas.html": "VerAngola",
+}
+
+
+def load_fixture_bytes(filename: str) -> bytes:
+    """Bytes da fixture re-codificados em UTF-8, como chegariam da rede."""
+    with open(os.path.join(HERE, filename), "rb") as f:
+        raw = f.read()
+    if raw[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        raw = raw.decode("utf-16").encode("utf-8")
+    return raw
+
+
+def load_fixture(filename: str) -> str:
+    return load_fixture_bytes(filename).decode("utf-8", errors="replace")
+
+
+def visit(content: bytes, site_name: str, cfg: dict) -> int:
+    """Trabalho CPU de uma visita: listagem + detalhe. Devolve o nº de cards."""
+    from ango_job_scraper import parse_listing_page, parse_detail_page
+    page = parse_listing_page(content, "utf-8", site_name, cfg)
+    parse_detail_page(content, "utf-8", cfg)
+    return len(page["cards"])
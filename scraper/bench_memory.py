@@ -0,0 +1,62 @@
+"""
+Benchmark de memória da fase de listagem do AngoJobScraper
+==========================================================
+Compara o que o loop principal mantém vivo durante a execução:
+
+  soups  → modo antigo: árvore BeautifulSoup + lista de cards por fonte
+  cards  → modo atual: apenas CardRecords (__slots__), árvore libertada
+
+Cada modo corre num subprocesso separado para que o pico de RSS
+(ru_maxrss) não seja contaminado pelo outro.
+
+Uso:
+    python bench_memory.py
+"""
+
+import gc
+import sys
+import resource
+import subprocess
+import tracemalloc
+
+from bench_common import FIXTURES, load_fixture
+
+
+def _measure(mode: str) -> None:
+    import logging
+    logging.disable(logging.CRITICAL)
+    from bs4 import BeautifulSoup
+    from ango_job_scraper import AngoJobScraper, JOBS_CONFIG
+
+    scraper = AngoJobScraper(db=None)
+    pages = {name: load_fixture(fname) for fname, name in FIXTURES.items()}
+
+    gc.collect()
+    tracemalloc.start()
+    kept = {}
+    for name, html in pages.items():
+        cfg = JOBS_CONFIG[name]
+        soup = BeautifulSoup(html, "html.parser")
+        if mode == "soups":
+            kept[name] = (soup, soup.select(cfg["job_card_selector"]))
+        else:
+            kept[name] = scraper._extract_cards(soup, name, cfg)
+        del soup
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n_cards = sum(len(v[1]) if mode == "soups" else len(v) for v in kept.values())
+    maxrss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{mode:6s} | cards: {n_cards:4d} | retido: {retained / 2**20:7.2f} MiB | "
+        f"pico (tracemalloc): {peak / 2**20:7.2f} MiB | pico RSS: {maxrss_mb:7.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        _measure(sys.argv[1])
+    else:
+        for mode in ("soups", "cards"):
+            subprocess.run([sys.executable, __file__, mode], check=True)
@@ -0,0 +1,56 @@
+"""
+Benchmark de throughput do ParsePool (páginas/s vs nº de workers)
+=================================================================
+Cada "página" é uma fixture de listagem processada com parse_listing_page
++ parse_detail_page (o trabalho CPU de uma visita). Com --latency simula-se
+o tempo de rede por página na thread principal, para medir a sobreposição
+rede/CPU que o modo pipeline traz.
+
+Uso:
+    python bench_parse.py                   # só CPU
+    python bench_parse.py --latency 0.2     # com rede simulada de 200 ms/página
+    python bench_parse.py --workers 0 1 2 4 --rounds 5
+"""
+
+import os
+import time
+import logging
+import argparse
+
+from bench_common import FIXTURES, load_fixture_bytes, visit
+from parse_pool import ParsePool
+
+logging.disable(logging.CRITICAL)
+
+from ango_job_scraper import JOBS_CONFIG  # noqa: E402
+
+
+def bench(workers: int, rounds: int, latency: float) -> float:
+    pages = [(load_fixture_bytes(f), name, JOBS_CONFIG[name]) for f, name in FIXTURES.items()]
+    with ParsePool(workers) as pool:
+        pool.warm_up()  # arranque dos processos fora da medição
+        t0 = time.perf_counter()
+        futures = []
+        for _ in range(rounds):
+            for content, name, cfg in pages:
+                if latency:
+                    time.sleep(latency)
+                futures.append(pool.submit(visit, content, name, cfg))
+        for fut in futures:
+            fut.result()
+        elapsed = time.perf_counter() - t0
+    return len(futures) / elapsed
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({0, 1, 2, cpus}))
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"CPUs: {cpus} | páginas/ronda: {len(FIXTURES)} | rondas: {args.rounds} | latência: {args.latency}s")
+    for w in args.workers:
+        label = "em linha" if w == 0 else f"{w} worker(s)"
+        print(f"  {label:12s} → {bench(w, args.rounds, args.latency):6.2f} páginas/s")
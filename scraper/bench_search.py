@@ -0,0 +1,100 @@
+"""
+Benchmark do índice de pesquisa (SearchIndex, SQLite FTS5)
+==========================================================
+Gera um corpus sintético de vagas com o vocabulário real (CATEGORY_MAP,
+províncias, empresas) e mede:
+
+  • carga      — documentos/s com add_many (uma transação por lote de 5000)
+  • pesquisa   — latência mediana e p95 de queries típicas, com e sem filtros
+
+Uso:
+    python bench_search.py                 # 200 000 vagas
+    python bench_search.py --docs 500000
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+from search_index import SearchIndex
+
+logging.disable(logging.CRITICAL)
+
+from ango_job_scraper import CATEGORY_MAP  # noqa: E402
+
+PROVINCES = ["Luanda", "Benguela", "Huíla", "Huambo", "Cabinda", "Uíge", "Malanje", "Namibe", "Cunene", "Lunda Norte"]
+COMPANIES = ["Sonangol", "Unitel", "BAI", "Banco BIC", "Africell", "Refriango", "Odebrecht", "Endiama", "TAAG", "Kero"]
+FILLER = ("experiência mínima anos área responsável equipa gestão clientes relatórios "
+          "licenciatura conhecimentos inglês disponibilidade imediata carta condução").split()
+
+QUERIES = [
+    ("engenheiro civil", {}),
+    ("contabilista", {"location": "luanda"}),
+    ("técnico redes", {"categoria": "Tecnologia"}),
+    ("gestor", {"since": None}),
+    ("enfermeiro hospital", {"location": "huila"}),
+    ("vendas", {"categoria": "Vendas & Marketing", "location": "benguela"}),
+]
+
+
+def synthetic_docs(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    categories = list(CATEGORY_MAP)
+    now = datetime.now(timezone.utc)
+    for i in range(n):
+        cat = rnd.choice(categories)
+        words = rnd.sample(CATEGORY_MAP[cat], k=min(2, len(CATEGORY_MAP[cat])))
+        title = f"{' '.join(words)} {rnd.choice(['Sénior', 'Júnior', 'Pleno', ''])}".strip()
+        yield SearchIndex.job_doc({
+            "title": title,
+            "company": rnd.choice(COMPANIES),
+            "location": f"{rnd.choice(PROVINCES)}, Angola",
+            "description": " ".join(rnd.choices(FILLER + words, k=80)),
+            "requirements": rnd.sample(FILLER, k=4),
+            "categoria": cat,
+            "source_url": f"https://example.ao/vagas/{i}",
+            "posted_at": (now - timedelta(minutes=i)).isoformat(),
+        }, fonte="bench")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, "search.db"))
+        t0 = time.perf_counter()
+        batch = []
+        for doc in synthetic_docs(args.docs):
+            batch.append(doc)
+            if len(batch) == 5000:
+                index.add_many(batch)
+                batch = []
+        index.add_many(batch)
+        index.optimize()
+        load = time.perf_counter() - t0
+        print(f"carga: {args.docs} docs em {load:.1f}s ({args.docs / load:,.0f} docs/s)")
+
+        since = (datetime.now(timezone.utc) - timedelta(days=30)).date().isoformat()
+        for text, filters in QUERIES:
+            filters = {k: (since if v is None else v) for k, v in filters.items()}
+            timings, hits = [], 0
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                hits = len(index.search(text, kind="job", **filters))
+                timings.append((time.perf_counter() - t) * 1000)
+            timings.sort()
+            p95 = timings[int(0.95 * (len(timings) - 1))]
+            print(f"  {text!r:24} {str(filters):50} {hits:3d} res. | mediana {statistics.median(timings):6.1f} ms | p95 {p95:6.1f} ms")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
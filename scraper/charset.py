@@ -0,0 +1,158 @@
+"""
+CharsetResolver — Codificação das Páginas sem Detetar o Corpo Inteiro
+=====================================================================
+`resp.apparent_encoding` corre a deteção estatística (charset_normalizer)
+sobre o corpo todo de cada página: 1-30 ms por página, por vezes mais que o
+próprio parse, e às vezes errada (a listagem da VerAngola, UTF-8 declarado no
+<meta>, sai como cp852). A ordem aqui é a dos browsers:
+
+  1. charset explícito no Content-Type (o ISO-8859-1 que o requests assume
+     para text/* sem charset não conta)
+  2. BOM
+  3. <meta charset> / <meta http-equiv="Content-Type"> nos primeiros HEAD_BYTES
+  4. a deteção já feita para o mesmo host (memo por host: as páginas sem
+     declaração de um site usam todas a mesma codificação)
+  5. UTF-8 estrito sobre DETECT_BYTES a partir do primeiro byte não-ASCII; se
+     falhar, deteção só sobre essa janela e só entre as páginas de código
+     latinas (CANDIDATES)
+
+Um <head> comprido só com ASCII não prova nada: a janela começa no primeiro
+byte não-ASCII (`bytes.isascii` e uma regex, sem decodificar), e uma página só com ASCII
+lê-se como UTF-8 mas não vai para o memo do host. Um memo UTF-8 que falhe a
+decodificação de uma página nova é descartado e a página volta a ser detetada.
+
+O ISO-8859-1 declarado é lido como windows-1252 (como na especificação WHATWG:
+os sites portugueses usam as aspas e o € dessa página de código).
+
+    python scraper/bench_charset.py    # antes (apparent_encoding) vs depois
+"""
+
+import re
+import codecs
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:  # dependência do requests; sem ela fica o windows-1252
+    from_bytes = None
+
+HEAD_BYTES = 4096
+DETECT_BYTES = 16384
+FALLBACK = "windows-1252"
+# Candidatos da deteção: sem isto o charset_normalizer lê o português em
+# windows-1252 como cp1250 ("ação" → "aăo")
+CANDIDATES = ["cp1252", "iso8859_15", "cp850", "mac_roman"]
+
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+_META_RE = re.compile(
+    rb"<meta[^>]+?charset\s*=\s*[\"']?\s*([\w.:-]+)", re.I,
+)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Nomes declarados que os browsers leem de outra forma
+_ALIASES = {"iso8859-1": "cp1252", "ascii": "cp1252"}
+
+
+def normalize(name: Optional[str]) -> Optional[str]:
+    """Nome do codec Python para um charset declarado, ou None se desconhecido."""
+    if not name:
+        return None
+    try:
+        codec = codecs.lookup(name.strip().strip("\"'")).name
+    except LookupError:
+        return None
+    codec = _ALIASES.get(codec, codec)
+    return {"cp1252": "windows-1252"}.get(codec, codec)
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    m = _HEADER_CHARSET_RE.search(content_type or "")
+    return normalize(m.group(1)) if m else None
+
+
+def meta_charset(content: bytes) -> Optional[str]:
+    m = _META_RE.search(content[:HEAD_BYTES])
+    name = normalize(m.group(1).decode("ascii", "ignore")) if m else None
+    # Um <meta> legível como ASCII não pode estar em UTF-16 (regra WHATWG)
+    return "utf-8" if name and name.startswith("utf-16") else name
+
+
+def bom_charset(content: bytes) -> Optional[str]:
+    for bom, name in _BOMS:
+        if content.startswith(bom):
+            return name
+    return None
+
+
+_NON_ASCII_RE = re.compile(rb"[\x80-\xff]")
+
+
+def detect(content: bytes) -> str:
+    """UTF-8 estrito ou deteção estatística, sempre sobre uma janela limitada."""
+    return _detect(content)[0]
+
+
+def _detect(content: bytes) -> Tuple[str, bool]:
+    """(codificação, conclusiva) — False quando a página é só ASCII (nada a memorizar)."""
+    if content.isascii():
+        return "utf-8", False
+    first = _NON_ASCII_RE.search(content)
+    window = content[first.start():first.start() + DETECT_BYTES]
+    try:
+        # final=False: um carácter multibyte cortado no limite da janela não é erro
+        codecs.getincrementaldecoder("utf-8")().decode(window, final=False)
+        return "utf-8", True
+    except UnicodeDecodeError:
+        pass
+    if from_bytes is not None:
+        best = from_bytes(content[max(0, first.start() - 1024):first.start() + DETECT_BYTES],
+                          cp_isolation=CANDIDATES).best()
+        if best is not None:
+            return normalize(best.encoding) or FALLBACK, True
+    return FALLBACK, True
+
+
+def _valid_utf8(content: bytes) -> bool:
+    try:
+        content.decode("utf-8")
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+class CharsetResolver:
+    """Resolve e memoriza por host; partilhado pelas threads de fetch de um motor."""
+
+    def __init__(self):
+        self._by_host: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.sources: Dict[str, int] = {}
+
+    def resolve(self, url: str, content: bytes, content_type: Optional[str] = None) -> str:
+        return self.explain(url, content, content_type)[0]
+
+    def explain(self, url: str, content: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
+        """(codificação, origem) — origem ∈ header | bom | meta | host | detect."""
+        host = urlsplit(url).hostname or ""
+        encoding, source = header_charset(content_type), "header"
+        if not encoding:
+            encoding, source = bom_charset(content), "bom"
+        if not encoding:
+            encoding, source = meta_charset(content), "meta"
+        if not encoding:
+            encoding, source = self._by_host.get(host), "host"
+            if encoding == "utf-8" and not _valid_utf8(content):
+                encoding = None
+        certain = False
+        if not encoding:
+            (encoding, certain), source = _detect(content), "detect"
+        with self._lock:
+            if certain:
+                self._by_host[host] = encoding
+            self.sources[source] = self.sources.get(source, 0) + 1
+        return encoding, source
@@ -0,0 +1,163 @@
+"""
+HostCircuitBreaker — Disjuntor por Host com Estado Persistente
+==============================================================
+Um portal em baixo custava um `timeout=45` completo em cada pedido (listagem
+e cada página de detalhe), em todas as execuções. O disjuntor corta isso:
+
+  FECHADO  → pedidos normais; N falhas consecutivas → ABERTO
+  ABERTO   → o host é saltado sem qualquer pedido durante o cool-down
+  SEMI-ABERTO → passado o cool-down, deixa passar UM pedido de prova:
+               sucesso → FECHADO | falha → ABERTO com cool-down a dobrar
+
+Conta como falha apenas o que indica host morto: erro de ligação/SSL,
+timeout ou resposta 5xx. Um 404 numa página de detalhe não abre o circuito.
+O estado é guardado em state_store (host_health.json) entre execuções.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from state_store import load_json, save_json
+
+log = logging.getLogger("CircuitBreaker")
+
+# Timeouts separados: um host que não aceita ligação falha em segundos,
+# um host lento mas vivo continua a ter margem para enviar a página.
+CONNECT_TIMEOUT = 6
+READ_TIMEOUT = 25
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(requests.RequestException):
+    """Pedido recusado localmente: o circuito do host está aberto."""
+
+
+class HostCircuitBreaker:
+    STATE_FILE = "host_health.json"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: int = 30 * 60,
+        max_cooldown: int = 24 * 3600,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.hosts: Dict[str, dict] = load_json(self.STATE_FILE, {}) or {}
+        # Uma prova em curso por host (não persistido: uma prova interrompida volta a ser tentada)
+        self._probing = set()
+        # Partilhado pelos workers de fetch do pipeline
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def _entry(self, host: str) -> dict:
+        return self.hosts.setdefault(host, {
+            "state": CLOSED,
+            "failures": 0,
+            "opened_at": 0.0,
+            "cooldown": self.cooldown,
+        })
+
+    # ── Decisão ───────────────────────────────────────────────────────────
+    def allow(self, url: str, now: Optional[float] = None) -> bool:
+        with self._lock:
+            return self._allow(url, now)
+
+    def _allow(self, url: str, now: Optional[float]) -> bool:
+        host = self.host_of(url)
+        e = self.hosts.get(host)
+        if not e or e["state"] == CLOSED:
+            return True
+        now = now or time.time()
+        if e["state"] == OPEN and now - e["opened_at"] < e["cooldown"]:
+            return False
+        # Cool-down expirado (ou semi-aberto herdado de outra execução): uma única prova
+        if host in self._probing:
+            return False
+        e["state"] = HALF_OPEN
+        self._probing.add(host)
+        log.info(f"  🟡 Circuito semi-aberto para {host}: a enviar pedido de prova")
+        return True
+
+    # ── Resultado ─────────────────────────────────────────────────────────
+    def record_success(self, url: str) -> None:
+        with self._lock:
+            self._record_success(url)
+
+    def _record_success(self, url: str) -> None:
+        host = self.host_of(url)
+        e = self.hosts.get(host)
+        self._probing.discard(host)
+        if not e:
+            return
+        if e["state"] != CLOSED:
+            log.info(f"  🟢 Circuito fechado para {host}: host recuperado")
+        e.update(state=CLOSED, failures=0, opened_at=0.0, cooldown=self.cooldown)
+
+    def record_failure(self, url: str, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._record_failure(url, now)
+
+    def _record_failure(self, url: str, now: Optional[float]) -> None:
+        host = self.host_of(url)
+        e = self._entry(host)
+        now = now or time.time()
+        e["failures"] += 1
+        if e["state"] == HALF_OPEN:
+            # Prova falhada: volta a abrir, com cool-down a dobrar
+            e["cooldown"] = min(self.max_cooldown, e["cooldown"] * 2)
+            self._open(host, e, now)
+        elif e["state"] == CLOSED and e["failures"] >= self.failure_threshold:
+            self._open(host, e, now)
+        self._probing.discard(host)
+
+    def _open(self, host: str, e: dict, now: float) -> None:
+        e["state"] = OPEN
+        e["opened_at"] = now
+        log.warning(
+            f"  🔴 Circuito ABERTO para {host} após {e['failures']} falhas "
+            f"(cool-down {e['cooldown'] // 60} min)"
+        )
+
+    def save(self) -> None:
+        with self._lock:
+            save_json(self.STATE_FILE, self.hosts)
+
+    # ── Pedido protegido ──────────────────────────────────────────────────
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """
+        session.get() com timeouts (connect, read) e contabilidade do disjuntor.
+        Lança CircuitOpenError (subclasse de RequestException) se o host estiver aberto,
+        por isso os `except requests.RequestException` existentes continuam a funcionar.
+        """
+        return self.request(session, "GET", url, **kwargs)
+
+    def request(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        """Como get(), para qualquer método (HEAD do expiry_sweeper.py)."""
+        if not self.allow(url):
+            raise CircuitOpenError(f"circuito aberto para {self.host_of(url)}")
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+        try:
+            resp = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self.record_failure(url)
+            raise
+        except requests.RequestException:
+            with self._lock:
+                self._probing.discard(self.host_of(url))
+            raise
+        if resp.status_code >= 500:
+            self.record_failure(url)
+        else:
+            self.record_success(url)
+        return resp
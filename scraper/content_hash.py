@@ -0,0 +1,221 @@
+"""
+ContentHash — Deteção de Alterações e PATCH Mínimo
+==================================================
+Uma URL já conhecida era ignorada para sempre: correções no corpo de uma
+notícia ou no texto de uma vaga nunca chegavam à base, e re-ingerir seria
+reescrever a linha inteira. Cada linha leva agora `content_hash`:
+
+  "<d1>.<d2>.<d3>..."   um digest de 8 hex por coluna de HASHED_COLUMNS
+                        (texto normalizado: NFC, espaços colapsados)
+
+Comparar a string inteira diz se a linha mudou; comparar as partes diz QUAIS
+colunas mudaram, sem ler da base os corpos antigos. O modo `--update` dos
+motores volta a pedir os itens recentes e junta numa PatchQueue só as colunas
+alteradas (+ as derivadas, p.ex. o resumo de um corpo corrigido), aplicadas
+em lotes de BATCH_SIZE numa chamada RPC (`scraper_apply_patches`) — ou com um
+PATCH por linha se a função ainda não existir na base.
+
+Linhas sem hash (anteriores à migração 20261019000700) não recebem colunas de
+conteúdo no `--update`, só o `content_hash` — reescrevê-las inteiras apagaria
+edições do admin. O backfill calcula o hash do conteúdo que já está na base:
+
+    python scraper/content_hash.py backfill            # jobs + news_articles
+"""
+
+import os
+import re
+import sys
+import hashlib
+import logging
+import argparse
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import requests
+
+log = logging.getLogger("ContentHash")
+
+HASHED_COLUMNS = {
+    "jobs": ("title", "description", "requirements", "imagem_url"),
+    "news_articles": ("titulo", "corpo", "imagem_url"),
+}
+# Colunas calculadas a partir de uma coluna com hash: seguem-na no PATCH
+DERIVED_COLUMNS = {
+    "news_articles": {"corpo": ("resumo",)},
+}
+DIGEST_LEN = 8
+BATCH_SIZE = 100
+RPC_FUNCTION = "scraper_apply_patches"
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "\n".join(normalize(v) for v in value)
+    return _SPACE_RE.sub(" ", unicodedata.normalize("NFC", str(value))).strip()
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(normalize(value).encode("utf-8")).hexdigest()[:DIGEST_LEN]
+
+
+def content_hash(table: str, row: dict) -> str:
+    return ".".join(_digest(row.get(col)) for col in HASHED_COLUMNS[table])
+
+
+def changed_columns(table: str, old_hash: Optional[str], row: dict) -> List[str]:
+    """Colunas com hash cujo conteúdo mudou (todas, se a linha ainda não tinha hash)."""
+    columns = HASHED_COLUMNS[table]
+    new_parts = content_hash(table, row).split(".")
+    old_parts = (old_hash or "").split(".")
+    if len(old_parts) != len(columns):
+        return list(columns)
+    return [col for col, old, new in zip(columns, old_parts, new_parts) if old != new]
+
+
+def has_hash(table: str, value: Optional[str]) -> bool:
+    return len((value or "").split(".")) == len(HASHED_COLUMNS[table])
+
+
+def diff_patch(table: str, old_hash: Optional[str], row: dict) -> Optional[dict]:
+    """
+    {coluna: valor} a enviar (só o que mudou + content_hash), ou None se nada mudou.
+    Sem hash anterior não se sabe o que mudou: só o content_hash é gravado.
+    """
+    if not has_hash(table, old_hash):
+        return {"content_hash": content_hash(table, row)}
+    changed = changed_columns(table, old_hash, row)
+    if not changed:
+        return None
+    patch = {}
+    derived = DERIVED_COLUMNS.get(table, {})
+    for col in changed:
+        patch[col] = row.get(col)
+        for extra in derived.get(col, ()):
+            patch[extra] = row.get(extra)
+    patch["content_hash"] = content_hash(table, row)
+    return patch
+
+
+class PatchQueue:
+    """PATCHes mínimos acumulados durante o `--update` e aplicados em lotes no fim."""
+
+    def __init__(self, db, table: str, batch_size: int = BATCH_SIZE):
+        self.db = db
+        self.table = table
+        self.batch_size = batch_size
+        self.patches: List[dict] = []
+        self.columns: Dict[str, int] = {}
+        self.unchanged = 0
+        self.seeded = 0
+        self._lock = threading.Lock()
+
+    def compare(self, row_id, old_hash: Optional[str], row: dict) -> Optional[dict]:
+        patch = diff_patch(self.table, old_hash, row)
+        with self._lock:
+            if patch is None:
+                self.unchanged += 1
+                return None
+            self.add(row_id, patch)
+        return patch
+
+    def add(self, row_id, patch: dict) -> None:
+        self.patches.append({"id": row_id, **patch})
+        if len(patch) == 1 and "content_hash" in patch:
+            self.seeded += 1
+        for col in patch:
+            if col != "content_hash":
+                self.columns[col] = self.columns.get(col, 0) + 1
+
+    def flush(self) -> int:
+        """Aplica os PATCHes pendentes; devolve o nº de linhas atualizadas."""
+        with self._lock:
+            pending, self.patches = self.patches, []
+        applied = 0
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            n = self._apply_rpc(batch)
+            if n is None:
+                n = sum(
+                    1 for p in batch
+                    if self.db.update(self.table, {"id": f"eq.{p['id']}"}, {k: v for k, v in p.items() if k != "id"})
+                )
+            applied += n
+        if pending:
+            cols = ", ".join(f"{c}×{n}" for c, n in sorted(self.columns.items()))
+            log.info(f"🔁 {self.table}: {applied}/{len(pending)} linha(s) atualizada(s) ({cols or '—'}); "
+                     f"{self.seeded} só com content_hash (sem hash anterior); {self.unchanged} sem alterações")
+        return applied
+
+    def _apply_rpc(self, batch: List[dict]) -> Optional[int]:
+        """Um pedido por lote; None se a função RPC não existir (PATCH linha a linha)."""
+        try:
+            resp = requests.post(
+                f"{self.db.base_url}/rest/v1/rpc/{RPC_FUNCTION}",
+                headers={**self.db.headers, "Prefer": ""},
+                json={"target": self.table, "patches": batch},
+                timeout=30,
+            )
+        except requests.RequestException as e:
+            log.warning(f"⚠️  RPC {RPC_FUNCTION} falhou ({e}); PATCH linha a linha")
+            return None
+        if resp.status_code == 404:
+            return None
+        if resp.status_code >= 400:
+            log.error(f"❌ {RPC_FUNCTION}: {resp.status_code} {resp.text[:300]}")
+            return 0
+        return int(resp.json() or 0) if resp.content else len(batch)
+
+
+# ─────────────────────────────────────────────
+# BACKFILL DAS LINHAS SEM HASH
+# ─────────────────────────────────────────────
+def backfill(db, table: str, page: int = 500, dry_run: bool = False) -> int:
+    """content_hash das linhas que ainda não o têm, a partir do conteúdo já gravado."""
+    queue = PatchQueue(db, table)
+    last_id, seeded = None, 0
+    while True:
+        filters = {"content_hash": "is.null", "order": "id.asc", "limit": str(page)}
+        if last_id is not None:
+            filters["id"] = f"gt.{last_id}"
+        rows = db.select(table, filters, columns=",".join(("id",) + HASHED_COLUMNS[table]))
+        if not dry_run:
+            for row in rows:
+                queue.add(row["id"], {"content_hash": content_hash(table, row)})
+        seeded += len(rows)
+        if len(rows) < page:
+            break
+        last_id = rows[-1]["id"]
+    queue.flush()
+    log.info(f"🔁 {table}: {seeded} linha(s) {'sem hash' if dry_run else 'com content_hash calculado'}")
+    return seeded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calcula content_hash das vagas e notícias que não o têm")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--table", choices=sorted(HASHED_COLUMNS), help="só esta tabela")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from ango_job_scraper import SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+    db = SupabaseRestClient(url, key)
+    for table in [args.table] if args.table else HASHED_COLUMNS:
+        backfill(db, table, dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+ExpirySweeper — Revalidação das Vagas Publicadas
+================================================
+Uma vaga inserida ficava para sempre: nada verificava se `source_url` ainda
+existia. O sweeper revalida as vagas em lote, das verificadas há mais tempo
+para as mais recentes:
+
+  • HEAD com redirecionamentos: 404/410 e redirecionamentos decidem logo;
+    com 200, um GET condicional (If-None-Match / If-Modified-Since) e com
+    Range dos primeiros BODY_PEEK bytes procura o aviso de vaga encerrada.
+    Os hosts que recusam HEAD passam direto a esse GET
+  • Concorrência global limitada (--workers) e por host (--per-host),
+    com espaçamento entre pedidos ao mesmo host (HostThrottle) e o
+    disjuntor por host partilhado com os motores
+  • Expirada = 404/410, redirecionamento para a listagem (ou para uma
+    página "acima" da vaga) ou aviso de vaga encerrada no início da página
+  • Por lote: um único PATCH `id=in.(...)` com `expired_at` para as expiradas
+    e outro com `last_checked_at` para as vivas; erros de rede/5xx ficam por
+    decidir, com `check_attempted_at`, e só voltam passadas UNKNOWN_RETRY
+    (um host bloqueado não ocupa a cabeça de todos os lotes)
+
+A app deixa de mostrar vagas com `expired_at` e o pg_cron apaga-as ao fim de
+7 dias (migração 20261019000400_jobs_expiry.sql).
+
+    python scraper/expiry_sweeper.py                        # até 1000 vagas
+    python scraper/expiry_sweeper.py --limit 5000 --dry-run
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+
+from circuit_breaker import HostCircuitBreaker, CircuitOpenError
+from pipeline import HostThrottle
+from state_store import load_json, save_json
+
+log = logging.getLogger("ExpirySweeper")
+
+ALIVE, EXPIRED, UNKNOWN = "alive", "expired", "unknown"
+
+RECHECK_AFTER = timedelta(days=2)   # uma vaga viva só volta a ser vista passado este tempo
+UNKNOWN_RETRY = timedelta(hours=6)  # uma vaga por decidir (WAF, 5xx, circuito) volta passado este tempo
+BODY_PEEK = 64 * 1024               # bytes lidos no GET para detetar avisos de vaga encerrada
+VALIDATORS_FILE = "expiry_validators.json"
+VALIDATORS_MAX = 20000
+
+# Hosts que respondem mal a HEAD (405/403/501/400): passam logo a GET
+HEAD_REFUSED = {400, 403, 405, 501}
+
+EXPIRED_MARKERS = re.compile(
+    r"vaga\s+(?:j[áa]\s+)?(?:expir(?:ad|ou)|encerr(?:ad|ou)|fechad|indispon[íi]vel)|"
+    r"candidaturas?\s+(?:est[ãa]o\s+)?encerrad|"
+    r"this\s+job\s+(?:has\s+)?expired|no\s+longer\s+accepting\s+applications|"
+    r"p[áa]gina\s+n[ãa]o\s+encontrada",
+    re.IGNORECASE,
+)
+
+
+def listing_paths(configs: Dict[str, dict]) -> Dict[str, Set[str]]:
+    """{host: caminhos de listagem} a partir de JOBS_CONFIG (list_url + raiz)."""
+    paths: Dict[str, Set[str]] = {}
+    for cfg in configs.values():
+        for url in (cfg.get("list_url"), cfg.get("base_url")):
+            if url:
+                parsed = urlparse(url)
+                host = (parsed.hostname or "").lower().removeprefix("www.")
+                paths.setdefault(host, {""}).add(parsed.path.rstrip("/"))
+    return paths
+
+
+def classify(
+    url: str,
+    status: int,
+    final_url: str,
+    listings: Dict[str, Set[str]],
+    body: bytes = b"",
+) -> Tuple[str, str]:
+    """(veredicto, motivo) de uma resposta já seguida até ao fim dos redirecionamentos."""
+    if status in (404, 410):
+        return EXPIRED, str(status)
+    if status == 304:
+        return ALIVE, "304"
+    if status >= 400:
+        # 5xx, 429, 403 de WAF...: nada diz sobre a vaga
+        return UNKNOWN, str(status)
+
+    if final_url and final_url != url:
+        orig, final = urlparse(url), urlparse(final_url)
+        host = (final.hostname or "").lower().removeprefix("www.")
+        orig_path, final_path = orig.path.rstrip("/"), final.path.rstrip("/")
+        if final_path != orig_path:
+            if final_path in listings.get(host, {""}):
+                return EXPIRED, "redireciona para a listagem"
+            # /vagas/123-contabilista → /vagas: subiu na hierarquia
+            if orig_path.startswith(final_path + "/"):
+                return EXPIRED, "redireciona para página superior"
+
+    if body:
+        text = body.decode("utf-8", errors="ignore")
+        if EXPIRED_MARKERS.search(text):
+            return EXPIRED, "aviso de vaga encerrada"
+    return ALIVE, str(status)
+
+
+class ExpirySweeper:
+    def __init__(
+        self,
+        db,
+        listings: Dict[str, Set[str]],
+        workers: int = 16,
+        per_host: int = 2,
+        breaker: Optional[HostCircuitBreaker] = None,
+        headers: Optional[dict] = None,
+    ):
+        self.db = db
+        self.listings = listings
+        self.workers = workers
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        # Pool de ligações à medida da concorrência (o omissão do requests é 10)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.throttle = HostThrottle(per_host=per_host)
+        self.breaker = breaker or HostCircuitBreaker()
+        # url → [etag, last_modified] das respostas vivas (GET condicional)
+        self.validators: Dict[str, list] = load_json(VALIDATORS_FILE, {}) or {}
+        self._head_refused: Set[str] = set()
+        self._lock = threading.Lock()
+        self.stats = {ALIVE: 0, EXPIRED: 0, UNKNOWN: 0}
+
+    # ── Verificação de uma URL ────────────────────────────────────────────
+    def check(self, url: str) -> Tuple[str, str]:
+        host = HostCircuitBreaker.host_of(url)
+        try:
+            with self.throttle.slot(url, (0.3, 0.8)):
+                if host not in self._head_refused:
+                    resp = self.breaker.request(self.session, "HEAD", url, allow_redirects=True)
+                    if resp.status_code not in HEAD_REFUSED:
+                        verdict = classify(url, resp.status_code, resp.url, self.listings)
+                        # 200 sem redirecionamento suspeito: falta ver o corpo (vaga encerrada com 200)
+                        if verdict[0] != ALIVE or resp.status_code == 304:
+                            return verdict
+                    with self._lock:
+                        self._head_refused.add(host)
+                return self._conditional_get(url)
+        except CircuitOpenError:
+            return UNKNOWN, "circuito aberto"
+        except requests.RequestException as e:
+            return UNKNOWN, type(e).__name__
+
+    def _conditional_get(self, url: str) -> Tuple[str, str]:
+        headers = {"Range": f"bytes=0-{BODY_PEEK - 1}"}
+        etag, modified = (self.validators.get(url) or [None, None])[:2]
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+        resp = self.breaker.request(self.session, "GET", url, headers=headers, stream=True)
+        try:
+            body = b""
+            if resp.status_code in (200, 206):
+                for chunk in resp.iter_content(16 * 1024):
+                    body += chunk
+                    if len(body) >= BODY_PEEK:
+                        break
+            verdict = classify(url, resp.status_code, resp.url, self.listings, body)
+            if verdict[0] == ALIVE and (resp.headers.get("ETag") or resp.headers.get("Last-Modified")):
+                with self._lock:
+                    self.validators[url] = [resp.headers.get("ETag"), resp.headers.get("Last-Modified")]
+            return verdict
+        finally:
+            resp.close()
+
+    # ── Lotes ─────────────────────────────────────────────────────────────
+    def candidates(self, limit: int, recheck_after: timedelta = RECHECK_AFTER,
+                   unknown_retry: timedelta = UNKNOWN_RETRY) -> List[dict]:
+        """
+        Vagas não expiradas, nunca verificadas primeiro, depois as verificadas há
+        mais tempo; as que ficaram por decidir há menos de `unknown_retry` saltam-se.
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = (now - recheck_after).strftime("%Y-%m-%dT%H:%M:%SZ")
+        retry = (now - unknown_retry).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows, page = [], 1000
+        while len(rows) < limit:
+            batch = self.db.select("jobs", {
+                "expired_at": "is.null",
+                "source_url": "not.is.null",
+                "and": f"(or(last_checked_at.is.null,last_checked_at.lt.{cutoff}),"
+                       f"or(check_attempted_at.is.null,check_attempted_at.lt.{retry}))",
+                "order": "last_checked_at.asc.nullsfirst,id.asc",
+                "limit": str(min(page, limit - len(rows))),
+                "offset": str(len(rows)),
+            }, columns="id,source_url")
+            rows.extend(batch)
+            if len(batch) < page:
+                break
+        return rows
+
+    def sweep(self, rows: List[dict], batch: int = 200, dry_run: bool = False) -> Dict[str, int]:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            for i in range(0, len(rows), batch):
+                chunk = rows[i:i + batch]
+                verdicts = list(ex.map(lambda r: self.check(r["source_url"]), chunk))
+                self._apply(chunk, verdicts, dry_run)
+                done = i + len(chunk)
+                log.info(f"🧹 {done}/{len(rows)} verificadas | {self.stats[EXPIRED]} expiradas | "
+                         f"{self.stats[UNKNOWN]} por decidir | {done / (time.monotonic() - started):.1f} URL/s")
+        self.breaker.save()
+        self._save_validators()
+        return self.stats
+
+    def _apply(self, rows: List[dict], verdicts: Iterable[Tuple[str, str]], dry_run: bool) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        by_verdict: Dict[str, List] = {ALIVE: [], EXPIRED: [], UNKNOWN: []}
+        for row, (verdict, reason) in zip(rows, verdicts):
+            by_verdict[verdict].append(row["id"])
+            self.stats[verdict] += 1
+            if verdict == EXPIRED:
+                log.info(f"  ⌛ Expirada ({reason}): {row['source_url'][:90]}")
+                self.validators.pop(row["source_url"], None)
+        if dry_run:
+            return
+        # Um PATCH por veredicto e por lote, não um por vaga
+        if by_verdict[EXPIRED]:
+            self._patch(by_verdict[EXPIRED], {"expired_at": now, "last_checked_at": now})
+        if by_verdict[ALIVE]:
+            self._patch(by_verdict[ALIVE], {"last_checked_at": now})
+        if by_verdict[UNKNOWN]:
+            self._patch(by_verdict[UNKNOWN], {"check_attempted_at": now})
+
+    def _patch(self, ids: List, data: dict) -> None:
+        if not self.db.update("jobs", {"id": f"in.({','.join(map(str, ids))})"}, data):
+            log.error(f"❌ PATCH de {len(ids)} vaga(s) falhou ({', '.join(data)})")
+
+    def _save_validators(self) -> None:
+        # Limite de tamanho: o estado viaja na cache do workflow
+        if len(self.validators) > VALIDATORS_MAX:
+            self.validators = dict(list(self.validators.items())[-VALIDATORS_MAX:])
+        save_json(VALIDATORS_FILE, self.validators)
+
+
+# ─────────────────────────────────────────────
+# PONTO DE ENTRADA
+# ─────────────────────────────────────────────
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Marca como expiradas as vagas cuja página desapareceu")
+    parser.add_argument("--limit", type=int, default=1000, help="máximo de vagas verificadas nesta execução")
+    parser.add_argument("--batch", type=int, default=200, help="vagas por lote (um PATCH por lote)")
+    parser.add_argument("--workers", type=int, default=16, help="pedidos em simultâneo (todos os hosts)")
+    parser.add_argument("--per-host", type=int, default=2, help="pedidos em simultâneo ao mesmo host")
+    parser.add_argument("--dry-run", action="store_true", help="só verifica; não escreve no Supabase")
+    args = parser.parse_args(argv)
+
+    from ango_job_scraper import JOBS_CONFIG, AngoJobScraper, SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+
+    sweeper = ExpirySweeper(
+        SupabaseRestClient(url, key), listing_paths(JOBS_CONFIG),
+        workers=args.workers, per_host=args.per_host, headers=AngoJobScraper.BASE_HEADERS,
+    )
+    rows = sweeper.candidates(args.limit)
+    if not rows:
+        log.info("✅ Nenhuma vaga por verificar")
+        return 0
+    stats = sweeper.sweep(rows, batch=args.batch, dry_run=args.dry_run)
+    log.info(f"🏁 {stats[ALIVE]} vivas | {stats[EXPIRED]} expiradas | {stats[UNKNOWN]} por decidir")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
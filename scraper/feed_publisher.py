@@ -0,0 +1,299 @@
+"""
+FeedPublisher — Feeds JSON Estáticos para o Frontend
+====================================================
+Cada visita à app fazia queries ao Supabase para as últimas vagas por
+`categoria` e as últimas notícias por `categoria`/`is_priority`. Depois de
+cada execução dos motores, este publicador gera esses mesmos resultados
+como ficheiros estáticos, servidos pela CDN em vez de pela base de dados:
+
+  <out>/manifest.json                                  (cache curta)
+  <out>/jobs/todas/p1.<hash>.json[.gz|.br]             (imutáveis)
+  <out>/jobs/<categoria>/p1.<hash>.json ...
+  <out>/news/prioritarias/p1.<hash>.json ...
+
+  • Paginação igual à da app (30 itens); cada página aponta para a seguinte
+  • O hash do conteúdo está no nome → `Cache-Control: immutable` na CDN
+  • Um shard só é reescrito quando o conteúdo da sua categoria mudou
+    (hash do shard comparado com o manifest anterior)
+  • Versões pré-comprimidas gzip e brotli (se o pacote `brotli` existir)
+    ao lado de cada JSON, para hosts com gzip_static/brotli_static
+  • Ficheiros que já não constam do manifest atual nem do anterior são apagados,
+    localmente e (com --upload) no bucket; as variantes .gz/.br sobem com o
+    respetivo Content-Encoding
+  • Notícias: um cartão por história (story_id), com `story_sources` / `story_size`
+
+    python scraper/feed_publisher.py                 # gera em scraper/.feeds
+    python scraper/feed_publisher.py --upload        # + envia para o bucket 'feeds'
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+import requests
+from dotenv import load_dotenv
+
+from response_archive import source_slug
+
+try:
+    import brotli
+except ImportError:  # dependência opcional: só gzip
+    brotli = None
+
+log = logging.getLogger("FeedPublisher")
+
+OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".feeds")
+PAGE_SIZE = 30          # = NEWS_LIST_LIMIT do frontend
+MAX_ITEMS = 2000        # janela mais recente lida por feed
+BUCKET = "feeds"
+
+# Mesmo filtro de estados que services/api/*.service.ts usa para o público
+PUBLISHED = "(status.eq.publicado,status.eq.published,status.eq.aprovado,status.eq.approved)"
+
+FEEDS = {
+    "jobs": {
+        "table": "jobs",
+        "fields": "id,title,company,location,type,salary,posted_at,source_url,"
+                  "application_email,imagem_url,categoria,fonte,is_verified,province_code,municipality_code,"
+                  "salary_currency,salary_aoa_min,salary_aoa_max",
+        "order": "posted_at",
+        "filters": {"expired_at": "is.null"},   # expiry_sweeper.py
+    },
+    "news": {
+        "table": "news_articles",
+        "fields": "id,titulo,resumo,fonte,url_origem,categoria,published_at,status,imagem_url,is_priority,"
+                  "story_id,story_rank",
+        "order": "published_at",
+    },
+}
+
+
+def _canonical(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _digest(data: bytes, n: int = 12) -> str:
+    return hashlib.sha256(data).hexdigest()[:n]
+
+
+# ─────────────────────────────────────────────
+# SHARDS
+# ─────────────────────────────────────────────
+def collapse_stories(rows: List[dict]) -> List[dict]:
+    """Um cartão por história (story_clusters.py): a versão mais recente, com as outras fontes."""
+    out, by_story = [], {}
+    for row in rows:
+        story_id = row.get("story_id")
+        if not story_id:
+            out.append(row)
+            continue
+        card = by_story.get(story_id)
+        if card is None:
+            card = by_story[story_id] = {**row, "story_size": 1, "story_sources": [row.get("fonte")]}
+            out.append(card)
+            continue
+        card["story_size"] += 1
+        card["is_priority"] = card.get("is_priority") or row.get("is_priority")
+        if row.get("fonte") not in card["story_sources"]:
+            card["story_sources"].append(row.get("fonte"))
+    return out
+
+
+def group_shards(kind: str, rows: List[dict]) -> Dict[str, dict]:
+    """{slug: {"label", "items"}} — 'todas', uma por categoria e, nas notícias, 'prioritarias'."""
+    shards = {"todas": {"label": "Todas", "items": list(rows)}}
+    for row in rows:
+        label = (row.get("categoria") or "Geral").strip() or "Geral"
+        shards.setdefault(source_slug(label), {"label": label, "items": []})["items"].append(row)
+    if kind == "news":
+        shards["prioritarias"] = {"label": "Prioritárias", "items": [r for r in rows if r.get("is_priority")]}
+    return shards
+
+
+class FeedPublisher:
+    def __init__(self, out_dir: str = OUT_DIR, page_size: int = PAGE_SIZE):
+        self.out_dir = out_dir
+        self.page_size = page_size
+        self.previous = self._load_manifest()
+        self.written: List[str] = []   # caminhos relativos escritos nesta execução
+        self.removed: List[str] = []   # ficheiros (com variantes) apagados pelo _prune
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.out_dir, "manifest.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, rel: str, data: bytes) -> None:
+        path = os.path.join(self.out_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        variants = {rel: data, rel + ".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli:
+            variants[rel + ".br"] = brotli.compress(data, quality=11)
+        for name, blob in variants.items():
+            with open(os.path.join(self.out_dir, name), "wb") as f:
+                f.write(blob)
+        self.written.append(rel)
+
+    def publish_shard(self, kind: str, slug: str, label: str, items: List[dict]) -> dict:
+        shard_hash = _digest(_canonical(items), 16)
+        old = self.previous.get(kind, {}).get(slug)
+        if old and old["hash"] == shard_hash and all(
+            os.path.exists(os.path.join(self.out_dir, p)) for p in old["pages"]
+        ):
+            return old
+
+        pages = [items[i:i + self.page_size] for i in range(0, len(items), self.page_size)] or [[]]
+        names: List[Optional[str]] = [None] * len(pages)
+        # Da última para a primeira: cada página conhece o nome (com hash) da seguinte
+        for i in range(len(pages) - 1, -1, -1):
+            next_name = names[i + 1] if i + 1 < len(pages) else None
+            body = _canonical({
+                "feed": kind, "shard": slug, "label": label,
+                "page": i + 1, "pages": len(pages), "total": len(items),
+                "next": next_name, "items": pages[i],
+            })
+            names[i] = f"{kind}/{slug}/p{i + 1}.{_digest(body)}.json"
+            self._write(names[i], body)
+        log.info(f"  📰 {kind}/{slug}: {len(items)} itens em {len(pages)} página(s) (alterado)")
+        return {"label": label, "hash": shard_hash, "total": len(items), "pages": names}
+
+    def publish(self, feeds: Dict[str, List[dict]]) -> dict:
+        manifest = {"generated_at": datetime.now(timezone.utc).isoformat(), "page_size": self.page_size}
+        for kind, rows in feeds.items():
+            shards = group_shards(kind, collapse_stories(rows) if kind == "news" else rows)
+            manifest[kind] = {
+                slug: self.publish_shard(kind, slug, s["label"], s["items"])
+                for slug, s in sorted(shards.items())
+            }
+        if self.written:
+            tmp = os.path.join(self.out_dir, "manifest.json.tmp")
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, os.path.join(self.out_dir, "manifest.json"))
+            self._prune(manifest)
+        else:
+            manifest = self.previous
+        return manifest
+
+    @staticmethod
+    def _referenced(manifest: dict) -> Set[str]:
+        refs = set()
+        for kind in FEEDS:
+            for shard in manifest.get(kind, {}).values():
+                refs.update(shard["pages"])
+        return refs
+
+    def _prune(self, manifest: dict) -> None:
+        """Mantém a geração atual e a anterior (clientes com o manifest antigo em cache)."""
+        keep = self._referenced(manifest) | self._referenced(self.previous)
+        for kind in FEEDS:
+            root = os.path.join(self.out_dir, kind)
+            for folder, _, files in os.walk(root):
+                for name in files:
+                    rel = os.path.relpath(os.path.join(folder, name), self.out_dir).replace(os.sep, "/")
+                    base = rel[:-3] if rel.endswith((".gz", ".br")) else rel
+                    if base not in keep:
+                        os.remove(os.path.join(folder, name))
+                        self.removed.append(rel)
+
+
+# ─────────────────────────────────────────────
+# SUPABASE (leitura + Storage)
+# ─────────────────────────────────────────────
+def fetch_feed(base_url: str, key: str, feed: dict, max_items: int = MAX_ITEMS) -> List[dict]:
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    rows, page = [], 1000
+    while len(rows) < max_items:
+        resp = requests.get(
+            f"{base_url}/rest/v1/{feed['table']}",
+            headers=headers,
+            params={
+                "select": feed["fields"], "or": PUBLISHED,
+                "order": f"{feed['order']}.desc,id.desc",
+                "limit": min(page, max_items - len(rows)), "offset": len(rows),
+                **feed.get("filters", {}),
+            },
+            timeout=30,
+        )
+        resp.raise_for_status()
+        batch = resp.json()
+        rows.extend(batch)
+        if len(batch) < page:
+            break
+    return rows
+
+
+ENCODINGS = {".gz": "gzip", ".br": "br"}
+
+
+def upload(base_url: str, key: str, out_dir: str, paths: List[str], removed: List[str] = ()) -> None:
+    """
+    Envia para o bucket público `feeds`: shards imutáveis (com as variantes
+    .gz/.br) + manifest com cache curta; depois apaga do bucket o que o _prune
+    apagou localmente. O manifest novo sobe antes de apagar: nenhum cliente
+    fica a apontar para páginas já removidas.
+    """
+    session = requests.Session()
+    session.headers.update({"apikey": key, "Authorization": f"Bearer {key}", "x-upsert": "true"})
+    files = [v for rel in paths for v in (rel, *(rel + ext for ext in ENCODINGS))
+             if os.path.exists(os.path.join(out_dir, v))]
+    for rel in files + ["manifest.json"]:
+        cache = "max-age=60" if rel == "manifest.json" else "max-age=31536000, immutable"
+        headers = {"Content-Type": "application/json", "cache-control": cache}
+        encoding = ENCODINGS.get(os.path.splitext(rel)[1])
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        with open(os.path.join(out_dir, rel), "rb") as f:
+            resp = session.post(
+                f"{base_url}/storage/v1/object/{BUCKET}/{rel}", data=f.read(), headers=headers, timeout=30,
+            )
+        if resp.status_code >= 400:
+            log.error(f"❌ Upload falhou para {rel}: {resp.status_code} {resp.text[:200]}")
+
+    removed = list(removed)
+    for i in range(0, len(removed), 1000):
+        resp = session.delete(
+            f"{base_url}/storage/v1/object/{BUCKET}", json={"prefixes": removed[i:i + 1000]}, timeout=30,
+        )
+        if resp.status_code >= 400:
+            log.error(f"❌ Remoção falhou ({len(removed[i:i + 1000])} ficheiro(s)): "
+                      f"{resp.status_code} {resp.text[:200]}")
+    if removed:
+        log.info(f"🗑️  {len(removed)} ficheiro(s) antigo(s) removido(s) do bucket")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Publica feeds JSON estáticos (vagas e notícias)")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--max-items", type=int, default=MAX_ITEMS, help="itens mais recentes por feed")
+    parser.add_argument("--upload", action="store_true", help="envia os ficheiros novos para o Storage")
+    args = parser.parse_args(argv)
+
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    base_url = (os.getenv("VITE_SUPABASE_URL") or "").rstrip("/")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not base_url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+
+    feeds = {kind: fetch_feed(base_url, key, feed, args.max_items) for kind, feed in FEEDS.items()}
+    publisher = FeedPublisher(args.out)
+    publisher.publish(feeds)
+    log.info(f"✅ Feeds: {len(publisher.written)} página(s) reescrita(s) em {args.out}")
+    if args.upload and publisher.written:
+        upload(base_url, key, args.out, publisher.written, publisher.removed)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
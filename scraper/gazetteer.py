@@ -0,0 +1,308 @@
+"""
+Gazetteer — Normalização de Localizações Angolanas
+==================================================
+`location` chega como o texto do card ("Luanda, Talatona", "Huila",
+"Lunda N.", "Angola" por omissão — ou até uma data, na AngoVagas), o que
+obriga a filtros `ilike` lentos e inconsistentes. Este módulo resolve esse
+texto contra um gazetteer em memória das 18 províncias e dos seus 164
+municípios e devolve códigos estáveis, indexáveis no Supabase:
+
+  province_code      → código ISO 3166-2:AO sem prefixo ("LUA", "HUI", "CNO")
+  municipality_code  → província + nome do município ("LUA-TALATONA")
+
+  • Comparação sem acentos nem maiúsculas ("Huíla" = "huila" = "HUILA")
+  • Prefixos inequívocos ("Lunda N." → Lunda Norte, "Benguel" → Benguela),
+    só no campo de localização; no título/resumo (`resolve_first`) só nomes
+    exatos e abreviaturas com ponto — "Massa salarial" não é Massango
+  • Nomes alternativos e bairros frequentes nos anúncios
+    ("Kwanza Sul", "Kuito", "Kilamba", "Ondjiva", "Dundo"...)
+  • Nomes partilhados por província e município ("Luanda", "Huambo")
+    contam como província; o município só é fixado quando é explícito
+
+    python scraper/gazetteer.py resolve "Talatona, Luanda"
+    python scraper/gazetteer.py backfill            # vagas sem province_code
+"""
+
+import os
+import re
+import sys
+import bisect
+import logging
+import argparse
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger("Gazetteer")
+
+# código → (nome, municípios)
+PROVINCES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "BGO": ("Bengo", ("Ambriz", "Bula Atumba", "Dande", "Dembos", "Nambuangongo", "Pango Aluquém")),
+    "BGU": ("Benguela", ("Baía Farta", "Balombo", "Benguela", "Bocoio", "Caimbambo", "Catumbela",
+                         "Chongorói", "Cubal", "Ganda", "Lobito")),
+    "BIE": ("Bié", ("Andulo", "Camacupa", "Catabola", "Chinguar", "Chitembo", "Cuemba", "Cunhinga",
+                    "Cuíto", "Nharea")),
+    "CAB": ("Cabinda", ("Belize", "Buco-Zau", "Cabinda", "Cacongo")),
+    "CCU": ("Cuando Cubango", ("Calai", "Cuangar", "Cuchi", "Cuito Cuanavale", "Dirico", "Mavinga",
+                               "Menongue", "Nancova", "Rivungo")),
+    "CNO": ("Cuanza Norte", ("Ambaca", "Banga", "Bolongongo", "Cambambe", "Cazengo", "Golungo Alto",
+                             "Gonguembo", "Lucala", "Quiculungo", "Samba Cajú")),
+    "CUS": ("Cuanza Sul", ("Amboim", "Cassongue", "Cela", "Conda", "Ebo", "Libolo", "Mussende",
+                           "Porto Amboim", "Quibala", "Quilenda", "Seles", "Sumbe")),
+    "CNN": ("Cunene", ("Cahama", "Cuanhama", "Curoca", "Cuvelai", "Namacunde", "Ombadja")),
+    "HUA": ("Huambo", ("Bailundo", "Caála", "Cachiungo", "Chicala-Choloanga", "Chinjenje", "Ecunha",
+                       "Huambo", "Londuimbali", "Longonjo", "Mungo", "Ucuma")),
+    "HUI": ("Huíla", ("Caconda", "Cacula", "Caluquembe", "Chiange", "Chibia", "Chicomba", "Chipindo",
+                      "Cuvango", "Humpata", "Jamba", "Lubango", "Matala", "Quilengues", "Quipungo")),
+    "LUA": ("Luanda", ("Belas", "Cacuaco", "Cazenga", "Ícolo e Bengo", "Kilamba Kiaxi", "Luanda",
+                       "Quissama", "Talatona", "Viana")),
+    "LNO": ("Lunda Norte", ("Cambulo", "Capenda-Camulemba", "Caungula", "Chitato", "Cuango", "Cuílo",
+                            "Lóvua", "Lubalo", "Lucapa", "Xá-Muteba")),
+    "LSU": ("Lunda Sul", ("Cacolo", "Dala", "Muconda", "Saurimo")),
+    "MAL": ("Malanje", ("Cacuso", "Calandula", "Cambundi-Catembo", "Cangandala", "Caombo",
+                        "Cuaba Nzoji", "Cunda-Dia-Baze", "Luquembo", "Malanje", "Marimba", "Massango",
+                        "Mucari", "Quela", "Quirima")),
+    "MOX": ("Moxico", ("Alto Zambeze", "Bundas", "Camanongue", "Cameia", "Léua", "Luacano", "Luau",
+                       "Luchazes", "Moxico")),
+    "NAM": ("Namibe", ("Bibala", "Camucuio", "Moçâmedes", "Tômbua", "Virei")),
+    "UIG": ("Uíge", ("Alto Cauale", "Ambuíla", "Bembe", "Buengas", "Bungo", "Damba", "Maquela do Zombo",
+                     "Milunga", "Mucaba", "Negage", "Puri", "Quimbele", "Quitexe", "Sanza Pombo", "Songo",
+                     "Uíge")),
+    "ZAI": ("Zaire", ("Cuimba", "Mbanza Kongo", "Nóqui", "Nzeto", "Soyo", "Tomboco")),
+}
+
+# Grafias alternativas das províncias
+PROVINCE_ALIASES = {
+    "Kwanza Norte": "CNO", "Kuanza Norte": "CNO", "K. Norte": "CNO",
+    "Kwanza Sul": "CUS", "Kuanza Sul": "CUS", "K. Sul": "CUS",
+    "Kuando Kubango": "CCU", "Cuando-Cubango": "CCU",
+    "Kunene": "CNN", "Bie": "BIE", "Moxico Leste": "MOX",
+}
+
+# Sedes, grafias alternativas e bairros/comunas frequentes → (província, município)
+MUNICIPALITY_ALIASES = {
+    "Kuito": ("BIE", "Cuíto"), "Cuito": ("BIE", "Cuíto"),
+    "Caxito": ("BGO", "Dande"),
+    "Ndalatando": ("CNO", "Cazengo"), "N'dalatando": ("CNO", "Cazengo"),
+    "Ondjiva": ("CNN", "Cuanhama"), "Ongiva": ("CNN", "Cuanhama"),
+    "Luena": ("MOX", "Moxico"),
+    "Dundo": ("LNO", "Chitato"),
+    "Waku Kungo": ("CUS", "Cela"), "Gabela": ("CUS", "Amboim"),
+    "M'banza Kongo": ("ZAI", "Mbanza Kongo"), "Mbanza Congo": ("ZAI", "Mbanza Kongo"),
+    "Kilamba": ("LUA", "Belas"), "Benfica": ("LUA", "Belas"),
+    "Camama": ("LUA", "Talatona"), "Luanda Sul": ("LUA", "Talatona"), "Morro Bento": ("LUA", "Talatona"),
+    "Zango": ("LUA", "Viana"), "Catete": ("LUA", "Ícolo e Bengo"),
+    "Ingombota": ("LUA", "Luanda"), "Maianga": ("LUA", "Luanda"), "Rangel": ("LUA", "Luanda"),
+    "Sambizanga": ("LUA", "Luanda"), "Maculusso": ("LUA", "Luanda"), "Alvalade": ("LUA", "Luanda"),
+    "Tombwa": ("NAM", "Tômbua"),
+}
+
+MIN_PREFIX = 5      # prefixos mais curtos são ambíguos demais ("bela" ≠ Belas)
+MAX_WORDS = 4       # nome mais longo: "cunda dia baze", "maquela do zombo"
+
+# Expressões com o nome de um lugar que não designam o lugar (só em texto livre)
+NOT_PLACES = {"belas artes"}
+
+
+def fold(text: str) -> str:
+    """'Ícolo-e-Bengo' → 'icolo e bengo' (sem acentos, pontuação como espaço)."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text.replace("'", "")))
+
+
+def _words(text: str) -> List[Tuple[str, bool]]:
+    """Palavras de fold(text), cada uma com True se vier seguida de "." (abreviatura)."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower().replace("'", "")
+    return [(m.group(), text[m.end():m.end() + 1] == ".") for m in re.finditer(r"[a-z0-9]+", text)]
+
+
+def municipality_code(province: str, municipality: str) -> str:
+    return f"{province}-{fold(municipality).replace(' ', '-').upper()}"
+
+
+class Location:
+    __slots__ = ("province_code", "province", "municipality_code", "municipality")
+
+    def __init__(self, province_code: str, municipality: Optional[str] = None):
+        self.province_code = province_code
+        self.province = PROVINCES[province_code][0]
+        self.municipality = municipality
+        self.municipality_code = municipality_code(province_code, municipality) if municipality else None
+
+    @property
+    def label(self) -> str:
+        """'Talatona, Luanda' / 'Huíla'"""
+        if self.municipality and self.municipality != self.province:
+            return f"{self.municipality}, {self.province}"
+        return self.province
+
+    def to_columns(self) -> dict:
+        return {"province_code": self.province_code, "municipality_code": self.municipality_code}
+
+    def __repr__(self) -> str:
+        return f"Location({self.municipality_code or self.province_code})"
+
+
+# ─────────────────────────────────────────────
+# ÍNDICE EM MEMÓRIA
+# ─────────────────────────────────────────────
+# Uma lista ordenada de (nome dobrado, entradas): procura exata por bisect e
+# prefixos pela mesma lista. Entradas: ("P", código) ou ("M", código, município).
+def _build_index() -> Tuple[List[str], List[Tuple[tuple, ...]]]:
+    entries: Dict[str, set] = {}
+    for code, (name, municipalities) in PROVINCES.items():
+        entries.setdefault(fold(name), set()).add(("P", code))
+        for m in municipalities:
+            # Homónimo da província: conta como província
+            if fold(m) != fold(name):
+                entries.setdefault(fold(m), set()).add(("M", code, m))
+    for alias, code in PROVINCE_ALIASES.items():
+        entries.setdefault(fold(alias), set()).add(("P", code))
+    for alias, (code, m) in MUNICIPALITY_ALIASES.items():
+        entries.setdefault(fold(alias), set()).add(("M", code, m))
+    keys = sorted(entries)
+    return keys, [tuple(sorted(entries[k])) for k in keys]
+
+
+_KEYS, _ENTRIES = _build_index()
+
+
+def _lookup(phrase: str, prefix: bool = True) -> Tuple[tuple, ...]:
+    """Entradas de um nome exato ou, com `prefix`, de um prefixo inequívoco."""
+    i = bisect.bisect_left(_KEYS, phrase)
+    if i < len(_KEYS) and _KEYS[i] == phrase:
+        return _ENTRIES[i]
+    if not prefix or len(phrase) < MIN_PREFIX:
+        return ()
+    j = bisect.bisect_left(_KEYS, phrase + "￿", lo=i)
+    # Palavra inteira que só cobre o início de um nome composto não conta:
+    # "Porto" não é "Porto Amboim", mas "Lunda N" é "Lunda Norte"
+    candidates = {e for k in range(i, j) if _KEYS[k][len(phrase)] != " " for e in _ENTRIES[k]}
+    # Todas as chaves com este prefixo têm de designar o mesmo lugar
+    return tuple(candidates) if len(candidates) == 1 else ()
+
+
+def _scan(text: str, prefixes: bool = True) -> List[Tuple[tuple, ...]]:
+    """
+    Frases reconhecidas, da esquerda para a direita, a mais longa em cada posição.
+    Sem `prefixes` (texto livre), só nomes exatos ou abreviados ("Lunda N.").
+    """
+    tokens = _words(text)
+    words = [w for w, _ in tokens]
+    found, i = [], 0
+    while i < len(words):
+        if not prefixes and " ".join(words[i:i + 2]) in NOT_PLACES:
+            i += 2
+            continue
+        for n in range(min(MAX_WORDS, len(words) - i), 0, -1):
+            hit = _lookup(" ".join(words[i:i + n]), prefixes or tokens[i + n - 1][1])
+            if hit:
+                found.append(hit)
+                i += n
+                break
+        else:
+            i += 1
+    return found
+
+
+def resolve(text: str, prefixes: bool = True) -> Optional[Location]:
+    """
+    Texto de localização → Location, ou None se nada for reconhecido.
+    `prefixes=False` para texto que não é uma localização (título, resumo).
+    """
+    hits = _scan(text, prefixes)
+    if not hits:
+        return None
+    provinces = [e[1] for hit in hits for e in hit if e[0] == "P"]
+    municipalities = [e for hit in hits for e in hit if e[0] == "M"]
+
+    province = provinces[0] if provinces else None
+    if province:
+        # Município só se pertencer à província indicada
+        for _, code, name in municipalities:
+            if code == province:
+                return Location(code, name)
+        return Location(province)
+    # Sem província explícita: o município decide, desde que não seja homónimo
+    first = next((hit for hit in hits if all(e[0] == "M" for e in hit)), ())
+    if len({e[1] for e in first}) == 1:
+        _, code, name = first[0]
+        return Location(code, name)
+    return None
+
+
+def resolve_first(*texts: str) -> Optional[Location]:
+    """Primeiro texto livre (título → resumo) com um lugar reconhecido, sem prefixos."""
+    for text in texts:
+        location = resolve(text, prefixes=False) if text else None
+        if location:
+            return location
+    return None
+
+
+# ─────────────────────────────────────────────
+# BACKFILL DAS VAGAS EXISTENTES
+# ─────────────────────────────────────────────
+def backfill(db, page: int = 1000, dry_run: bool = False) -> int:
+    """
+    Códigos para as vagas sem `province_code`. As linhas são agrupadas por
+    resultado e cada grupo vai num PATCH com `id=in.(...)`, não um por vaga.
+    """
+    groups: Dict[Tuple[str, Optional[str]], List] = {}
+    last_id, scanned = None, 0
+    while True:
+        filters = {"province_code": "is.null", "order": "id.asc", "limit": str(page)}
+        if last_id is not None:
+            filters["id"] = f"gt.{last_id}"
+        rows = db.select("jobs", filters, columns="id,location,title")
+        for row in rows:
+            location = resolve(row.get("location") or "") or resolve_first(row.get("title"))
+            if location:
+                groups.setdefault((location.province_code, location.municipality_code), []).append(row["id"])
+        scanned += len(rows)
+        if len(rows) < page:
+            break
+        last_id = rows[-1]["id"]
+
+    touched = 0
+    for (province, municipality), ids in groups.items():
+        for i in range(0, len(ids), 200):
+            chunk = ids[i:i + 200]
+            data = {"province_code": province, "municipality_code": municipality}
+            if dry_run or db.update("jobs", {"id": f"in.({','.join(map(str, chunk))})"}, data):
+                touched += len(chunk)
+    log.info(f"📍 {touched}/{scanned} vaga(s) {'a localizar' if dry_run else 'localizadas'} "
+             f"em {len(groups)} local(is)")
+    return touched
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gazetteer de províncias e municípios de Angola")
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("resolve", help="resolve um texto de localização")
+    r.add_argument("text")
+    b = sub.add_parser("backfill", help="preenche province_code/municipality_code nas vagas")
+    b.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "resolve":
+        location = resolve(args.text)
+        print(f"{location.label} → {location.to_columns()}" if location else "—")
+        return 0 if location else 1
+
+    from dotenv import load_dotenv
+    from ango_job_scraper import SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+    backfill(SupabaseRestClient(url, key), dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
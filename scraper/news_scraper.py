@@ -24,7 +24,13 @@ Funcionalidades:
   ✅ Extração de imagem em 3 níveis (og:image → img → placeholder)
   ✅ Flags de Urgência (is_priority) e categoria automática
   ✅ Loop independente com try-except por site
-  ✅ Deduplicação por url_origem antes do insert no Supabase
+  ✅ Pipeline em estágios (discover → dedup → fetch → parse → enrich → cluster → write)
+  ✅ Deduplicação por url_key (URL canónica, url_canon.py) antes do insert no Supabase
+  ✅ Histórias entre fontes: story_id + story_rank por MinHash/LSH (story_clusters.py)
+  ✅ Via rápida (--fast-lane): só as listagens urgentes, GET condicional, só títulos prioritários
+  ✅ content_hash por linha; --update re-verifica as notícias recentes e faz PATCH só do que mudou
+  ✅ Escritas pela fila durável (outbox.py): uma falha da base não perde a notícia extraída
+  ✅ Arquivo WARC das respostas (--archive) para re-extração offline (replay.py)
 
 Dependências:
     pip install requests beautifulsoup4 python-dotenv
@@ -34,28 +40,49 @@ import re
 import os
 import time
 import json
+import hashlib
 import logging
+import argparse
+import threading
 import unicodedata
-from datetime import datetime, timezone
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta, timezone
+from contextlib import nullcontext
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, List, Dict, Tuple, Iterator
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+from source_scheduler import SourceScheduler
+from circuit_breaker import HostCircuitBreaker, CircuitOpenError, CONNECT_TIMEOUT
+from charset import CharsetResolver
+from parse_pool import ParsePool, default_workers
+from pipeline import Pipeline, Stage, HostThrottle
+from run_profiler import PROFILE_DIR, RunProfiler
+from response_archive import ResponseArchive
+from outbox import Outbox
+from sinks import SINK_KINDS, SupabaseSink, make_sink
+from search_index import SearchIndex, INDEX_PATH
+from url_canon import canonical_url, dedup_filters, ensure_url_keys, url_key
+from story_clusters import StoryIndex
+from state_store import load_json, save_json
+from content_hash import PatchQueue, content_hash
+from run_logging import item_logger, log_context, setup_logging
+from time_budget import TimeBudget
+from sharding import Shard, parse_shard
+from reclassify import NewsClassifier
+
 # ─────────────────────────────────────────────
 # CONFIGURAÇÃO DE LOGGING
 # ─────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("news_scraper.log", encoding="utf-8"),
-    ],
-)
+# Configurado no arranque (run_logging.setup_logging): fila + listener, consola em
+# texto e news_scraper.jsonl estruturado; mensagens por item em `item_log`, amostradas
+LOG_FILE = "news_scraper.jsonl"
 log = logging.getLogger("AngoNewsScraper")
+item_log = item_logger("AngoNewsScraper")
 
 RESOLVEAO_PLACEHOLDER = "https://resolveao.vercel.app/og-image.jpg"
 
@@ -66,6 +93,12 @@ PRIORITY_KEYWORDS = [
     'Última Hora', 'Urgente', 'Flash', 'BNA', 'Kwanza',
     'Breaking', 'Alerta', 'Atenção', 'Mandato', 'Crise'
 ]
+# Via rápida (--fast-lane): fontes de última hora vigiadas a cada poucos minutos
+FAST_LANE_SOURCES = ("ANGOP", "TPA", "Jornal de Angola")
+LISTING_VALIDATORS_FILE = "news_listing_validators.json"
+# Segundos de respeito entre artigos do mesmo portal
+DETAIL_DELAY = 1.5
+
 OPPORTUNITY_KEYWORDS = [
     'Concurso', 'Estado', 'Admissão', 'Bolsa', 'Recrutamento',
     'Vaga', 'Emprego', 'Estágio', 'Candidatura'
@@ -78,6 +111,10 @@ CULTURE_KEYWORDS = [
     'Cultura', 'Arte', 'Música', 'Festival', 'Cinema', 'Literatura',
     'Futebol', 'Sport', 'Desporto', 'Entretenimento'
 ]
+# Listas compiladas numa regex cada (partilhadas com o reclassify.py)
+CLASSIFIER = NewsClassifier(PRIORITY_KEYWORDS, [
+    ("Oportunidades", OPPORTUNITY_KEYWORDS), ("Economia", ECONOMY_KEYWORDS), ("Cultura", CULTURE_KEYWORDS),
+])
 
 # ─────────────────────────────────────────────────────────────────────────
 # SITES_CONFIG — Dicionário Global de Adaptadores
@@ -243,9 +280,6 @@ class SupabaseRestClient:
                 json=data,
                 timeout=10,
             )
-            # Depuração solicitada pelo utilizador: Resposta do Supabase
-            log.info(f"Resposta do Supabase: {resp.status_code} {resp.text}")
-            
             if resp.status_code >= 400:
                 log.error(f"❌ Erro na inserção: {resp.text}")
                 log.error(f"Payload com erro: {json.dumps(data, ensure_ascii=False)[:500]}")
@@ -255,6 +289,24 @@ class SupabaseRestClient:
             log.error(f"💥 Falha de conexão Supabase: {e}")
             return False
 
+    def update(self, table: str, filters: dict, data: dict) -> bool:
+        """PATCH das linhas que satisfazem `filters` (sintaxe PostgREST, p.ex. {"id": "eq.42"})."""
+        try:
+            resp = requests.patch(
+                f"{self.base_url}/rest/v1/{table}",
+                headers=self.headers,
+                params=filters,
+                json=data,
+                timeout=10,
+            )
+            if resp.status_code >= 400:
+                log.error(f"❌ Erro na atualização: {resp.text}")
+                return False
+            return True
+        except Exception as e:
+            log.error(f"💥 Falha de conexão Supabase: {e}")
+            return False
+
 
 # ─────────────────────────────────────────────
 # MOTOR PRINCIPAL - CLASSE AngoNewsScraper
@@ -274,12 +326,60 @@ class AngoNewsScraper:
         "Connection": "keep-alive",
     }
 
-    def __init__(self, db: SupabaseRestClient):
+    # Threads por estágio do pipeline (o parse sobe para o nº de workers do ParsePool)
+    STAGE_CONCURRENCY = {"discover": 4, "dedup": 2, "fetch": 4, "parse": 1, "enrich": 1, "cluster": 1, "write": 2}
+
+    def __init__(
+        self,
+        db: SupabaseRestClient,
+        scheduler: Optional[SourceScheduler] = None,
+        breaker: Optional[HostCircuitBreaker] = None,
+        parser: Optional[ParsePool] = None,
+        archive: Optional[ResponseArchive] = None,
+        sink=None,
+        index: Optional[SearchIndex] = None,
+        profiler: Optional[RunProfiler] = None,
+        budget: Optional[TimeBudget] = None,
+        shard: Optional[Shard] = None,
+        stories: Optional[StoryIndex] = None,
+    ):
         self.db = db
+        # Agendador adaptativo: decide que portais estão "em janela" e por que ordem
+        self.scheduler = scheduler or SourceScheduler("news", min_interval=1800)
+        # Disjuntor por host: portais mortos custam zero segundos em vez de minutos
+        self.breaker = breaker or HostCircuitBreaker()
+        # Parsing em linha (omissão) ou num pool de processos (--workers N)
+        self.parser = parser or ParsePool(0)
+        # Respostas brutas gravadas para replay (None = não arquiva)
+        self.archive = archive
+        # Destino das linhas: Supabase (omissão) ou ficheiros locais (--sink ndjson|parquet)
+        self.sink = sink or SupabaseSink(db)
+        # Índice full-text local, atualizado a cada linha guardada (None = desligado)
+        self.index = index
+        # Perfil de CPU por fonte + snapshots de memória (--profile; None = desligado)
+        self.profiler = profiler
+        # Prazo da execução e custo esperado por ação (--time-budget; None = sem prazo)
+        self.budget = budget
+        # Parte das fontes / URLs que cabe a este processo (--shard i/N; None = todas)
+        self.shard = shard
+        # Agrupamento da mesma notícia entre fontes (janela de 72 h em .state)
+        self.stories = stories or StoryIndex()
+        # PATCHes mínimos do modo --update (content_hash.py)
+        self._patches: Optional[PatchQueue] = None
+        # url da listagem → {etag, modified, digest} (só na via rápida)
+        self.listing_validators: Dict[str, dict] = {}
         # Sessão com User-Agent real Chrome 122 — evita bloqueios 403
         self.session = requests.Session()
         self.session.headers.update(self.DEFAULT_HEADERS)
         self.stats = {"processed": 0, "saved": 0, "skipped_dup": 0, "errors": 0}
+        # Cortesia por host partilhada pelos estágios de fetch
+        self.throttle = HostThrottle()
+        # Codificação: header → <meta> → memo do host → deteção num prefixo (não o corpo todo)
+        self.charsets = CharsetResolver()
+        self._stats_lock = threading.Lock()
+        self._saved_per_site: Dict[str, int] = {}
+        # url_key já vistas na base ou guardadas nesta execução: sem novo SELECT
+        self._known_keys: set = set()
 
     # ── Normalização de URLs relativas ────────────────────────────────────
     def normalize_url(self, url: str, base_url: str) -> str:
@@ -328,18 +428,7 @@ class AngoNewsScraper:
         - Verifica palavras de economia → categoria = 'Economia' (override)
         - Caso contrário, usa a categoria fixa do adaptador.
         """
-        title_normal = title  # mantém acentos para matching
-        is_priority = any(kw.lower() in title_normal.lower() for kw in PRIORITY_KEYWORDS)
-        
-        # Override de categoria
-        if any(kw.lower() in title_normal.lower() for kw in OPPORTUNITY_KEYWORDS):
-            return "Oportunidades", is_priority
-        if any(kw.lower() in title_normal.lower() for kw in ECONOMY_KEYWORDS):
-            return "Economia", is_priority
-        if any(kw.lower() in title_normal.lower() for kw in CULTURE_KEYWORDS):
-            return "Cultura", is_priority
-
-        return fixed_category, is_priority
+        return CLASSIFIER(title, fixed_category)
 
     # ── Resumo do Texto ───────────────────────────────────────────────────
     def get_summary(self, text: str, max_len: int = 220) -> str:
@@ -354,163 +443,476 @@ class AngoNewsScraper:
 
     # ── Deduplicação ──────────────────────────────────────────────────────
     def is_duplicate(self, url: str) -> bool:
-        """Verifica se a url_origem já está na base de dados."""
+        """Verifica se a notícia (pela url_key canónica) já está na base de dados."""
+        key = url_key(url)
+        with self._stats_lock:
+            if key in self._known_keys:
+                return True
+        if self.db is None:  # sink local sem credenciais
+            return False
         try:
-            res = self.db.select("news_articles", filters={"url_origem": f"eq.{url}"}, columns="id")
-            return len(res) > 0
+            res = self.db.select("news_articles", filters=dedup_filters("news_articles", url), columns="id")
         except Exception:
             return False
+        if res:
+            with self._stats_lock:
+                self._known_keys.add(key)
+        return len(res) > 0
+
+    # ── Página de Detalhe → Campos ────────────────────────────────────────
+    def extract_article(self, detail_soup: BeautifulSoup, base_url: str) -> dict:
+        """Título, imagem, corpo sanitizado e resumo de uma página de artigo."""
+        # Título mais preciso vindo da página de detalhe
+        detail_title_tag = detail_soup.select_one("h1, .entry-title, .article-title")
+        detail_title = detail_title_tag.get_text(strip=True) if detail_title_tag else ""
+
+        # ── Extração de Imagem (3 níveis) ────────────────────
+        image_url = self.extract_image(detail_soup, base_url)
+
+        # ── Extração do Corpo ─────────────────────────────────
+        body_area = detail_soup.select_one(
+            "article, .entry-content, .post-content, .content-body, "
+            ".article-content, .td-post-content, main"
+        )
+        body_html = self.sanitize_html(body_area) if body_area else ""
+        body_text = body_area.get_text(separator=" ") if body_area else detail_soup.get_text()
+        summary = self.get_summary(body_text)
+
+        detail_soup.decompose()
+        return {
+            "title": detail_title,
+            "image_url": image_url,
+            "body_html": body_html,
+            "summary": summary,
+        }
 
-    # ── Scraper por Adaptador ─────────────────────────────────────────────
-    def scrape_site(self, site_name: str, cfg: dict):
+    # ── Configurações de Requisição Dinâmicas ─────────────────────────────
+    def _request_options(self, cfg: dict) -> Tuple[dict, bool]:
+        headers = self.session.headers.copy()
+        if "referer" in cfg:
+            headers["Referer"] = cfg["referer"]
+        if "extra_headers" in cfg:
+            headers.update(cfg["extra_headers"])
+        return headers, cfg.get("verify_ssl", True)
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # ── Estágio: discover ─────────────────────────────────────────────────
+    def _discover_site(self, site_name: str, cfg: dict, conditional: bool = False) -> Optional[List[dict]]:
         """
-        Processa um único site com blindagem try-except.
-        Se falhar, imprime o erro no log e passa ao próximo site.
+        Listagem de um site → itens {site, cfg, url, title}.
+        Blindada: se o site falhar, regista o erro e devolve None.
+        Com `conditional`, uma listagem sem alterações (304 ou mesmo corpo) devolve [].
         """
-        log.info(f"\n{'═' * 60}")
         log.info(f"🌐 SITE: {site_name} | {cfg['list_url']}")
-        log.info(f"{'═' * 60}")
-
         try:
-            # ── Configurações de Requisição Dinâmicas ─────────────────────
-            verify = cfg.get("verify_ssl", True)
-            headers = self.session.headers.copy()
-            if "referer" in cfg:
-                headers["Referer"] = cfg["referer"]
-            if "extra_headers" in cfg:
-                headers.update(cfg["extra_headers"])
-            
-            resp = self.session.get(cfg["list_url"], timeout=20, verify=verify, headers=headers)
+            headers, verify = self._request_options(cfg)
+            if conditional:
+                headers.update(self._validator_headers(cfg["list_url"]))
+            with self.throttle.slot(cfg["list_url"]):
+                resp = self.breaker.get(self.session, cfg["list_url"], verify=verify, headers=headers)
+            if conditional and resp.status_code == 304:
+                log.info(f"  🟰 {site_name}: listagem sem alterações (304)")
+                return []
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
+            if conditional and not self._listing_changed(cfg["list_url"], resp):
+                log.info(f"  🟰 {site_name}: listagem sem alterações (mesmo conteúdo)")
+                return []
+            encoding = self.charsets.resolve(cfg["list_url"], resp.content, resp.headers.get("Content-Type"))
+            if self.archive:
+                self.archive.record(site_name, cfg["list_url"], resp.status_code, resp.content, encoding)
+            soup = BeautifulSoup(resp.content.decode(encoding, errors="replace"), "html.parser")
 
             articles = soup.select(cfg["article_selector"])[:12]  # Máx 12 por ciclo
             if not articles:
-                log.warning(f"  ⚠️  Nenhum artigo encontrado. Seletor: '{cfg['article_selector']}'.")
+                log.warning(f"  ⚠️  Nenhum artigo encontrado em {site_name}. Seletor: '{cfg['article_selector']}'.")
                 # Depuração: Mostrar pedaço do HTML se não encontrar nada
                 snippet = soup.prettify()[:1000].replace("\n", " ")
                 log.debug(f"  Snippet do HTML ({site_name}): {snippet}")
-                self.stats["errors"] += 1
-                return
-
-            log.info(f"  📋 {len(articles)} artigos encontrados. Processando...")
+                self._bump("errors")
+                return None
 
+            log.info(f"  📋 {site_name}: {len(articles)} artigos encontrados.")
+            items, seen = [], set()
             for art in articles:
-                self.stats["processed"] += 1
-                try:
-                    # ── Extração do Link ──────────────────────────────────
-                    if cfg["link_selector"] == ".":
-                        raw_url = art.get("href", "")
-                    else:
-                        link_tag = art.select_one(cfg["link_selector"])
-                        raw_url = link_tag.get("href", "") if link_tag else ""
-                    
-                    if not raw_url and art.name == "a":
-                        raw_url = art.get("href", "")
-
-                    article_url = self.normalize_url(raw_url, cfg["base_url"])
-
-                    if not article_url or article_url == cfg["base_url"]:
+                self._bump("processed")
+                # ── Extração do Link ──────────────────────────────────
+                if cfg["link_selector"] == ".":
+                    raw_url = art.get("href", "")
+                else:
+                    link_tag = art.select_one(cfg["link_selector"])
+                    raw_url = link_tag.get("href", "") if link_tag else ""
+
+                if not raw_url and art.name == "a":
+                    raw_url = art.get("href", "")
+
+                article_url = canonical_url(self.normalize_url(raw_url, cfg["base_url"]))
+                key = url_key(article_url)
+
+                if not article_url or key == url_key(cfg["base_url"]) or key in seen:
+                    continue
+
+                # ── Extração do Título (do card de lista) ─────────────
+                if cfg["title_selector"] == ".":
+                    title = art.get_text(strip=True)
+                else:
+                    title_tag = art.select_one(cfg["title_selector"])
+                    title = title_tag.get_text(strip=True) if title_tag else ""
+
+                if not title or len(title) < 5:
+                    # Fallback: usar o próprio texto do card se o título falhar
+                    title = art.get_text(strip=True)
+                    if not title or len(title) < 5:
+                        log.debug(f"      ⏭️  Título muito curto ou vazio em {site_name}")
                         continue
 
-                    # ── Deduplicação ──────────────────────────────────────
-                    if self.is_duplicate(article_url):
-                        log.info(f"  ⏭️  Já existe: {article_url[:70]}")
-                        self.stats["skipped_dup"] += 1
-                        continue
+                # Limpeza de título
+                title = re.sub(r'\s+', ' ', title).strip()
+                seen.add(key)
+                items.append({"site": site_name, "cfg": cfg, "url": article_url, "title": title})
 
-                    # ── Extração do Título (do card de lista) ─────────────
-                    if cfg["title_selector"] == ".":
-                        title = art.get_text(strip=True)
-                    else:
-                        title_tag = art.select_one(cfg["title_selector"])
-                        title = title_tag.get_text(strip=True) if title_tag else ""
+            soup.decompose()
+            return items
 
-                    if not title or len(title) < 5:
-                        # Fallback: usar o próprio texto do card se o título falhar
-                        title = art.get_text(strip=True)
-                        if not title or len(title) < 5:
-                            log.debug(f"      ⏭️  Título muito curto ou vazio em {site_name}")
-                            continue
-
-                    # Limpeza de título
-                    title = re.sub(r'\s+', ' ', title).strip()
-
-                    log.info(f"  ✨ Capturando: {title[:65]}...")
-
-                    # ── Busca Detalhe do Artigo ────────────────────────────
-                    detail_resp = self.session.get(article_url, timeout=15)
-                    detail_resp.raise_for_status()
-                    detail_soup = BeautifulSoup(detail_resp.text, "html.parser")
-
-                    # Título mais preciso vindo da página de detalhe
-                    detail_title_tag = detail_soup.select_one("h1, .entry-title, .article-title")
-                    final_title = detail_title_tag.get_text(strip=True) if detail_title_tag else title
-                    if not final_title or len(final_title) < 5:
-                        final_title = title
-
-                    # ── Extração de Imagem (3 níveis) ────────────────────
-                    image_url = self.extract_image(detail_soup, cfg["base_url"])
-
-                    # ── Extração do Corpo ─────────────────────────────────
-                    body_area = detail_soup.select_one(
-                        "article, .entry-content, .post-content, .content-body, "
-                        ".article-content, .td-post-content, main"
-                    )
-                    body_html = self.sanitize_html(body_area) if body_area else ""
-                    body_text = body_area.get_text(separator=" ") if body_area else detail_soup.get_text()
-                    summary = self.get_summary(body_text)
-
-                    # ── Classificação e Prioridade ────────────────────────
-                    categoria, is_priority = self.classify(final_title, cfg.get("fixed_category", "Geral"))
-
-                    # ── Payload para Supabase (Check de Nulos e Colunas) ─────
-                    payload = {
-                        "titulo": final_title[:500],
-                        "resumo": (summary or "")[:1000],
-                        "corpo": (body_html or "")[:50000],
-                        "imagem_url": image_url or RESOLVEAO_PLACEHOLDER,
-                        "categoria": categoria or "Geral",
-                        "fonte": site_name,
-                        "url_origem": article_url,
-                        "is_priority": bool(is_priority),
-                        "status": "pendente",
-                    }
-
-                    success = self.db.insert("news_articles", payload)
-                    if success:
-                        label = "🔴 URGENTE" if is_priority else "✅"
-                        log.info(f"    {label} Guardada | Cat: {categoria} | Prio: {is_priority}")
-                        self.stats["saved"] += 1
-                    else:
-                        self.stats["errors"] += 1
-
-                    time.sleep(1.5)  # Respeito ao servidor entre artigos
-
-                except Exception as art_err:
-                    log.warning(f"  ⚠️  Erro num artigo de {site_name}: {art_err}")
-                    continue  # Salta para o próximo artigo, não para o próximo site
-
-            time.sleep(3)  # Pausa entre sites
+        except CircuitOpenError as open_err:
+            log.info(f"⛔ SITE EM PAUSA: {site_name} | {open_err}")
+            return None
 
         except Exception as site_err:
             # Blindagem total: mesmo que o site fique inacessível, continua para o próximo
             log.error(f"❌ SITE FALHADO: {site_name} | Erro: {site_err}")
             log.error(f"   → Saltando para o próximo site...")
-            self.stats["errors"] += 1
+            self._bump("errors")
+            return None
+
+    # ── GET condicional das listagens (via rápida) ───────────────────────
+    def _validator_headers(self, list_url: str) -> dict:
+        saved = self.listing_validators.get(list_url) or {}
+        headers = {}
+        if saved.get("etag"):
+            headers["If-None-Match"] = saved["etag"]
+        if saved.get("modified"):
+            headers["If-Modified-Since"] = saved["modified"]
+        return headers
+
+    def _listing_changed(self, list_url: str, resp) -> bool:
+        """Guarda ETag/Last-Modified e o hash do corpo; False se o corpo é o da última vez."""
+        digest = hashlib.sha1(resp.content).hexdigest()
+        with self._stats_lock:
+            previous = (self.listing_validators.get(list_url) or {}).get("digest")
+            self.listing_validators[list_url] = {
+                "etag": resp.headers.get("ETag"),
+                "modified": resp.headers.get("Last-Modified"),
+                "digest": digest,
+            }
+        return digest != previous
+
+    def _revert_validators(self, previous: Dict[str, dict], urgent: List[dict]) -> None:
+        """
+        Listagens com um item urgente por gravar (fetch/escrita falhada, prazo)
+        voltam aos validadores anteriores: a próxima passagem não recebe um 304
+        (ou o mesmo corpo) e volta a tentar o item.
+        """
+        for list_url in {item["cfg"]["list_url"] for item in urgent if not item.get("done")}:
+            if list_url in previous:
+                self.listing_validators[list_url] = previous[list_url]
+            else:
+                self.listing_validators.pop(list_url, None)
+            log.info(f"  🔁 {list_url}: item urgente por gravar, listagem volta a ser pedida na próxima passagem")
+
+    def _discover(self, sites: List[Tuple[str, dict]], failed_sites: set) -> Iterator[dict]:
+        """
+        Listagens pedidas em paralelo; os artigos são entregues em rodízio (um por
+        fonte em cada volta, pela ordem do agendador) entre as fontes já listadas,
+        para que os workers de fetch não fiquem todos presos na fila de um só host.
+        """
+        rank = {name: i for i, (name, _) in enumerate(sites)}
+        with ThreadPoolExecutor(max_workers=self.STAGE_CONCURRENCY["discover"]) as ex:
+            pending = {ex.submit(self._in_source, name, self._discover_site, name, cfg): name for name, cfg in sites}
+            backlog: Dict[str, deque] = {}
+            while pending or backlog:
+                done = [f for f in pending if f.done()]
+                if not done and not backlog:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    site_name = pending.pop(fut)
+                    items = fut.result()
+                    if items is None:
+                        failed_sites.add(site_name)
+                    elif items:
+                        backlog[site_name] = deque(items)
+                for site_name in sorted(backlog, key=rank.get):
+                    yield backlog[site_name].popleft()
+                    if not backlog[site_name]:
+                        del backlog[site_name]
+        if self.profiler:
+            self.profiler.snapshot("meio")
+
+    # ── Estágio: dedup ────────────────────────────────────────────────────
+    def _stage_dedup(self, item: dict) -> Optional[dict]:
+        if self.is_duplicate(item["url"]):
+            item_log.info(f"  ⏭️  Já existe: {item['url'][:70]}")
+            self._bump("skipped_dup")
+            item["done"] = True
+            return None
+        item_log.info(f"  ✨ Capturando: {item['title'][:65]}...")
+        return item
+
+    # ── Estágio: fetch ────────────────────────────────────────────────────
+    def _stage_fetch(self, item: dict) -> Optional[dict]:
+        """Pedidos ao mesmo portal em série, com DETAIL_DELAY de respeito entre artigos."""
+        headers, verify = self._request_options(item["cfg"])
+        try:
+            delay = (DETAIL_DELAY, DETAIL_DELAY)
+            with self.throttle.slot(item["url"], delay, deadline=self._start_by(item["site"])) as on_time:
+                # Prazo: artigos cujo fetch já não caberia ficam para a próxima execução
+                if not on_time:
+                    if self.budget is not None:
+                        self.budget.postpone(item["site"])
+                    return None
+                with self._timed(item["site"], "detail"):
+                    detail_resp = self.breaker.get(
+                        self.session, item["url"],
+                        timeout=(CONNECT_TIMEOUT, 15), verify=verify, headers=headers,
+                    )
+        except CircuitOpenError:
+            log.debug(f"  ⛔ Circuito aberto: {item['url'][:70]}")
+            return None
+        detail_resp.raise_for_status()
+        encoding = self.charsets.resolve(item["url"], detail_resp.content, detail_resp.headers.get("Content-Type"))
+        if self.archive:
+            self.archive.record(item["site"], item["url"], detail_resp.status_code, detail_resp.content, encoding)
+        item["raw"] = (detail_resp.content, encoding)
+        return item
+
+    # ── Estágio: parse ────────────────────────────────────────────────────
+    def _stage_parse(self, item: dict) -> dict:
+        content, encoding = item.pop("raw")
+        item["detail"] = self.parser.submit(
+            parse_article_page, content, encoding, item["cfg"]["base_url"]
+        ).result()
+        return item
+
+    # ── Estágio: enrich ───────────────────────────────────────────────────
+    def _stage_enrich(self, item: dict) -> dict:
+        cfg, detail, title = item["cfg"], item.pop("detail"), item["title"]
+        final_title = detail["title"] or title
+        if not final_title or len(final_title) < 5:
+            final_title = title
+
+        # ── Classificação e Prioridade ────────────────────────
+        categoria, is_priority = self.classify(final_title, cfg.get("fixed_category", "Geral"))
+
+        # ── Payload para Supabase (Check de Nulos e Colunas) ─────
+        item["payload"] = {
+            "titulo": final_title[:500],
+            "resumo": (detail["summary"] or "")[:1000],
+            "corpo": (detail["body_html"] or "")[:50000],
+            "imagem_url": detail["image_url"] or RESOLVEAO_PLACEHOLDER,
+            "categoria": categoria or "Geral",
+            "fonte": item["site"],
+            "url_origem": item["url"],
+            "url_key": url_key(item["url"]),
+            "is_priority": bool(is_priority),
+            # Rótulos da máquina: valores diferentes destes foram corrigidos pelo admin
+            "categoria_auto": categoria or "Geral",
+            "is_priority_auto": bool(is_priority),
+            "status": "pendente",
+        }
+        item["payload"]["content_hash"] = content_hash("news_articles", item["payload"])
+        return item
+
+    # ── Estágio: cluster ──────────────────────────────────────────────────
+    def _stage_cluster(self, item: dict) -> dict:
+        """Junta o artigo à história de outra fonte com o mesmo título/lead (ou abre uma)."""
+        payload = item["payload"]
+        payload["story_id"], payload["story_rank"] = self.stories.assign(
+            payload["url_key"], item["site"], payload["titulo"],
+            payload["corpo"][:8000] or payload["resumo"], payload["is_priority"],
+        )
+        if payload["story_rank"] > 1:
+            item_log.info(f"    🧩 História {payload['story_id']} (rank {payload['story_rank']})")
+        return item
+
+    # ── Estágio: write ────────────────────────────────────────────────────
+    def _stage_write(self, item: dict) -> Optional[dict]:
+        payload = item["payload"]
+        success = self.sink.write("news_articles", payload)
+        if success:
+            with self._stats_lock:
+                self._known_keys.add(payload["url_key"])
+            label = "🔴 URGENTE" if payload["is_priority"] else "✅"
+            item_log.info(f"    {label} Guardada | Cat: {payload['categoria']} | Prio: {payload['is_priority']}")
+            if self.index:
+                try:
+                    self.index.add_news(payload)
+                except Exception as e:
+                    log.warning(f"  ⚠️  Índice de pesquisa: {e}")
+            with self._stats_lock:
+                self.stats["saved"] += 1
+                self._saved_per_site[item["site"]] = self._saved_per_site.get(item["site"], 0) + 1
+            item["done"] = True
+            return item
+        self.stories.discard(payload["url_key"])
+        self._bump("errors")
+        return None
+
+    # ── Orçamento de tempo (--time-budget) ────────────────────────────────
+    def _timed(self, site_name: str, action: str):
+        return self.budget.timed(site_name, action) if self.budget else nullcontext()
+
+    def _deadline(self) -> Optional[float]:
+        return self.budget.work_deadline if self.budget else None
+
+    def _item_cost(self, site_name: str) -> float:
+        """Segundos esperados por notícia nova: fetch do artigo + 1.5s de respeito ao portal."""
+        return self.budget.cost(site_name, "detail") + DETAIL_DELAY
+
+    def _start_by(self, site_name: str) -> Optional[float]:
+        """Último instante para começar um fetch de detalhe da fonte (sem --time-budget: None)."""
+        return self.budget.start_by(site_name) if self.budget else None
+
+    def _traced(self, fn):
+        """Estágio com a fonte marcada para o perfil (sem --profile devolve `fn` tal como está)."""
+        return self.profiler.stage(fn) if self.profiler else fn
+
+    def _in_source(self, site_name: str, fn, *args):
+        with log_context(source=site_name, stage="discover"), self._timed(site_name, "listing"):
+            return self.profiler.task(site_name, fn, *args) if self.profiler else fn(*args)
+
+    def _build_pipeline(self) -> Pipeline:
+        c = self.STAGE_CONCURRENCY
+        # No prazo (--time-budget) as páginas já descarregadas ainda são gravadas
+        finish = self.budget is not None
+        return Pipeline("news", [
+            Stage("dedup", self._traced(self._stage_dedup), concurrency=c["dedup"]),
+            Stage("fetch", self._traced(self._stage_fetch), concurrency=c["fetch"], queue_size=8),
+            Stage("parse", self._traced(self._stage_parse), concurrency=max(c["parse"], self.parser.workers),
+                  queue_size=8, finish_on_stop=finish),
+            Stage("enrich", self._traced(self._stage_enrich), concurrency=c["enrich"], finish_on_stop=finish),
+            Stage("cluster", self._traced(self._stage_cluster), concurrency=c["cluster"], finish_on_stop=finish),
+            Stage("write", self._traced(self._stage_write), concurrency=c["write"], queue_size=8, finish_on_stop=finish),
+        ])
+
+    def _run_pipeline(self, sites: List[Tuple[str, dict]]) -> set:
+        """Corre o pipeline sobre os sites indicados. Devolve os sites falhados."""
+        failed_sites = set()
+        metrics = self._build_pipeline().run(self._discover(sites, failed_sites), deadline=self._deadline())
+        self._bump("errors", sum(m["errors"] for m in metrics.values()))
+        return failed_sites
+
+    # ── Scraper por Adaptador ─────────────────────────────────────────────
+    def scrape_site(self, site_name: str, cfg: dict) -> Optional[int]:
+        """
+        Processa um único site (pipeline completo, só com esta fonte).
+        Retorna o nº de artigos novos guardados, ou None se o site falhou.
+        """
+        saved_before = self._saved_per_site.get(site_name, 0)
+        failed = self._run_pipeline([(site_name, cfg)])
+        if site_name in failed:
+            return None
+        return self._saved_per_site.get(site_name, 0) - saved_before
+
+    # ── Modo --update: notícias recentes re-pedidas, PATCH só do que mudou ─
+    def _stage_compare(self, item: dict) -> dict:
+        row = item["row"]
+        self._patches.compare(row["id"], row.get("content_hash"), item["payload"])
+        return item
+
+    def run_update(self, days: int = 2, limit: int = 300) -> int:
+        """Re-pede as notícias dos últimos `days` dias e atualiza só as colunas alteradas."""
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        rows = self.db.select("news_articles", {
+            "published_at": f"gte.{since}", "order": "published_at.desc", "limit": str(limit),
+        }, columns="id,titulo,fonte,url_origem,content_hash")
+        items = [
+            {"site": row["fonte"], "cfg": SITES_CONFIG[row["fonte"]], "url": row["url_origem"],
+             "title": row.get("titulo") or "", "row": row}
+            for row in rows if row.get("fonte") in SITES_CONFIG and row.get("url_origem")
+            and (not self.shard or self.shard.owns(row["url_origem"]))
+        ]
+        log.info(f"🔁 --update: {len(items)}/{len(rows)} notícia(s) dos últimos {days} dia(s) a re-verificar")
+
+        self._patches = PatchQueue(self.db, "news_articles")
+        c = self.STAGE_CONCURRENCY
+        finish = self.budget is not None
+        metrics = Pipeline("news-update", [
+            Stage("fetch", self._traced(self._stage_fetch), concurrency=c["fetch"], queue_size=8),
+            Stage("parse", self._traced(self._stage_parse), concurrency=max(c["parse"], self.parser.workers),
+                  queue_size=8, finish_on_stop=finish),
+            Stage("enrich", self._traced(self._stage_enrich), concurrency=c["enrich"], finish_on_stop=finish),
+            Stage("compare", self._traced(self._stage_compare), concurrency=1, finish_on_stop=finish),
+        ]).run(iter(items), deadline=self._deadline())
+        self._bump("errors", sum(m["errors"] for m in metrics.values()))
+        updated = self._patches.flush()
+        self.breaker.save()
+        return updated
+
+    # ── Via Rápida ────────────────────────────────────────────────────────
+    def run_fast_lane(self) -> int:
+        """
+        Só as listagens de FAST_LANE_SOURCES, com GET condicional; classifica
+        apenas os títulos e manda pelo pipeline completo só os prioritários.
+        Não mexe no agendador: a varredura normal continua a visitar estas fontes.
+        """
+        start = time.monotonic()
+        self.listing_validators = load_json(LISTING_VALIDATORS_FILE, {}) or {}
+        previous = dict(self.listing_validators)
+        sources = self.shard.sources(SITES_CONFIG) if self.shard else SITES_CONFIG
+        sites = [(name, sources[name]) for name in FAST_LANE_SOURCES if name in sources]
+        with ThreadPoolExecutor(max_workers=len(sites) or 1) as ex:
+            listings = list(ex.map(lambda site: self._discover_site(*site, conditional=True), sites))
+        urgent = [
+            item for items in listings for item in (items or [])
+            if self.classify(item["title"], item["cfg"].get("fixed_category", "Geral"))[1]
+        ]
+        log.info(f"⚡ Via rápida: {sum(len(i or []) for i in listings)} título(s), {len(urgent)} prioritário(s)")
+        if urgent:
+            metrics = self._build_pipeline().run(iter(urgent), deadline=self._deadline())
+            self._bump("errors", sum(m["errors"] for m in metrics.values()))
+        self._revert_validators(previous, urgent)
+        save_json(LISTING_VALIDATORS_FILE, self.listing_validators)
+        self.breaker.save()
+        self.stories.flush_ranks(self.db)
+        self.stories.save()
+        log.info(f"⚡ Via rápida concluída em {time.monotonic() - start:.1f}s | 🔴 {self.stats['saved']} guardada(s)")
+        return self.stats["saved"]
 
     # ── Loop Principal ────────────────────────────────────────────────────
-    def run(self):
-        """Itera por todos os sites de forma independente."""
+    def run(self, force_all: bool = False):
+        """Pipeline sobre os sites em janela (agendador), do maior yield para o menor."""
         start_time = datetime.now(timezone.utc)
+        sources = self.shard.sources(SITES_CONFIG) if self.shard else SITES_CONFIG
+        site_order = self.scheduler.plan(sources, force=force_all)
+        if self.budget:
+            site_order = self.budget.plan(site_order, self.scheduler.score, self._item_cost)
         log.info(f"\n{'█' * 60}")
-        log.info(f"  AngoNewsScraper v2 — INICIANDO VARREDURA")
-        log.info(f"  {len(SITES_CONFIG)} fontes configuradas")
+        log.info(f"  AngoNewsScraper v2 — INICIANDO VARREDURA (PIPELINE)")
+        log.info(f"  {len(site_order)}/{len(sources)} fontes em janela" + (f" | Shard {self.shard}" if self.shard else ""))
         log.info(f"  {start_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
         log.info(f"{'█' * 60}\n")
 
-        for site_name, cfg in SITES_CONFIG.items():
-            self.scrape_site(site_name, cfg)
+        sites = [(name, SITES_CONFIG[name]) for name in site_order]
+        ensure_url_keys(self.db, "news_articles")
+        failed_sites = self._run_pipeline(sites) if sites else set()
+        # As fontes cortadas pelo prazo ficam por registar (o yield observado seria só uma parte)
+        cut = self.budget.cut if self.budget else {}
+        for site_name in site_order:
+            if site_name in cut and site_name not in failed_sites:
+                continue
+            self.scheduler.record(
+                site_name, self._saved_per_site.get(site_name, 0), error=site_name in failed_sites
+            )
+        self.scheduler.save()
+        self.breaker.save()
+        if self.budget:
+            self.budget.save()
+            log.info(self.budget.summary())
+        self.stories.flush_ranks(self.db)
+        self.stories.save()
+        log.info(f"🗓️  Agendador:\n{self.scheduler.summary()}")
 
         elapsed = (datetime.now(timezone.utc) - start_time).seconds
         log.info(f"\n{'█' * 60}")
@@ -522,18 +924,105 @@ class AngoNewsScraper:
         log.info(f"{'█' * 60}\n")
 
 
+# ─────────────────────────────────────────────
+# FUNÇÕES DE PARSE (executáveis num ParsePool)
+# ─────────────────────────────────────────────
+# Função de módulo (picklable): recebe bytes e devolve só um dict pequeno.
+# Usa uma instância sem sessão nem DB — os métodos de extração não dependem dela.
+_EXTRACTOR: Optional[AngoNewsScraper] = None
+
+
+def parse_article_page(content: bytes, encoding: str, base_url: str) -> dict:
+    global _EXTRACTOR
+    if _EXTRACTOR is None:
+        _EXTRACTOR = AngoNewsScraper.__new__(AngoNewsScraper)
+    soup = BeautifulSoup(content.decode(encoding, errors="replace"), "html.parser")
+    return _EXTRACTOR.extract_article(soup, base_url)
+
+
 # ─────────────────────────────────────────────
 # PONTO DE ENTRADA
 # ─────────────────────────────────────────────
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AngoNewsScraper v2 — agregador de notícias")
+    parser.add_argument("--all", action="store_true", help="ignora o agendador e visita todas as fontes")
+    parser.add_argument(
+        "--update", action="store_true",
+        help="re-verifica as notícias recentes e faz PATCH só das colunas alteradas (content_hash)",
+    )
+    parser.add_argument("--days", type=int, default=2, help="janela do --update (omissão: 2 dias)")
+    parser.add_argument("--limit", type=int, default=300, help="máx. de notícias re-verificadas no --update")
+    parser.add_argument(
+        "--fast-lane", action="store_true",
+        help=f"só as listagens urgentes ({', '.join(FAST_LANE_SOURCES)}) e só os títulos prioritários",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="processos de parsing em paralelo com a rede (0 = em linha; -1 = nº de cores - 1)",
+    )
+    parser.add_argument(
+        "--archive", metavar="DIR", default=os.getenv("SCRAPER_ARCHIVE_DIR"),
+        help="grava as respostas brutas (WARC comprimido) para replay offline",
+    )
+    parser.add_argument(
+        "--sink", choices=SINK_KINDS, default="supabase",
+        help="destino das linhas: supabase (omissão) ou ficheiros locais para o bulk_load.py",
+    )
+    parser.add_argument("--out", metavar="DIR", help="diretório do sink local (omissão: scraper/.out)")
+    parser.add_argument("--no-index", action="store_true", help="não atualiza o índice de pesquisa local")
+    parser.add_argument(
+        "--profile", metavar="DIR", nargs="?", const=PROFILE_DIR,
+        help="perfil de CPU por fonte (.prof + .collapsed) e snapshots tracemalloc (omissão: scraper/.profile)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="todas as mensagens por item (sem amostragem)")
+    parser.add_argument(
+        "--time-budget", metavar="SEGUNDOS", type=float,
+        help="prazo da execução: prioriza o maior yield/segundo e termina (gravando tudo) antes dele",
+    )
+    parser.add_argument(
+        "--shard", metavar="i/N", type=parse_shard,
+        help="só a parte i de N das fontes (e das notícias do --update), por hash estável",
+    )
+    args = parser.parse_args()
+    logs = setup_logging(LOG_FILE, verbose=args.verbose)
+    budget = TimeBudget(args.time_budget, "news") if args.time_budget else None
+
     load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
     SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
 
     if not SUPABASE_URL or not SUPABASE_KEY:
-        log.error("❌ Credenciais Supabase em falta. Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
-        exit(1)
-
-    db_client = SupabaseRestClient(SUPABASE_URL, SUPABASE_KEY)
-    scraper = AngoNewsScraper(db_client)
-    scraper.run()
+        if args.sink == "supabase" or args.update:
+            log.error("❌ Credenciais Supabase em falta. Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+            exit(1)
+        # Execução offline: sem deduplicação contra a base (o bulk_load faz upsert)
+        log.warning("⚠️  Sem credenciais Supabase: deduplicação só local")
+        db_client = None
+    else:
+        db_client = SupabaseRestClient(SUPABASE_URL, SUPABASE_KEY)
+
+    # Escritas na base passam pela fila durável em .state (reenviadas na execução seguinte)
+    outbox = Outbox("news") if args.sink == "supabase" else None
+    sink = make_sink(args.sink, db_client, args.out, outbox=outbox)
+    index = None if args.no_index else SearchIndex(INDEX_PATH)
+    profiler = RunProfiler(args.profile, "news") if args.profile else None
+    if profiler:
+        profiler.start()
+    try:
+        with ParsePool(default_workers() if args.workers < 0 else args.workers) as pool:
+            archive = ResponseArchive(args.archive) if args.archive else None
+            scraper = AngoNewsScraper(db_client, parser=pool, archive=archive, sink=sink, index=index,
+                                      profiler=profiler, budget=budget, shard=args.shard)
+            if args.update:
+                scraper.run_update(days=args.days, limit=args.limit)
+            elif args.fast_lane:
+                scraper.run_fast_lane()
+            else:
+                scraper.run(force_all=args.all)
+    finally:
+        sink.close()
+        if index:
+            index.close()
+        if profiler:
+            profiler.stop()
+        logs.stop()
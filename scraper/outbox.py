@@ -0,0 +1,174 @@
+"""
+Outbox — Fila Durável das Escritas na Base
+==========================================
+Quando um INSERT falhava (timeout, 5xx, Supabase em manutenção) o registo
+extraído perdia-se: recuperá-lo custava outro fetch do detalhe numa execução
+seguinte, se a vaga/notícia ainda estivesse na listagem. Agora cada linha é
+primeiro gravada num SQLite em .state (WAL, um COMMIT por linha) e só sai de
+lá quando a base a aceita:
+
+  put()     → linha durável na fila (a mesma URL de origem substitui a anterior)
+  due()     → linhas cujo próximo envio já chegou, das mais antigas para as novas
+  done()    → aceites: apagadas
+  retry()   → falha transitória: próximo envio com backoff exponencial + jitter
+              (BASE_DELAY · 2^tentativas, até MAX_DELAY); ao fim de MAX_ATTEMPTS
+              ficam como "mortas"
+  reject()  → 4xx de uma linha só (dados inválidos): "morta" de imediato
+
+As linhas mortas ficam DEAD_TTL_DAYS na fila para inspeção. O envio (SupabaseSink
+em sinks.py) usa `on_conflict` na URL de origem + ignore-duplicates, por isso
+reenviar uma linha que afinal tinha chegado é inofensivo.
+
+    python scraper/outbox.py jobs            # estado da fila
+    python scraper/outbox.py news --dead     # linhas rejeitadas e porquê
+"""
+
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from state_store import state_path
+
+BASE_DELAY = 2.0
+MAX_DELAY = 3600.0
+MAX_ATTEMPTS = 10
+DEAD_TTL_DAYS = 7
+
+# tabela → coluna com índice único usada como chave de upsert
+# (migração 20261019000000_scraper_upsert_keys.sql)
+CONFLICT_KEYS = {"jobs": "source_url", "news_articles": "url_origem"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id         INTEGER PRIMARY KEY,
+    tbl        TEXT    NOT NULL,
+    key        TEXT    NOT NULL,
+    row        TEXT    NOT NULL,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    next_at    REAL    NOT NULL DEFAULT 0,
+    created_at REAL    NOT NULL,
+    dead       INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    UNIQUE (tbl, key)
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (dead, next_at);
+"""
+
+# (id, tabela, linha)
+Entry = Tuple[int, str, dict]
+
+
+def backoff(attempts: int) -> float:
+    """Atraso antes da tentativa seguinte: exponencial com jitter de até 50%."""
+    delay = min(MAX_DELAY, BASE_DELAY * 2 ** max(attempts - 1, 0))
+    return delay * (1 + random.random() / 2)
+
+
+class Outbox:
+    def __init__(self, name: str, path: Optional[str] = None):
+        self.name = name
+        self.path = path or state_path(f"{name}_outbox.sqlite")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL + WAL: um COMMIT sobrevive a um crash do processo (não a um corte de energia)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute(
+            "DELETE FROM outbox WHERE dead = 1 AND created_at < ?",
+            (time.time() - DEAD_TTL_DAYS * 86400,),
+        )
+
+    def put(self, table: str, row: dict) -> int:
+        key = str(row.get(CONFLICT_KEYS.get(table, "")) or json.dumps(row, sort_keys=True, ensure_ascii=False))
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO outbox (tbl, key, row, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (tbl, key) DO UPDATE SET row = excluded.row, attempts = 0, "
+                "next_at = 0, dead = 0, error = NULL RETURNING id",
+                (table, key, json.dumps(row, ensure_ascii=False), time.time()),
+            )
+            return cur.fetchone()[0]
+
+    def due(self, limit: int = 500, now: Optional[float] = None) -> List[Entry]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, tbl, row FROM outbox WHERE dead = 0 AND next_at <= ? ORDER BY id LIMIT ?",
+                (now if now is not None else time.time(), limit),
+            ).fetchall()
+        return [(i, tbl, json.loads(row)) for i, tbl, row in rows]
+
+    def done(self, ids: List[int]) -> None:
+        with self._lock:
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def retry(self, ids: List[int], error: str, now: Optional[float] = None) -> float:
+        """Reagenda as linhas; devolve o instante do próximo envio mais cedo."""
+        now = now if now is not None else time.time()
+        earliest = float("inf")
+        with self._lock:
+            for i in ids:
+                (attempts,) = self.conn.execute("SELECT attempts FROM outbox WHERE id = ?", (i,)).fetchone() or (0,)
+                attempts += 1
+                next_at = now + backoff(attempts)
+                earliest = min(earliest, next_at)
+                self.conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_at = ?, error = ?, dead = ? WHERE id = ?",
+                    (attempts, next_at, error[:500], int(attempts >= MAX_ATTEMPTS), i),
+                )
+        return earliest
+
+    def reject(self, ids: List[int], error: str) -> None:
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE outbox SET dead = 1, error = ? WHERE id = ?", [(error[:500], i) for i in ids]
+            )
+
+    def next_due(self) -> Optional[float]:
+        """Instante do próximo envio pendente (None se a fila estiver vazia)."""
+        with self._lock:
+            (next_at,) = self.conn.execute("SELECT MIN(next_at) FROM outbox WHERE dead = 0").fetchone()
+        return next_at
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            pending, dead = self.conn.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM outbox"
+            ).fetchone()
+        return {"pending": pending, "dead": dead}
+
+    def dead_rows(self, limit: int = 50) -> List[Tuple[str, str, int, str]]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT tbl, key, attempts, error FROM outbox WHERE dead = 1 ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Estado da fila durável de escritas de um motor")
+    parser.add_argument("engine", choices=["jobs", "news"])
+    parser.add_argument("--dead", action="store_true", help="lista as linhas rejeitadas")
+    args = parser.parse_args(argv)
+
+    outbox = Outbox(args.engine)
+    counts = outbox.counts()
+    print(f"{outbox.path}: {counts['pending']} pendente(s), {counts['dead']} morta(s)")
+    if args.dead:
+        for table, key, attempts, error in outbox.dead_rows():
+            print(f"  {table} | {key} | {attempts} tentativa(s) | {error}")
+    outbox.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+ParsePool — Parsing HTML fora da thread de rede
+===============================================
+O BeautifulSoup e os get_text() são CPU puro; feitos na mesma thread dos
+pedidos HTTP, o CPU fica parado durante o fetch e a rede fica parada durante
+o parse. Com `workers > 0` os bytes descarregados seguem para um
+ProcessPoolExecutor e só voltam dicionários pequenos com os campos extraídos,
+enquanto a thread principal já está a fazer o pedido seguinte.
+
+Com `workers = 0` (omissão) tudo corre em linha e o comportamento é idêntico
+ao de sempre — o mesmo código serve os dois modos porque ambos devolvem Futures.
+
+As funções submetidas têm de ser funções de módulo importáveis (picklable),
+p.ex. `ango_job_scraper.parse_detail_page` — nunca definidas num script
+corrido como __main__, que só funcionam com fork.
+
+Os registos de log emitidos nos workers seguem por uma fila para o processo
+principal (QueueHandler → QueueListener) e passam pelos loggers e handlers
+de lá: o ficheiro de log, o JSON estruturado e os níveis configurados.
+"""
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable
+
+log = logging.getLogger("ParsePool")
+
+
+def default_workers() -> int:
+    """Um worker por core, deixando um core para a thread de rede."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+class _ToLogger:
+    """"Handler" do QueueListener: entrega o registo ao logger do mesmo nome no processo principal."""
+    level = logging.NOTSET
+
+    def handle(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def _init_worker(queue, level: int) -> None:
+    # Com fork, os handlers herdados escreveriam no mesmo ficheiro a partir de vários processos
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(queue)]
+    root.setLevel(level)
+
+
+class ParsePool:
+    def __init__(self, workers: int = 0):
+        self.workers = workers
+        self._executor = None
+        self._listener = None
+        if workers > 0:
+            queue = multiprocessing.Queue()
+            self._listener = QueueListener(queue, _ToLogger())
+            self._listener.start()
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(queue, logging.getLogger().getEffectiveLevel()),
+            )
+            log.info(f"⚙️  Modo pipeline: parsing em {workers} processo(s)")
+
+    def submit(self, fn: Callable, *args) -> Future:
+        if self._executor:
+            return self._executor.submit(fn, *args)
+        # Modo em linha: Future já resolvido, para o chamador não distinguir os modos
+        fut = Future()
+        try:
+            fut.set_result(fn(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def warm_up(self) -> None:
+        """Arranca já os processos (evita pagar o fork no primeiro parse)."""
+        if self._executor:
+            list(self._executor.map(abs, range(self.workers)))
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
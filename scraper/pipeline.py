@@ -0,0 +1,259 @@
+"""
+Pipeline — Ingestão em Estágios com Filas Limitadas
+===================================================
+  discover → dedup → fetch → parse → enrich → write
+
+Cada estágio tem o seu próprio limite de concorrência (nº de threads) e uma
+fila LIMITADA à entrada. Quando um estágio lento enche a sua fila (quase sempre
+o Supabase), o estágio anterior bloqueia no put() — backpressure — em vez de
+acumular trabalho em memória; os restantes estágios continuam a trabalhar.
+
+A profundidade das filas é registada periodicamente e, no fim, cada estágio
+reporta entradas/saídas/descartes/erros e itens por segundo de trabalho, para
+que o gargalo apareça como métrica e não como impressão.
+
+Convenção das funções de estágio:
+  fn(item) → None       item descartado (duplicado, sem dados, ...)
+  fn(item) → objeto     segue para o estágio seguinte
+  fan_out=True → fn(item) devolve um iterável; cada elemento segue à parte
+
+Com `deadline` (relógio time.monotonic), run() pede stop() ao chegar ao prazo.
+Depois de stop() os estágios com finish_on_stop=True continuam a processar o
+que lhes chega (o trabalho já pago: parse/enrich/write de páginas descarregadas);
+os outros só drenam.
+"""
+
+import time
+import queue
+import random
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from run_logging import log_context
+
+log = logging.getLogger("Pipeline")
+
+_END = object()  # sentinela de fim de fluxo
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable, concurrency: int = 1, queue_size: int = 16, fan_out: bool = False,
+                 finish_on_stop: bool = False):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        self.fan_out = fan_out
+        self.finish_on_stop = finish_on_stop
+
+
+class StageMetrics:
+    __slots__ = ("items_in", "items_out", "dropped", "errors", "busy", "_lock")
+
+    def __init__(self):
+        self.items_in = 0
+        self.items_out = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **deltas) -> None:
+        with self._lock:
+            for field, delta in deltas.items():
+                setattr(self, field, getattr(self, field) + delta)
+
+    def as_dict(self, wall: float) -> dict:
+        return {
+            "in": self.items_in,
+            "out": self.items_out,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_s": round(self.busy, 2),
+            "items_per_s": round(self.items_in / wall, 2) if wall else 0.0,
+        }
+
+
+class Pipeline:
+    def __init__(self, name: str, stages: List[Stage], report_every: float = 30.0):
+        self.name = name
+        self.stages = stages
+        self.report_every = report_every
+        self.metrics: Dict[str, StageMetrics] = {"discover": StageMetrics()}
+        self.metrics.update({s.name: StageMetrics() for s in stages})
+        self._queues: List[queue.Queue] = []
+        self._stop = threading.Event()
+        self.wall = 0.0
+
+    # ── Controlo ──────────────────────────────────────────────────────────
+    def stop(self) -> None:
+        """Pede paragem: a fonte deixa de produzir e os estágios só drenam as filas."""
+        if not self._stop.is_set():
+            log.info(f"🛑 [{self.name}] Paragem pedida — a drenar filas")
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def queue_depths(self) -> Dict[str, Tuple[int, int]]:
+        return {s.name: (q.qsize(), q.maxsize) for s, q in zip(self.stages, self._queues)}
+
+    # ── Execução ──────────────────────────────────────────────────────────
+    def run(self, source: Iterable, deadline: Optional[float] = None) -> Dict[str, dict]:
+        """Corre o pipeline até a fonte se esgotar, stop() ou `deadline`. Devolve as métricas."""
+        self._queues = [queue.Queue(maxsize=s.queue_size) for s in self.stages]
+        started = time.monotonic()
+        threads = [threading.Thread(target=self._feed, args=(source,), name=f"{self.name}-discover", daemon=True)]
+        remaining = [s.concurrency for s in self.stages]
+        remaining_lock = threading.Lock()
+
+        for idx, stage in enumerate(self.stages):
+            for n in range(stage.concurrency):
+                threads.append(threading.Thread(
+                    target=self._work, args=(idx, remaining, remaining_lock),
+                    name=f"{self.name}-{stage.name}-{n}", daemon=True,
+                ))
+        for t in threads:
+            t.start()
+
+        last_report = time.monotonic()
+        while any(t.is_alive() for t in threads):
+            threads[-1].join(timeout=1.0 if deadline is None else min(1.0, max(deadline - time.monotonic(), 0.01)))
+            if deadline is not None and not self.stopped and time.monotonic() >= deadline:
+                log.warning(f"⌛ [{self.name}] Prazo atingido — sem trabalho novo, a terminar o já descarregado")
+                self.stop()
+            if self.report_every and time.monotonic() - last_report >= self.report_every:
+                self._report_depths()
+                last_report = time.monotonic()
+        for t in threads:
+            t.join()
+
+        self.wall = time.monotonic() - started
+        self._report_summary()
+        return {name: m.as_dict(self.wall) for name, m in self.metrics.items()}
+
+    def _feed(self, source: Iterable) -> None:
+        m = self.metrics["discover"]
+        first = self._queues[0]
+        try:
+            for item in source:
+                if self._stop.is_set():
+                    break
+                t0 = time.monotonic()
+                first.put(item)
+                m.add(items_out=1, busy=time.monotonic() - t0)
+        except Exception as e:
+            log.error(f"❌ [{self.name}] Falha na descoberta: {e}")
+            m.add(errors=1)
+        finally:
+            close = getattr(source, "close", None)
+            if close:
+                close()
+            for _ in range(self.stages[0].concurrency):
+                first.put(_END)
+
+    def _work(self, idx: int, remaining: List[int], remaining_lock: threading.Lock) -> None:
+        stage = self.stages[idx]
+        inbox = self._queues[idx]
+        outbox = self._queues[idx + 1] if idx + 1 < len(self.stages) else None
+        m = self.metrics[stage.name]
+
+        while True:
+            item = inbox.get()
+            if item is _END:
+                break
+            m.add(items_in=1)
+            if self._stop.is_set() and not stage.finish_on_stop:
+                m.add(dropped=1)  # a drenar: não processa
+                continue
+            t0 = time.monotonic()
+            try:
+                # Registos emitidos pelo estágio levam a fonte e o estágio (run_logging.py)
+                with log_context(source=item.get("site") if isinstance(item, dict) else None, stage=stage.name):
+                    result = stage.fn(item)
+                if stage.fan_out and result is not None:
+                    result = list(result)
+            except Exception as e:
+                m.add(errors=1, busy=time.monotonic() - t0)
+                log.warning(f"  ⚠️  [{stage.name}] {e}")
+                continue
+            m.add(busy=time.monotonic() - t0)
+
+            if result is None:
+                m.add(dropped=1)
+                continue
+            outputs = result if stage.fan_out else (result,)
+            for out in outputs:
+                m.add(items_out=1)
+                if outbox is not None:
+                    outbox.put(out)
+
+        # Último worker deste estágio a sair → fecha o estágio seguinte
+        with remaining_lock:
+            remaining[idx] -= 1
+            last = remaining[idx] == 0
+        if last and outbox is not None:
+            for _ in range(self.stages[idx + 1].concurrency):
+                outbox.put(_END)
+
+    # ── Relatórios ────────────────────────────────────────────────────────
+    def _report_depths(self) -> None:
+        depths = " | ".join(f"{name} {d}/{mx}" for name, (d, mx) in self.queue_depths().items())
+        log.info(f"📈 [{self.name}] filas: {depths}")
+
+    def _report_summary(self) -> None:
+        log.info(f"📊 [{self.name}] estágios ({self.wall:.1f}s):")
+        for name, m in self.metrics.items():
+            d = m.as_dict(self.wall)
+            log.info(
+                f"     {name:9s} in {d['in']:4d} | out {d['out']:4d} | desc. {d['dropped']:4d} | "
+                f"erros {d['errors']:3d} | ocupado {d['busy_s']:7.1f}s | {d['items_per_s']:6.2f}/s"
+            )
+
+
+class HostThrottle:
+    """
+    Cortesia por host partilhada pelos workers de fetch: pedidos ao MESMO host
+    são serializados (ou limitados a `per_host` em simultâneo) e espaçados;
+    hosts diferentes correm em paralelo.
+    """
+
+    def __init__(self, per_host: int = 1):
+        self._locks: Dict[str, threading.Semaphore] = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._guard = threading.Lock()
+        self._last: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str, delay_range: Optional[Tuple[float, float]] = None, deadline: Optional[float] = None):
+        """Vez no host → True; False (sem esperar nem pedir) se ela só chegaria depois de `deadline`."""
+        host = (urlparse(url).hostname or "").lower()
+        with self._guard:
+            lock = self._locks[host]
+        # Com prazo, a espera pelos pedidos anteriores ao mesmo host também é limitada
+        if deadline is None:
+            lock.acquire()
+        elif not lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            yield False
+            return
+        try:
+            wait = 0.0
+            if delay_range and host in self._last:
+                gap = random.uniform(*delay_range)
+                wait = self._last[host] + gap - time.monotonic()
+            if deadline is not None and time.monotonic() + max(wait, 0.0) > deadline:
+                yield False
+                return
+            if wait > 0:
+                log.debug(f"  ⏳ {host}: aguardando {wait:.1f}s (simulação humana)")
+                time.sleep(wait)
+            try:
+                yield True
+            finally:
+                self._last[host] = time.monotonic()
+        finally:
+            lock.release()
@@ -0,0 +1,251 @@
+"""
+Reclassify — Classificadores Compilados e Backfill de Categorias
+================================================================
+As categorias são atribuídas uma só vez, no insert (`_categorize` das vagas,
+`classify` das notícias): mudar CATEGORY_MAP ou as listas de palavras-chave
+deixava as linhas antigas com a categoria velha. Este módulo:
+
+  • compila cada lista de palavras-chave numa só regex, com a mesma regra de
+    antes (`kw.lower() in título.lower()`). Os motores usam estes mesmos
+    classificadores, por isso o backfill nunca contradiz o insert
+  • percorre `jobs` / `news_articles` em páginas de PAGE linhas (keyset por
+    id, sem OFFSET) e classifica cada página de uma vez
+  • grava só as linhas que mudaram, agrupadas por (valor antigo → novo): um
+    PATCH por grupo de até CHUNK ids, com o valor antigo no filtro — uma linha
+    editada entretanto fica como está
+
+Correções do admin: `categoria_auto` / `is_priority_auto` guardam o rótulo da
+máquina (migração 20261019000800). Uma linha cujo valor difere do rótulo
+automático foi corrigida à mão, e uma sem rótulo automático foi criada à mão:
+nenhuma das duas é reescrita. O relatório agrupa as correções (automática →
+corrigida, com exemplos) para servirem de base à afinação das listas.
+
+    python scraper/reclassify.py jobs --dry-run    # o que mudaria
+    python scraper/reclassify.py news
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+from urllib.parse import urlparse
+
+log = logging.getLogger("Reclassify")
+
+PAGE = 1000
+CHUNK = 200
+EXAMPLES = 3
+
+
+# ─────────────────────────────────────────────
+# CLASSIFICADORES (usados também pelos motores)
+# ─────────────────────────────────────────────
+def keyword_pattern(keywords: Iterable[str]) -> Pattern:
+    """Uma regex para a lista inteira: `search(texto.lower())` ≡ any(kw.lower() in texto.lower())."""
+    alternatives = [re.escape(kw.lower()) for kw in keywords if kw]
+    return re.compile("|".join(alternatives) if alternatives else r"(?!)")
+
+
+class JobCategorizer:
+    """Primeira categoria de CATEGORY_MAP (pela ordem) com uma palavra no título; senão "Geral"."""
+
+    def __init__(self, category_map: Dict[str, List[str]]):
+        self.patterns = [(category, keyword_pattern(kws)) for category, kws in category_map.items()]
+
+    def __call__(self, title: str, fixed_category: Optional[str] = None) -> str:
+        if fixed_category:
+            return fixed_category
+        text = (title or "").lower()
+        for category, pattern in self.patterns:
+            if pattern.search(text):
+                return category
+        return "Geral"
+
+
+class NewsClassifier:
+    """(categoria, is_priority): overrides por ordem, senão a categoria fixa do portal."""
+
+    def __init__(self, priority: Iterable[str], overrides: List[Tuple[str, Iterable[str]]]):
+        self.priority = keyword_pattern(priority)
+        self.overrides = [(category, keyword_pattern(kws)) for category, kws in overrides]
+
+    def __call__(self, title: str, fixed_category: str) -> Tuple[str, bool]:
+        text = (title or "").lower()
+        is_priority = self.priority.search(text) is not None
+        for category, pattern in self.overrides:
+            if pattern.search(text):
+                return category, is_priority
+        return fixed_category, is_priority
+
+
+# ─────────────────────────────────────────────
+# BACKFILL
+# ─────────────────────────────────────────────
+# (coluna, valor antigo, valor novo) → ids
+Group = Tuple[str, object, object]
+
+
+def _filter_value(value) -> str:
+    if value is None:
+        return "is.null"
+    if isinstance(value, bool):
+        return f"is.{str(value).lower()}"
+    return f"eq.{value}"
+
+
+def pages(db, table: str, columns: str, page: int = PAGE) -> Iterator[List[dict]]:
+    """Todas as linhas da tabela, por ordem de id, PAGE de cada vez (keyset: id > último)."""
+    last = None
+    while True:
+        filters = {"order": "id.asc", "limit": str(page)}
+        if last is not None:
+            filters["id"] = f"gt.{last}"
+        rows = db.select(table, filters, columns=columns)
+        if rows:
+            yield rows
+        if len(rows) < page:
+            return
+        last = rows[-1]["id"]
+
+
+class Reclassifier:
+    """
+    Percorre uma tabela e reescreve só os rótulos automáticos que mudaram.
+    `label(row)` devolve os rótulos atuais da máquina ({coluna: valor}) ou None
+    quando a linha não é classificável (fonte que já não existe).
+    """
+
+    def __init__(self, db, table: str, columns: str, label: Callable[[dict], Optional[dict]],
+                 dry_run: bool = False, page: int = PAGE, chunk: int = CHUNK):
+        self.db = db
+        self.table = table
+        self.columns = columns
+        self.label = label
+        self.dry_run = dry_run
+        self.page = page
+        self.chunk = chunk
+        self.stats = Counter()
+        self.transitions: Counter = Counter()
+        self.corrections: Counter = Counter()
+        self.examples: Dict[Group, List[str]] = defaultdict(list)
+        self._groups: Dict[Group, List] = defaultdict(list)
+        self._changed = set()
+
+    def classify_page(self, rows: List[dict]) -> None:
+        labels = [self.label(row) for row in rows]
+        for row, new in zip(rows, labels):
+            self.stats["lidas"] += 1
+            if new is None:
+                self.stats["sem fonte"] += 1
+                continue
+            if all(row.get(f"{col}_auto") is None for col in new):
+                self.stats["manuais"] += 1
+                continue
+            for col, value in new.items():
+                current, auto = row.get(col), row.get(f"{col}_auto")
+                if auto is None:
+                    continue
+                if current != auto:
+                    self.corrections[(col, auto, current)] += 1
+                    examples = self.examples[(col, auto, current)]
+                    if len(examples) < EXAMPLES:
+                        examples.append(row.get("title") or row.get("titulo") or str(row["id"]))
+                elif value != current:
+                    group = (col, current, value)
+                    self.transitions[group] += 1
+                    self._changed.add(row["id"])
+                    self._groups[group].append(row["id"])
+                    if len(self._groups[group]) >= self.chunk:
+                        self._write(group)
+
+    def _write(self, group: Group) -> None:
+        ids = self._groups.pop(group, [])
+        if not ids or self.dry_run:
+            return
+        col, old, new = group
+        ok = self.db.update(
+            self.table,
+            {"id": f"in.({','.join(str(i) for i in ids)})", col: _filter_value(old)},
+            {col: new, f"{col}_auto": new},
+        )
+        self.stats["escritas" if ok else "falhadas"] += len(ids)
+
+    def run(self) -> int:
+        """Percorre a tabela toda; devolve o nº de linhas com pelo menos um rótulo novo."""
+        for rows in pages(self.db, self.table, self.columns, self.page):
+            self.classify_page(rows)
+        for group in list(self._groups):
+            self._write(group)
+        self.report()
+        return len(self._changed)
+
+    def report(self) -> None:
+        mode = " (simulação)" if self.dry_run else ""
+        log.info(f"🏷️  {self.table}{mode}: {self.stats['lidas']} lida(s), {len(self._changed)} com rótulo novo, "
+                 f"{sum(self.corrections.values())} corrigida(s) pelo admin, {self.stats['manuais']} manual(is), "
+                 f"{self.stats['sem fonte']} sem fonte conhecida")
+        for (col, old, new), n in self.transitions.most_common(15):
+            log.info(f"   {col}: {old} → {new} ×{n}")
+        for group, n in self.corrections.most_common(15):
+            col, auto, fixed = group
+            log.info(f"   ✍️  {col}: {auto} corrigida para {fixed} ×{n} (p.ex. {' | '.join(self.examples[group])})")
+        if self.stats["falhadas"]:
+            log.error(f"❌ {self.stats['falhadas']} linha(s) por atualizar (ver erros acima); repetir o comando")
+
+
+def job_reclassifier(db, **kwargs) -> Reclassifier:
+    from ango_job_scraper import CATEGORIZER, JOBS_CONFIG
+
+    hosts = {(urlparse(cfg["base_url"]).hostname or "").removeprefix("www."): cfg for cfg in JOBS_CONFIG.values()}
+
+    def label(row: dict) -> Optional[dict]:
+        cfg = hosts.get((urlparse(row.get("source_url") or "").hostname or "").removeprefix("www."))
+        if cfg is None:
+            return None
+        return {"categoria": CATEGORIZER(row.get("title") or "", cfg.get("fixed_category"))}
+
+    return Reclassifier(db, "jobs", "id,title,source_url,categoria,categoria_auto", label, **kwargs)
+
+
+def news_reclassifier(db, **kwargs) -> Reclassifier:
+    from news_scraper import CLASSIFIER, SITES_CONFIG
+
+    def label(row: dict) -> Optional[dict]:
+        cfg = SITES_CONFIG.get(row.get("fonte"))
+        if cfg is None:
+            return None
+        categoria, is_priority = CLASSIFIER(row.get("titulo") or "", cfg.get("fixed_category", "Geral"))
+        return {"categoria": categoria or "Geral", "is_priority": is_priority}
+
+    return Reclassifier(
+        db, "news_articles", "id,titulo,fonte,categoria,categoria_auto,is_priority,is_priority_auto", label, **kwargs
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reclassifica as linhas existentes com as listas de palavras atuais")
+    parser.add_argument("engine", choices=["jobs", "news"])
+    parser.add_argument("--dry-run", action="store_true", help="só o relatório, sem escrever")
+    parser.add_argument("--page", type=int, default=PAGE, help=f"linhas por página (omissão: {PAGE})")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from ango_job_scraper import SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+    make = job_reclassifier if args.engine == "jobs" else news_reclassifier
+    reclassifier = make(SupabaseRestClient(url, key), dry_run=args.dry_run, page=args.page)
+    reclassifier.run()
+    return 1 if reclassifier.stats["falhadas"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+Replay — Re-extração Offline a partir do Arquivo de Respostas
+=============================================================
+Volta a correr a extração (parse_listing_page / parse_detail_page /
+parse_article_page) sobre as respostas gravadas com `--archive`, sem um único
+pedido aos portais. Depois de corrigir um seletor em JOBS_CONFIG ou
+SITES_CONFIG, semanas de páginas são re-extraídas em segundos:
+
+    python scraper/replay.py jobs --archive scraper/.archive
+    python scraper/replay.py news --archive scraper/.archive --source ANGOP --since 2026-10-01
+
+O relatório mostra, por fonte, quantos cards cada listagem devolve e a
+cobertura de cada campo no detalhe. Com `--backfill`, os campos que estão
+vazios (ou com placeholder) no Supabase são preenchidos com o que o replay
+extraiu — nunca se sobrescreve um valor já existente.
+"""
+
+import os
+import sys
+import argparse
+import logging
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from parse_pool import ParsePool, default_workers
+from response_archive import ResponseArchive
+from url_canon import url_key
+from content_hash import HASHED_COLUMNS, content_hash
+from salary_parser import load_rates, parse_salary
+
+log = logging.getLogger("Replay")
+
+BACKFILL_CHUNK = 50
+
+
+# ─────────────────────────────────────────────
+# ADAPTADORES POR MOTOR
+# ─────────────────────────────────────────────
+class JobsReplay:
+    table = "jobs"
+    url_column = "source_url"
+
+    def __init__(self):
+        import ango_job_scraper as engine
+        self.engine = engine
+        self.configs = engine.JOBS_CONFIG
+        self.client_cls = engine.SupabaseRestClient
+        self._rates = None
+
+    def is_listing(self, cfg: dict, url: str) -> bool:
+        return url == cfg["list_url"]
+
+    def parse_listing(self, pool: ParsePool, rec, cfg: dict):
+        return pool.submit(self.engine.parse_listing_page, rec.content, rec.encoding, rec.source, cfg)
+
+    def parse_detail(self, pool: ParsePool, rec, cfg: dict):
+        return pool.submit(self.engine.parse_detail_page, rec.content, rec.encoding, cfg)
+
+    @staticmethod
+    def cards_of(page: dict) -> list:
+        return page["cards"]
+
+    @staticmethod
+    def to_columns(detail: dict) -> dict:
+        return {
+            "description": (detail.get("description") or "")[:5000],
+            "requirements": detail.get("requirements") or [],
+            "salary": detail.get("salary") or "",
+            "imagem_url": detail.get("image_url") or "",
+            "application_email": (detail.get("email") or "")[:255],
+        }
+
+    def derived(self, db, patch: dict) -> dict:
+        """Colunas calculadas das preenchidas: um `salary` novo traz as salary_* estruturadas."""
+        if "salary" not in patch:
+            return {}
+        if self._rates is None:
+            self._rates = load_rates(db)
+        parsed = parse_salary(patch["salary"])
+        return parsed.to_columns(self._rates) if parsed else {}
+
+    @staticmethod
+    def is_missing(column: str, value) -> bool:
+        if not value:
+            return True
+        if column == "imagem_url":
+            return "img.icons8.com" in value            # placeholder por categoria
+        if column == "application_email":
+            return value.startswith("Candidatar via:")  # fallback sem e-mail
+        return False
+
+
+class NewsReplay:
+    table = "news_articles"
+    url_column = "url_origem"
+
+    def __init__(self):
+        import news_scraper as engine
+        self.engine = engine
+        self.configs = engine.SITES_CONFIG
+        self.client_cls = engine.SupabaseRestClient
+
+    def is_listing(self, cfg: dict, url: str) -> bool:
+        return url == cfg["list_url"]
+
+    def parse_listing(self, pool: ParsePool, rec, cfg: dict):
+        return pool.submit(count_listing_articles, rec.content, rec.encoding, cfg["article_selector"])
+
+    def parse_detail(self, pool: ParsePool, rec, cfg: dict):
+        return pool.submit(self.engine.parse_article_page, rec.content, rec.encoding, cfg["base_url"])
+
+    @staticmethod
+    def cards_of(page: list) -> list:
+        return page
+
+    def to_columns(self, detail: dict) -> dict:
+        # O título nunca é reescrito: o do card é muitas vezes mais limpo
+        return {
+            "resumo": (detail.get("summary") or "")[:1000],
+            "corpo": (detail.get("body_html") or "")[:50000],
+            "imagem_url": detail.get("image_url") or "",
+        }
+
+    def derived(self, db, patch: dict) -> dict:
+        return {}
+
+    def is_missing(self, column: str, value) -> bool:
+        if not value:
+            return True
+        return column == "imagem_url" and value == self.engine.RESOLVEAO_PLACEHOLDER
+
+
+def count_listing_articles(content: bytes, encoding: str, selector: str) -> List[dict]:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content.decode(encoding, errors="replace"), "html.parser")
+    found = [{} for _ in soup.select(selector)]
+    soup.decompose()
+    return found
+
+
+ENGINES = {"jobs": JobsReplay, "news": NewsReplay}
+
+
+# ─────────────────────────────────────────────
+# REPLAY
+# ─────────────────────────────────────────────
+class SourceReport:
+    __slots__ = ("listings", "cards", "empty_listings", "details", "errors", "filled")
+
+    def __init__(self):
+        self.listings = 0
+        self.cards = 0
+        self.empty_listings = 0
+        self.details = 0
+        self.errors = 0
+        self.filled: Dict[str, int] = defaultdict(int)
+
+
+def _windowed(pool: ParsePool, jobs: Iterator[Tuple], window: int) -> Iterator[Tuple]:
+    """Mantém no máximo `window` parses em voo (memória limitada com o pool ativo)."""
+    pending = []
+    for job in jobs:
+        pending.append(job)
+        if len(pending) >= window:
+            yield pending.pop(0)
+    yield from pending
+
+
+def replay(
+    adapter,
+    archive: ResponseArchive,
+    pool: ParsePool,
+    source: Optional[str] = None,
+    since: Optional[str] = None,
+) -> Tuple[Dict[str, SourceReport], Dict[str, Tuple[str, dict]]]:
+    """
+    Re-extrai o arquivo. Devolve (relatório por fonte, {url: (fonte, colunas)}),
+    guardando para cada URL a extração da resposta mais recente.
+    """
+    reports: Dict[str, SourceReport] = defaultdict(SourceReport)
+    extracted: Dict[str, Tuple[str, dict]] = {}
+
+    def submit_all():
+        for rec in archive.iter_records(source=source, since=since):
+            cfg = adapter.configs.get(rec.source)
+            if cfg is None or rec.status >= 400:
+                continue
+            listing = adapter.is_listing(cfg, rec.url)
+            fut = (adapter.parse_listing if listing else adapter.parse_detail)(pool, rec, cfg)
+            yield rec.source, rec.url, listing, fut
+
+    for site, url, listing, fut in _windowed(pool, submit_all(), window=max(4, pool.workers * 4)):
+        report = reports[site]
+        try:
+            result = fut.result()
+        except Exception as e:
+            log.warning(f"  ⚠️  [{site}] {url[:70]}: {e}")
+            report.errors += 1
+            continue
+        if listing:
+            cards = adapter.cards_of(result)
+            report.listings += 1
+            report.cards += len(cards)
+            report.empty_listings += not cards
+        else:
+            report.details += 1
+            columns = adapter.to_columns(result)
+            for column, value in columns.items():
+                report.filled[column] += bool(value) and not adapter.is_missing(column, value)
+            extracted[url] = (site, columns)
+    return reports, extracted
+
+
+def print_report(reports: Dict[str, SourceReport]) -> None:
+    for site in sorted(reports):
+        r = reports[site]
+        avg = r.cards / r.listings if r.listings else 0.0
+        log.info(f"📦 {site}: {r.listings} listagens ({avg:.1f} cards/pág., {r.empty_listings} vazias) | "
+                 f"{r.details} detalhes | {r.errors} erros")
+        for column, n in sorted(r.filled.items()):
+            log.info(f"     {column:18s} {n:5d}/{r.details} ({n / r.details:.0%})")
+
+
+def backfill(adapter, db, extracted: Dict[str, Tuple[str, dict]], dry_run: bool = False) -> int:
+    """Preenche só as colunas vazias/placeholder das linhas existentes. Devolve nº de linhas tocadas."""
+    # Arquivos antigos têm URLs com tracking/fragmentos: o encontro é pela url_key
+    by_key = {url_key(u): u for u in extracted}
+    keys = [k for k in by_key if k]
+    touched = 0
+    for i in range(0, len(keys), BACKFILL_CHUNK):
+        chunk = keys[i:i + BACKFILL_CHUNK]
+        hashed = HASHED_COLUMNS[adapter.table]
+        columns = ",".join(dict.fromkeys(["id", "url_key", adapter.url_column, *adapter.to_columns({}).keys(), *hashed]))
+        rows = db.select(adapter.table, {"url_key": f"in.({','.join(chunk)})"}, columns=columns)
+        for row in rows:
+            _, fresh = extracted[by_key[row["url_key"]]]
+            patch = {
+                col: value for col, value in fresh.items()
+                if value and not adapter.is_missing(col, value) and adapter.is_missing(col, row.get(col))
+            }
+            if not patch:
+                continue
+            patch.update(adapter.derived(db, patch))
+            if any(col in hashed for col in patch):
+                # O hash tem de refletir o conteúdo novo, senão o --update vê uma alteração falsa
+                patch["content_hash"] = content_hash(adapter.table, {**row, **patch})
+            touched += 1
+            if dry_run:
+                log.info(f"  📝 (simulação) {row[adapter.url_column][:70]} ← {', '.join(patch)}")
+            elif db.update(adapter.table, {"id": f"eq.{row['id']}"}, patch):
+                log.info(f"  📝 {row[adapter.url_column][:70]} ← {', '.join(patch)}")
+    return touched
+
+
+# ─────────────────────────────────────────────
+# PONTO DE ENTRADA
+# ─────────────────────────────────────────────
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-extração offline a partir do arquivo de respostas")
+    parser.add_argument("engine", choices=sorted(ENGINES))
+    parser.add_argument("--archive", metavar="DIR", default=os.getenv("SCRAPER_ARCHIVE_DIR"), required=False)
+    parser.add_argument("--source", help="só esta fonte (nome em JOBS_CONFIG / SITES_CONFIG)")
+    parser.add_argument("--since", metavar="AAAA-MM-DD", help="só arquivos a partir deste dia")
+    parser.add_argument("--workers", type=int, default=0, help="processos de parsing (-1 = nº de cores - 1)")
+    parser.add_argument("--backfill", action="store_true", help="preenche no Supabase os campos em falta")
+    parser.add_argument("--dry-run", action="store_true", help="com --backfill: só mostra o que mudaria")
+    args = parser.parse_args(argv)
+
+    if not args.archive:
+        parser.error("indique --archive DIR (ou SCRAPER_ARCHIVE_DIR)")
+
+    adapter = ENGINES[args.engine]()
+    archive = ResponseArchive(args.archive)
+    with ParsePool(default_workers() if args.workers < 0 else args.workers) as pool:
+        reports, extracted = replay(adapter, archive, pool, source=args.source, since=args.since)
+    if not reports:
+        log.warning(f"⚠️  Nenhuma resposta arquivada em {args.archive}")
+        return 1
+    print_report(reports)
+
+    if args.backfill:
+        load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+        url = os.getenv("VITE_SUPABASE_URL")
+        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        if not url or not key:
+            log.critical("❌ --backfill precisa de VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+            return 1
+        touched = backfill(adapter, adapter.client_cls(url, key), extracted, dry_run=args.dry_run)
+        log.info(f"✅ Backfill: {touched} linha(s) {'a atualizar' if args.dry_run else 'atualizadas'}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+ResponseArchive — Arquivo de Respostas Brutas (gravar e reproduzir)
+===================================================================
+Cada resposta descarregada pelos motores é acrescentada a um arquivo
+append-only, um por fonte e por dia, no formato de registos WARC/1.0
+(cabeçalho + corpo). Cada registo é um frame comprimido independente
+(zstd; gzip se o pacote `zstandard` não estiver instalado), por isso os
+ficheiros podem ser concatenados, truncados no fim ou lidos em streaming.
+
+    <dir>/<fonte>/<AAAA-MM-DD>.warc.zst
+
+Com isto, quando um seletor de JOBS_CONFIG / SITES_CONFIG parte, já não é
+preciso voltar a rastrear os portais: o replay.py volta a correr a extração
+sobre o arquivo, à velocidade do disco, e pode preencher os campos em falta.
+"""
+
+import io
+import os
+import re
+import gzip
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional: gzip (stdlib) como alternativa
+    zstandard = None
+
+log = logging.getLogger("ResponseArchive")
+
+EXTENSION = ".warc.zst" if zstandard else ".warc.gz"
+
+
+def source_slug(source: str) -> str:
+    """'Jornal de Angola' → 'jornal-de-angola' (nome de diretório estável)."""
+    ascii_name = unicodedata.normalize("NFKD", source).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "desconhecida"
+
+
+class ArchivedResponse:
+    __slots__ = ("source", "url", "status", "encoding", "fetched_at", "content")
+
+    def __init__(self, source: str, url: str, status: int, encoding: str, fetched_at: str, content: bytes):
+        self.source = source
+        self.url = url
+        self.status = status
+        self.encoding = encoding
+        self.fetched_at = fetched_at
+        self.content = content
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard:
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress_stream(path: str) -> io.BufferedIOBase:
+    if path.endswith(".zst"):
+        if not zstandard:
+            raise RuntimeError(f"{path}: instale 'zstandard' para ler arquivos .zst")
+        # read_across_frames: um registo = um frame
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True,
+        ))
+    return gzip.open(path, "rb")
+
+
+class ResponseArchive:
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _path(self, source: str, day: str) -> str:
+        folder = os.path.join(self.root, source_slug(source))
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, day + EXTENSION)
+
+    # ── Gravação ──────────────────────────────────────────────────────────
+    def record(self, source: str, url: str, status: int, content: bytes, encoding: Optional[str]) -> None:
+        now = datetime.now(timezone.utc)
+        header = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {now.strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"X-Source: {source}\r\n"
+            f"X-Status: {status}\r\n"
+            f"X-Encoding: {encoding or ''}\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            "\r\n"
+        ).encode("utf-8")
+        frame = _compress(header + content + b"\r\n\r\n")
+
+        path = self._path(source, now.strftime("%Y-%m-%d"))
+        with self._guard:
+            lock = self._locks.setdefault(path, threading.Lock())
+        try:
+            with lock, open(path, "ab") as f:
+                f.write(frame)
+        except OSError as e:
+            log.warning(f"⚠️  Não foi possível arquivar {url}: {e}")
+
+    # ── Leitura ───────────────────────────────────────────────────────────
+    def iter_records(self, source: Optional[str] = None, since: Optional[str] = None) -> Iterator[ArchivedResponse]:
+        """Percorre os registos (por fonte e dia, em ordem). `since` = 'AAAA-MM-DD'."""
+        if not os.path.isdir(self.root):
+            return
+        slugs = [source_slug(source)] if source else sorted(os.listdir(self.root))
+        for slug in slugs:
+            folder = os.path.join(self.root, slug)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if not name.endswith((".warc.zst", ".warc.gz")):
+                    continue
+                if since and name[:10] < since:
+                    continue
+                yield from self._read_file(os.path.join(folder, name))
+
+    def _read_file(self, path: str) -> Iterator[ArchivedResponse]:
+        try:
+            stream = _decompress_stream(path)
+        except (OSError, RuntimeError) as e:
+            log.warning(f"⚠️  Arquivo ilegível {path}: {e}")
+            return
+        with stream:
+            while True:
+                try:
+                    fields = self._read_header(stream)
+                    if fields is None:
+                        return
+                    length = int(fields.get("Content-Length", 0))
+                    content = stream.read(length)
+                    stream.read(4)  # \r\n\r\n
+                except (OSError, EOFError, ValueError) as e:
+                    # Registo final truncado (execução interrompida): ignora o resto
+                    log.warning(f"⚠️  Fim de arquivo corrompido em {path}: {e}")
+                    return
+                yield ArchivedResponse(
+                    source=fields.get("X-Source", ""),
+                    url=fields.get("WARC-Target-URI", ""),
+                    status=int(fields.get("X-Status", 0) or 0),
+                    encoding=fields.get("X-Encoding") or "utf-8",
+                    fetched_at=fields.get("WARC-Date", ""),
+                    content=content,
+                )
+
+    @staticmethod
+    def _read_header(stream) -> Optional[dict]:
+        line = stream.readline()
+        if not line:
+            return None
+        if not line.startswith(b"WARC/"):
+            raise ValueError(f"registo inválido: {line[:40]!r}")
+        fields = {}
+        while True:
+            line = stream.readline()
+            if not line:
+                raise EOFError("cabeçalho truncado")
+            line = line.rstrip(b"\r\n")
+            if not line:
+                return fields
+            key, _, value = line.decode("utf-8").partition(":")
+            fields[key.strip()] = value.strip()
@@ -0,0 +1,174 @@
+"""
+RunLogging — Logging Assíncrono e Estruturado dos Motores
+=========================================================
+Os motores escreviam cada mensagem na consola e no ficheiro de log a partir
+das próprias threads do pipeline: formatar e fazer flush a meio de um fetch
+ou de um parse aparecia nos perfis (--profile), e uma varredura grande enchia
+o disco do runner com uma linha por item. Agora:
+
+  • as threads só põem o registo numa fila (QueueHandler); um QueueListener
+    noutra thread escreve na consola (texto, como sempre) e no ficheiro
+    (<motor>_scraper.jsonl: um objeto JSON por linha, rodado a MAX_BYTES com
+    BACKUPS cópias). Com a fila cheia o registo é descartado e contado, nunca
+    bloqueia o pipeline
+  • cada registo leva `source` (fonte) e `stage` (estágio do pipeline), vindos
+    de `log_context()` — o Pipeline marca cada item que processa
+  • as mensagens por item (loggers "<motor>.itens", abaixo de WARNING) são
+    amostradas por fonte: as primeiras BURST e depois 1 em cada SAMPLE_EVERY.
+    Avisos e erros passam sempre. `--verbose` desliga a amostragem
+
+No fim, uma linha diz quantas mensagens foram omitidas ou descartadas.
+"""
+
+import json
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+ITEM_LOGGER_SUFFIX = ".itens"
+BURST = 20
+SAMPLE_EVERY = 50
+QUEUE_SIZE = 10000
+MAX_BYTES = 5 * 2**20
+BACKUPS = 2
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+_context = threading.local()
+
+
+@contextmanager
+def log_context(**fields):
+    """Marca os registos emitidos por esta thread (p.ex. source="ANGOP", stage="fetch")."""
+    previous = {k: getattr(_context, k, None) for k in fields}
+    for k, v in fields.items():
+        setattr(_context, k, v)
+    try:
+        yield
+    finally:
+        for k, v in previous.items():
+            setattr(_context, k, v)
+
+
+class ContextFilter(logging.Filter):
+    """Copia a fonte/estágio da thread emissora para o registo (antes de ir para a fila)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "source", None) is None:
+            record.source = getattr(_context, "source", None)
+        if getattr(record, "stage", None) is None:
+            record.stage = getattr(_context, "stage", None)
+        return True
+
+
+class ItemSampler(logging.Filter):
+    """Amostragem das mensagens por item: BURST por fonte, depois 1 em cada `every`."""
+
+    def __init__(self, burst: int = BURST, every: int = SAMPLE_EVERY):
+        super().__init__()
+        self.burst = burst
+        self.every = every
+        self.seen = Counter()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not record.name.endswith(ITEM_LOGGER_SUFFIX):
+            return True
+        with self._lock:
+            self.seen[(record.name, record.source)] += 1
+            n = self.seen[(record.name, record.source)]
+            if n <= self.burst or n % self.every == 0:
+                return True
+            self.suppressed += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (e conta) em vez de bloquear com a fila cheia."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "source": getattr(record, "source", None),
+            "stage": getattr(record, "stage", None),
+            "msg": record.getMessage().strip(),
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RunLogging:
+    """Consola + ficheiro JSON atrás de uma fila; `start()` substitui os handlers da raiz."""
+
+    def __init__(self, log_file: str, sample: bool = True, level: int = logging.INFO,
+                 queue_size: int = QUEUE_SIZE, max_bytes: int = MAX_BYTES):
+        self.log_file = log_file
+        self.level = level
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(TEXT_FORMAT))
+        structured = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=BACKUPS,
+                                         encoding="utf-8", delay=True)
+        structured.setFormatter(JsonFormatter())
+        self.handler = DroppingQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(ContextFilter())
+        self.sampler = ItemSampler() if sample else None
+        if self.sampler:
+            self.handler.addFilter(self.sampler)
+        self.listener = QueueListener(self.handler.queue, console, structured)
+        self._started = False
+        self._previous = []
+
+    def start(self) -> "RunLogging":
+        root = logging.getLogger()
+        self._previous = root.handlers[:]
+        root.handlers[:] = [self.handler]
+        root.setLevel(self.level)
+        self.listener.start()
+        self._started = True
+        # Um exit() antes do fim do main também escreve o que ficou na fila
+        atexit.register(self.stop)
+        return self
+
+    def stop(self) -> None:
+        if not self._started:
+            return
+        self._started = False
+        suppressed = self.sampler.suppressed if self.sampler else 0
+        if suppressed or self.handler.dropped:
+            logging.getLogger("RunLogging").info(
+                f"🔇 {suppressed} mensagem(ns) por item omitida(s) pela amostragem "
+                f"(primeiras {BURST} por fonte, depois 1/{SAMPLE_EVERY}); "
+                f"{self.handler.dropped} descartada(s) com a fila cheia"
+            )
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        logging.getLogger().handlers[:] = self._previous
+
+
+def setup_logging(log_file: str, verbose: bool = False) -> RunLogging:
+    return RunLogging(log_file, sample=not verbose).start()
+
+
+def item_logger(engine_logger: str) -> logging.Logger:
+    """Logger das mensagens por item de um motor (amostradas)."""
+    return logging.getLogger(engine_logger + ITEM_LOGGER_SUFFIX)
+
@@ -0,0 +1,214 @@
+"""
+RunProfiler — Perfil de CPU por Fonte e Memória de uma Execução (--profile)
+===========================================================================
+Quando uma execução passa a demorar o dobro, os timestamps do log não dizem
+onde foi o tempo. Com `--profile DIR`, os dois motores gravam:
+
+  <DIR>/<motor>-<AAAAmmddTHHMMSSZ>/
+      <fonte>.collapsed    pilhas agregadas ("a;b;c N"), prontas para
+                           flamegraph.pl / speedscope / inferno
+      <fonte>.prof         as mesmas amostras em formato pstats (cProfile):
+                           python -m pstats, snakeviz
+      todas.collapsed / todas.prof
+      memoria-1-inicio.snapshot / -2-meio / -3-fim   (tracemalloc)
+      memoria.txt          top de alocações e crescimento início → fim
+      resumo.txt           funções mais quentes por fonte
+
+Os estágios correm em várias threads e em Python 3.12 só pode haver um
+cProfile ativo por processo, por isso o perfil é por amostragem: uma thread
+lê `sys._current_frames()` a cada `interval` segundos e atribui cada pilha à
+fonte que a thread está a processar (marcada pelos wrappers `stage` / `task`),
+pesada pelo tempo real desde a amostra anterior (com o GIL disputado os
+intervalos esticam). Os pesos das .collapsed são milissegundos. É tempo real (inclui espera de rede), o que também mostra onde cada fonte
+fica parada. Com `--workers N` o parse corre noutros processos e aparece só
+como espera por `future.result()`: para perfilar o parse use `--workers 0`.
+"""
+
+import os
+import sys
+import time
+import marshal
+import logging
+import threading
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("RunProfiler")
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profile")
+ALL_SOURCES = "todas"
+MAX_DEPTH = 96
+
+# (ficheiro, 1ª linha, função) — a chave de função do pstats
+FuncKey = Tuple[str, int, str]
+
+
+def _slug(name: str) -> str:
+    from response_archive import source_slug
+    return source_slug(name)
+
+
+class RunProfiler:
+    def __init__(self, out_dir: str, engine: str, interval: float = 0.005, trace_frames: int = 5):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.dir = os.path.join(out_dir, f"{engine}-{stamp}")
+        self.interval = interval
+        self.trace_frames = trace_frames
+        # thread id → fonte em curso (só as threads dentro de um stage/task)
+        self._current: Dict[int, str] = {}
+        # fonte → Counter(pilha de FuncKeys, raiz → folha → ms amostrados)
+        self._stacks: Dict[str, Counter] = defaultdict(Counter)
+        self._snapshots: List[Tuple[str, tracemalloc.Snapshot]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.started = 0.0
+
+    # ── Marcação da fonte em curso ────────────────────────────────────────
+    @contextmanager
+    def source(self, name: Optional[str]):
+        tid = threading.get_ident()
+        previous = self._current.get(tid)
+        if name:
+            self._current[tid] = name
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._current.pop(tid, None)
+            else:
+                self._current[tid] = previous
+
+    def stage(self, fn: Callable) -> Callable:
+        """Função de estágio do Pipeline com a fonte do item (`item["site"]`) marcada."""
+        def wrapped(item):
+            with self.source(item.get("site") if isinstance(item, dict) else None):
+                return fn(item)
+        wrapped.__name__ = getattr(fn, "__name__", "stage")
+        return wrapped
+
+    def task(self, source: str, fn: Callable, *args, **kwargs):
+        """fn(*args) com `source` marcada (p.ex. listagens no ThreadPoolExecutor)."""
+        with self.source(source):
+            return fn(*args, **kwargs)
+
+    # ── Ciclo de vida ─────────────────────────────────────────────────────
+    def start(self) -> None:
+        os.makedirs(self.dir, exist_ok=True)
+        tracemalloc.start(self.trace_frames)
+        self.snapshot("inicio")
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        log.info(f"🔬 Perfil ativo ({self.interval * 1000:.0f} ms/amostra) → {self.dir}")
+
+    def snapshot(self, label: str) -> None:
+        if not tracemalloc.is_tracing() or any(name == label for name, _ in self._snapshots):
+            return
+        self._snapshots.append((label, tracemalloc.take_snapshot()))
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.snapshot("fim")
+        tracemalloc.stop()
+        self._write()
+
+    # ── Amostragem ────────────────────────────────────────────────────────
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = max(1, round((now - last) * 1000))
+            last = now
+            frames = sys._current_frames()
+            for tid, source in list(self._current.items()):
+                frame = frames.get(tid)
+                if frame is None or tid == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[source][tuple(stack)] += weight
+                self.samples += 1
+
+    # ── Saída ─────────────────────────────────────────────────────────────
+    @staticmethod
+    def _label(key: FuncKey) -> str:
+        filename, line, name = key
+        return f"{os.path.basename(filename)}:{name}:{line}"
+
+    def collapsed(self, stacks: Counter) -> List[str]:
+        return [f"{';'.join(self._label(f) for f in stack)} {n}" for stack, n in stacks.most_common()]
+
+    def pstats_dict(self, stacks: Counter) -> dict:
+        """Pilhas (ms) → dicionário no formato de pstats: {func: (cc, nc, tt, ct, callers)}.
+
+        Sem contagem de chamadas numa amostragem: ncalls leva os ms amostrados.
+        """
+        dt = 0.001
+        own, inclusive = Counter(), Counter()
+        callers: Dict[FuncKey, Counter] = defaultdict(Counter)
+        for stack, n in stacks.items():
+            own[stack[-1]] += n
+            for func in set(stack):
+                inclusive[func] += n
+            for caller, callee in zip(stack, stack[1:]):
+                callers[callee][caller] += n
+        return {
+            func: (n, n, own[func] * dt, n * dt,
+                   {c: (k, k, 0.0, k * dt) for c, k in callers[func].items()})
+            for func, n in inclusive.items()
+        }
+
+    def _write(self) -> None:
+        total = Counter()
+        for stacks in self._stacks.values():
+            total.update(stacks)
+        by_source = {**self._stacks, ALL_SOURCES: total}
+
+        summary = [f"Amostras: {self.samples} em {time.monotonic() - self.started:.1f}s "
+                   f"({self.interval * 1000:.0f} ms cada; tempo real, não só CPU)\n"]
+        for source, stacks in sorted(by_source.items(), key=lambda kv: -sum(kv[1].values())):
+            slug = _slug(source) if source != ALL_SOURCES else ALL_SOURCES
+            with open(os.path.join(self.dir, f"{slug}.collapsed"), "w", encoding="utf-8") as f:
+                f.write("\n".join(self.collapsed(stacks)) + "\n")
+            stats = self.pstats_dict(stacks)
+            with open(os.path.join(self.dir, f"{slug}.prof"), "wb") as f:
+                marshal.dump(stats, f)
+            seconds = sum(stacks.values()) / 1000
+            summary.append(f"── {source}: {seconds:.1f}s")
+            hottest = sorted(stats.items(), key=lambda kv: -kv[1][2])[:8]
+            for func, (_, _, tt, ct, _) in hottest:
+                summary.append(f"     próprio {tt:7.2f}s | total {ct:7.2f}s | {self._label(func)}")
+        with open(os.path.join(self.dir, "resumo.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(summary) + "\n")
+
+        self._write_memory()
+        log.info(f"🔬 Perfil gravado em {self.dir} ({len(self._stacks)} fonte(s), {self.samples} amostras)")
+        for line in summary[1:12]:
+            log.info(f"   {line}")
+
+    def _write_memory(self) -> None:
+        lines = []
+        for i, (label, snap) in enumerate(self._snapshots, 1):
+            snap.dump(os.path.join(self.dir, f"memoria-{i}-{label}.snapshot"))
+            stats = snap.statistics("lineno")
+            lines.append(f"── {label}: {sum(s.size for s in stats) / 2**20:.1f} MiB em {len(stats)} linhas")
+            lines.extend(f"     {s}" for s in stats[:10])
+        if len(self._snapshots) >= 2:
+            first, last = self._snapshots[0][1], self._snapshots[-1][1]
+            lines.append("── crescimento início → fim")
+            lines.extend(f"     {s}" for s in last.compare_to(first, "lineno")[:15])
+        with open(os.path.join(self.dir, "memoria.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
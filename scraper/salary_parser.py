@@ -0,0 +1,272 @@
+"""
+SalaryParser — Salários Estruturados em AOA
+===========================================
+`salary` era só o texto encontrado na página ("150.000 Kz", "Negociável",
+"USD 2,500 / mês"), impossível de ordenar ou filtrar por intervalo. Este
+módulo converte esse texto num intervalo numérico:
+
+  salary_min / salary_max   valores na moeda do anúncio
+  salary_currency           AOA | USD | EUR
+  salary_period             month | year | day | hour
+  salary_aoa_min / _max     equivalente MENSAL em kwanzas (taxa formal de
+                            compra da tabela `exchange_rates`)
+
+  • Kz, KZ, AOA, kwanzas; USD, US$, $, dólares; EUR, €, euros
+  • Separadores pt e en ("1.500.000,00", "150 000", "2,500.00")
+  • Multiplicadores "mil", "k", "M", "milhões" ("150 mil Kz", "1,5M AOA")
+  • Intervalos ("200.000 - 300.000 Kz", "entre 2 e 3 mil USD") e limites
+    ("até 500 mil Kz" → só máximo, "a partir de 80.000 Kz" → só mínimo)
+  • "Negociável", "A combinar", "Competitivo" → sem valores (None)
+
+Um número sem moeda só conta quando vem logo a seguir a "Salário",
+"Remuneração" ou "Vencimento" (ou quando o texto já é o campo de salário).
+
+    python scraper/salary_parser.py parse "entre 200 e 300 mil Kz"
+    python scraper/salary_parser.py backfill      # vagas com `salary` por estruturar
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger("SalaryParser")
+
+# Conversão para mensal: Lei Geral do Trabalho — 44 h semanais
+HOURS_PER_MONTH = 190
+DAYS_PER_MONTH = 22
+PERIOD_FACTORS = {"month": 1.0, "year": 1 / 12, "day": DAYS_PER_MONTH, "hour": HOURS_PER_MONTH}
+PERIOD_LABELS = {"month": "mês", "year": "ano", "day": "dia", "hour": "hora"}
+
+CURRENCIES = {
+    "kz": "AOA", "kzs": "AOA", "kwanza": "AOA", "kwanzas": "AOA", "aoa": "AOA", "akz": "AOA",
+    "usd": "USD", "us$": "USD", "u$s": "USD", "$": "USD", "dolar": "USD", "dolares": "USD",
+    "dólar": "USD", "dólares": "USD",
+    "eur": "EUR", "euro": "EUR", "euros": "EUR", "€": "EUR",
+}
+
+MULTIPLIERS = {"mil": 1e3, "k": 1e3, "m": 1e6, "mi": 1e6, "milhao": 1e6, "milhão": 1e6,
+               "milhoes": 1e6, "milhões": 1e6}
+
+_CUR = r"(?:us\$|u\$s|\$|€|(?<![a-zà-ú])(?:kwanzas?|kzs?|aoa|akz|usd|d[óo]lar(?:es)?|eur(?:os?)?)(?![a-zà-ú]))"
+_NUM = r"(?<![\d.,])(?:\d{1,3}(?:[.,   ]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d+)?)"
+_MULT = r"(?:milh(?:ões|oes|ão|ao)|mil|mi|k|m)(?![a-zà-ú])"
+
+AMOUNT_RE = re.compile(
+    rf"(?:(?P<pre>{_CUR})\s*)?(?P<num>{_NUM})(?:\s*(?P<mult>{_MULT}))?(?:\s*(?P<post>{_CUR}))?",
+    re.IGNORECASE,
+)
+RANGE_JOIN_RE = re.compile(r"\s*(?:-|–|—|a|at[ée]|e|to)\s*", re.IGNORECASE)
+KEYWORD_RE = re.compile(r"(?:sal[áa]rio|remunera[çc][ãa]o|vencimento|ordenado)[^\d\n]{0,25}$", re.IGNORECASE)
+UPPER_ONLY_RE = re.compile(r"(?:at[ée]|m[áa]ximo|max\.?)\s*(?:de\s*)?$", re.IGNORECASE)
+LOWER_ONLY_RE = re.compile(r"(?:a\s+partir\s+de|desde|m[íi]nimo|min\.?|mais\s+de|acima\s+de)\s*(?:de\s*)?$", re.IGNORECASE)
+PERIOD_RE = re.compile(
+    r"^\s*(?:/|por|p/|ao|à|a|\s)*\s*(?P<p>m[êe]s|mensa|ano|anua|dia|di[áa]ri|hora)", re.IGNORECASE
+)
+PERIOD_BEFORE_RE = re.compile(r"(?P<p>mensal|anual|di[áa]ri[oa]|por\s+hora)[^\d\n]{0,25}$", re.IGNORECASE)
+NEGOTIABLE_RE = re.compile(r"negoci[áa]vel|a\s*combinar|competitiv[oa]", re.IGNORECASE)
+
+
+def _to_number(raw: str) -> Optional[float]:
+    """'1.500.000,00' → 1500000.0 · '2,500' → 2500.0 · '1,5' → 1.5"""
+    s = re.sub(r"[   ]", "", raw)
+    if "." in s and "," in s:
+        dec = "." if s.rfind(".") > s.rfind(",") else ","
+        s = s.replace("," if dec == "." else ".", "").replace(dec, ".")
+    elif "." in s or "," in s:
+        sep = "." if "." in s else ","
+        parts = s.split(sep)
+        # Vários separadores, ou 3 dígitos no fim → separador de milhares
+        s = s.replace(sep, "") if len(parts) > 2 or len(parts[-1]) == 3 else s.replace(sep, ".")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _period_of(token: str) -> str:
+    token = token.lower()
+    if token.startswith("h") or "hora" in token:
+        return "hour"
+    if token.startswith("d"):
+        return "day"
+    if token.startswith("an"):
+        return "year"
+    return "month"
+
+
+class Salary:
+    __slots__ = ("salary_min", "salary_max", "currency", "period", "text")
+
+    def __init__(self, salary_min: Optional[float], salary_max: Optional[float],
+                 currency: str = "AOA", period: str = "month", text: str = ""):
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        self.currency = currency
+        self.period = period
+        self.text = text
+
+    @property
+    def period_label(self) -> str:
+        return PERIOD_LABELS[self.period]
+
+    def to_aoa_monthly(self, rates: Dict[str, float]) -> Tuple[Optional[float], Optional[float]]:
+        """(mín, máx) mensais em AOA; (None, None) sem taxa para a moeda."""
+        rate = 1.0 if self.currency == "AOA" else rates.get(self.currency)
+        if not rate:
+            return None, None
+        factor = rate * PERIOD_FACTORS[self.period]
+        return tuple(round(v * factor, 2) if v is not None else None for v in (self.salary_min, self.salary_max))
+
+    def to_columns(self, rates: Dict[str, float]) -> dict:
+        aoa_min, aoa_max = self.to_aoa_monthly(rates)
+        return {
+            "salary_min": self.salary_min,
+            "salary_max": self.salary_max,
+            "salary_currency": self.currency,
+            "salary_period": self.period,
+            "salary_aoa_min": aoa_min,
+            "salary_aoa_max": aoa_max,
+        }
+
+    def __repr__(self) -> str:
+        return f"Salary({self.salary_min}–{self.salary_max} {self.currency}/{self.period})"
+
+
+EMPTY_COLUMNS = dict.fromkeys(
+    ("salary_min", "salary_max", "salary_currency", "salary_period", "salary_aoa_min", "salary_aoa_max")
+)
+
+
+def _amount(m: re.Match) -> Tuple[Optional[float], Optional[str]]:
+    value = _to_number(m.group("num"))
+    if value is None:
+        return None, None
+    mult = (m.group("mult") or "").lower()
+    if mult:
+        value *= MULTIPLIERS.get(mult, 1)
+    cur = m.group("pre") or m.group("post")
+    return value, CURRENCIES.get(cur.lower()) if cur else None
+
+
+def find_salary(text: str, assume_salary: bool = False) -> Optional[Salary]:
+    """
+    Primeiro salário reconhecido em `text`. Com `assume_salary` (texto que já é
+    o campo de salário: meta tag, JSON-LD), um número sem moeda vale como AOA.
+    """
+    if not text:
+        return None
+    matches = list(AMOUNT_RE.finditer(text))
+    for i, m in enumerate(matches):
+        value, currency = _amount(m)
+        if not value:
+            continue
+        before = text[max(0, m.start() - 40):m.start()]
+        low, high, end = value, value, m.end()
+        # Intervalo: "200.000 - 300.000 Kz", "entre 2 e 3 mil USD"
+        if i + 1 < len(matches):
+            nxt = matches[i + 1]
+            if RANGE_JOIN_RE.fullmatch(text[m.end():nxt.start()]):
+                second, cur2 = _amount(nxt)
+                # "2 a 3 mil" → o multiplicador do segundo valor aplica-se aos dois
+                if second and not m.group("mult") and nxt.group("mult") and low < second / 100:
+                    low *= MULTIPLIERS.get(nxt.group("mult").lower(), 1)
+                # Só é intervalo se crescer ("150.000 Kz e 2 dias de folga" não é)
+                if second and second >= low:
+                    high, currency, end = second, currency or cur2, nxt.end()
+                else:
+                    low = value
+        if not (currency or assume_salary or KEYWORD_RE.search(before)):
+            continue
+        start = m.start()
+        if low == high:
+            # O limite ("até", "a partir de") fica no texto: re-analisado, dá o mesmo intervalo aberto
+            bound = UPPER_ONLY_RE.search(before) or LOWER_ONLY_RE.search(before)
+            if bound:
+                low, high = (None, high) if bound.re is UPPER_ONLY_RE else (low, None)
+                start = m.start() - len(before) + bound.start()
+
+        period_m = PERIOD_RE.match(text[end:end + 30]) or PERIOD_BEFORE_RE.search(before)
+        period = _period_of(period_m.group("p")) if period_m else "month"
+        return Salary(low, high, currency or "AOA", period, text[start:end].strip())
+    return None
+
+
+def parse_salary(text: Optional[str]) -> Optional[Salary]:
+    """Campo `salary` já extraído → Salary (None se vazio ou só "Negociável")."""
+    if not text or (NEGOTIABLE_RE.search(text) and not re.search(r"\d", text)):
+        return None
+    return find_salary(text, assume_salary=True)
+
+
+def load_rates(db) -> Dict[str, float]:
+    """{moeda: AOA por unidade} a partir de `exchange_rates` (taxa formal de compra)."""
+    if db is None:
+        return {}
+    try:
+        rows = db.select("exchange_rates", columns="currency,formal_buy")
+    except Exception as e:
+        log.warning(f"⚠️  Taxas de câmbio indisponíveis ({e}): salários em USD/EUR ficam sem valor AOA")
+        return {}
+    return {r["currency"].upper(): float(r["formal_buy"]) for r in rows if r.get("formal_buy")}
+
+
+# ─────────────────────────────────────────────
+# BACKFILL DAS VAGAS EXISTENTES
+# ─────────────────────────────────────────────
+def backfill(db, page: int = 1000, dry_run: bool = False) -> int:
+    """Estrutura o `salary` das vagas que ainda não têm `salary_currency`."""
+    rates = load_rates(db)
+    last_id, touched = None, 0
+    while True:
+        filters = {"salary": "not.is.null", "salary_currency": "is.null", "order": "id.asc", "limit": str(page)}
+        if last_id is not None:
+            filters["id"] = f"gt.{last_id}"
+        rows = db.select("jobs", filters, columns="id,salary")
+        for row in rows:
+            parsed = parse_salary(row["salary"])
+            if parsed is None:
+                continue
+            touched += 1
+            if dry_run:
+                log.info(f"  💰 (simulação) {row['salary'][:40]!r} → {parsed}")
+            else:
+                db.update("jobs", {"id": f"eq.{row['id']}"}, parsed.to_columns(rates))
+        if len(rows) < page:
+            break
+        last_id = rows[-1]["id"]
+    log.info(f"💰 {touched} salário(s) {'a estruturar' if dry_run else 'estruturados'}")
+    return touched
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Salários estruturados (intervalo, moeda, período, AOA)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("parse", help="analisa um texto de salário")
+    p.add_argument("text")
+    b = sub.add_parser("backfill", help="preenche as colunas salary_* nas vagas existentes")
+    b.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "parse":
+        parsed = parse_salary(args.text)
+        print(f"{parsed} → {parsed.to_columns({})}" if parsed else "—")
+        return 0 if parsed else 1
+
+    from dotenv import load_dotenv
+    from ango_job_scraper import SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+    backfill(SupabaseRestClient(url, key), dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
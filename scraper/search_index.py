@@ -0,0 +1,346 @@
+"""
+SearchIndex — Índice de Pesquisa Full-Text (SQLite FTS5 + BM25)
+===============================================================
+Vagas e notícias só eram filtradas no cliente ou com `eq.` do PostgREST:
+pesquisar "engenheiro civil Benguela" em título, empresa, descrição e
+requisitos não tinha índice nenhum.
+
+Os motores passam a manter um índice SQLite FTS5, atualizado de forma
+incremental no estágio `write` (cada vaga/notícia guardada entra logo):
+
+  docs      — metadados filtráveis (tipo, categoria, localização, data, fonte)
+  docs_fts  — texto pesquisável: title · company · body · requirements
+              tokenizer unicode61 sem diacríticos ("gestao" encontra "Gestão")
+
+A ordenação usa BM25 com pesos por coluna (título > requisitos > empresa > corpo).
+Os filtros de categoria/localização/data são aplicados na mesma query, por isso
+uma pesquisa sobre centenas de milhares de registos continua em milissegundos
+(ver bench_search.py).
+
+    python scraper/search_index.py query "técnico redes" --kind job --location luanda
+    python scraper/search_index.py rebuild        # reconstrói a partir do Supabase
+    python scraper/search_index.py merge a.db b.db  # junta índices parciais (shards)
+
+Com a varredura repartida (--shard i/N), cada shard indexa só os documentos
+que gravou num índice novo e vazio; o job `publish` do workflow junta-os
+(`merge`) no índice partilhado, o único que é preservado entre execuções.
+
+Ficheiro: $SCRAPER_INDEX_PATH (por omissão scraper/.index/search.db)
+"""
+
+import os
+import re
+import sqlite3
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+log = logging.getLogger("SearchIndex")
+
+INDEX_PATH = os.getenv(
+    "SCRAPER_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".index", "search.db"),
+)
+
+# Pesos BM25 por coluna de docs_fts: title, company, body, requirements
+BM25_WEIGHTS = (10.0, 3.0, 1.0, 4.0)
+BODY_CHARS = 4000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id           INTEGER PRIMARY KEY,
+    kind         TEXT NOT NULL,            -- 'job' | 'news'
+    url          TEXT NOT NULL UNIQUE,
+    title        TEXT NOT NULL,
+    company      TEXT,
+    categoria    TEXT,
+    location     TEXT,
+    location_key TEXT,                     -- minúsculas, sem acentos (filtro)
+    fonte        TEXT,
+    is_priority  INTEGER NOT NULL DEFAULT 0,
+    published_at TEXT NOT NULL             -- ISO 8601 UTC (ordenável como texto)
+);
+CREATE INDEX IF NOT EXISTS idx_docs_kind_date ON docs (kind, published_at);
+CREATE INDEX IF NOT EXISTS idx_docs_categoria ON docs (categoria);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, company, body, requirements,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_TAGS = re.compile(r"<[^>]+>")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fold(text: str) -> str:
+    """Minúsculas e sem acentos: 'Huíla' → 'huila'."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Texto livre → expressão FTS5 segura: cada palavra entre aspas (sem sintaxe
+    FTS injetada pelo utilizador) e com prefixo, todas obrigatórias (AND).
+    """
+    tokens = _TOKEN.findall(query or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+class SearchIndex:
+    def __init__(self, path: str = None):
+        self.path = path or INDEX_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Partilhado pelos writers do pipeline: uma ligação, serializada pelo lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    # ── Escrita ───────────────────────────────────────────────────────────
+    @staticmethod
+    def job_doc(payload: dict, fonte: str = None) -> tuple:
+        requirements = payload.get("requirements") or []
+        return (
+            "job", payload["source_url"], payload.get("title") or "", payload.get("company") or "",
+            payload.get("categoria"), payload.get("location") or "", fonte or payload.get("fonte"),
+            0, payload.get("posted_at") or datetime.now(timezone.utc).isoformat(),
+            (payload.get("description") or "")[:BODY_CHARS],
+            " ".join(requirements) if isinstance(requirements, list) else str(requirements),
+        )
+
+    @staticmethod
+    def news_doc(payload: dict) -> tuple:
+        body = (payload.get("resumo") or "") + " " + _TAGS.sub(" ", payload.get("corpo") or "")
+        return (
+            "news", payload["url_origem"], payload.get("titulo") or "", payload.get("fonte") or "",
+            payload.get("categoria"), "", payload.get("fonte"),
+            int(bool(payload.get("is_priority"))),
+            payload.get("published_at") or datetime.now(timezone.utc).isoformat(),
+            body[:BODY_CHARS], "",
+        )
+
+    def add_job(self, payload: dict, fonte: str = None) -> None:
+        self.add_many([self.job_doc(payload, fonte)])
+
+    def add_news(self, payload: dict) -> None:
+        self.add_many([self.news_doc(payload)])
+
+    def add_many(self, docs: Iterable[tuple]) -> int:
+        """Insere/atualiza (por URL) numa única transação. Devolve o nº de documentos."""
+        n = 0
+        with self._lock, self._conn:
+            for (kind, url, title, company, categoria, location, fonte,
+                 is_priority, published_at, body, requirements) in docs:
+                row = self._conn.execute("SELECT id FROM docs WHERE url = ?", (url,)).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row["id"],))
+                    self._conn.execute("DELETE FROM docs WHERE id = ?", (row["id"],))
+                cur = self._conn.execute(
+                    "INSERT INTO docs (kind, url, title, company, categoria, location, location_key, "
+                    "fonte, is_priority, published_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (kind, url, title, company, categoria, location, fold(location),
+                     fonte, is_priority, published_at),
+                )
+                self._conn.execute(
+                    "INSERT INTO docs_fts (rowid, title, company, body, requirements) VALUES (?, ?, ?, ?, ?)",
+                    (cur.lastrowid, title, company, body, requirements),
+                )
+                n += 1
+        return n
+
+    def merge(self, path: str) -> int:
+        """Copia (por URL, o mais recente ganha) todos os documentos de outro índice. Devolve o nº."""
+        other = SearchIndex(path)
+        try:
+            with other._lock:
+                rows = other._conn.execute(
+                    "SELECT d.kind, d.url, d.title, d.company, d.categoria, d.location, d.fonte, "
+                    "d.is_priority, d.published_at, f.body, f.requirements "
+                    "FROM docs d JOIN docs_fts f ON f.rowid = d.id ORDER BY d.id"
+                ).fetchall()
+        finally:
+            other.close()
+        return self.add_many(tuple(r) for r in rows)
+
+    def remove(self, url: str) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM docs WHERE url = ?", (url,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row["id"],))
+                self._conn.execute("DELETE FROM docs WHERE id = ?", (row["id"],))
+
+    # ── Pesquisa ──────────────────────────────────────────────────────────
+    def search(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        categoria: Optional[str] = None,
+        location: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        priority_only: bool = False,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[dict]:
+        """
+        Resultados por relevância BM25 (mais relevante primeiro). `location` é
+        comparado sem acentos nem maiúsculas, por prefixo de palavra ("lua" → Luanda);
+        `since`/`until` são datas ISO ('2026-10-01').
+        """
+        expr = match_expression(query)
+        if not expr:
+            return []
+        where, params = ["docs_fts MATCH ?"], [expr]
+        if kind:
+            where.append("d.kind = ?")
+            params.append(kind)
+        if categoria:
+            where.append("d.categoria = ?")
+            params.append(categoria)
+        if location:
+            key = fold(location)
+            where.append("(d.location_key LIKE ? OR d.location_key LIKE ?)")
+            params += [f"{key}%", f"% {key}%"]
+        if since:
+            where.append("d.published_at >= ?")
+            params.append(since)
+        if until:
+            where.append("d.published_at < ?")
+            params.append(until)
+        if priority_only:
+            where.append("d.is_priority = 1")
+
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        sql = (
+            f"SELECT d.kind, d.url, d.title, d.company, d.categoria, d.location, d.fonte, "
+            f"d.is_priority, d.published_at, bm25(docs_fts, {weights}) AS rank, "
+            f"snippet(docs_fts, 2, '[', ']', '…', 12) AS snippet "
+            f"FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT ? OFFSET ?"
+        )
+        params += [limit, offset]
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params)]
+
+    def count(self, kind: Optional[str] = None) -> int:
+        with self._lock:
+            if kind:
+                return self._conn.execute("SELECT COUNT(*) FROM docs WHERE kind = ?", (kind,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def optimize(self) -> None:
+        """Funde os segmentos do FTS5 (após cargas grandes)."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO docs_fts (docs_fts) VALUES ('optimize')")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ─────────────────────────────────────────────
+# LINHA DE COMANDOS
+# ─────────────────────────────────────────────
+def _rebuild(index: SearchIndex, page_size: int = 1000) -> int:
+    """Percorre jobs e news_articles no Supabase, página a página, e indexa tudo."""
+    import requests
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
+    if not url or not key:
+        raise SystemExit("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+
+    tables = {
+        "jobs": ("title,company,location,description,requirements,categoria,source_url,posted_at,fonte",
+                 "source_url", lambda r: SearchIndex.job_doc(r)),
+        "news_articles": ("titulo,resumo,corpo,categoria,fonte,url_origem,is_priority,published_at",
+                          "url_origem", SearchIndex.news_doc),
+    }
+    total = 0
+    for table, (columns, url_column, to_doc) in tables.items():
+        offset = 0
+        while True:
+            resp = requests.get(
+                f"{url.rstrip('/')}/rest/v1/{table}",
+                headers=headers,
+                params={"select": columns, url_column: "not.is.null", "order": "id",
+                        "limit": page_size, "offset": offset},
+                timeout=30,
+            )
+            resp.raise_for_status()
+            rows = resp.json()
+            total += index.add_many(to_doc(r) for r in rows)
+            log.info(f"  📥 {table}: {offset + len(rows)} linhas indexadas")
+            if len(rows) < page_size:
+                break
+            offset += page_size
+    index.optimize()
+    return total
+
+
+def main(argv=None) -> int:
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Índice de pesquisa de vagas e notícias")
+    parser.add_argument("--index", default=INDEX_PATH, help="ficheiro SQLite do índice")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    q = sub.add_parser("query", help="pesquisa no índice")
+    q.add_argument("text")
+    q.add_argument("--kind", choices=("job", "news"))
+    q.add_argument("--categoria")
+    q.add_argument("--location")
+    q.add_argument("--since", metavar="AAAA-MM-DD")
+    q.add_argument("--until", metavar="AAAA-MM-DD")
+    q.add_argument("--priority", action="store_true", help="só notícias prioritárias")
+    q.add_argument("--limit", type=int, default=20)
+    sub.add_parser("rebuild", help="reconstrói o índice a partir do Supabase")
+    m = sub.add_parser("merge", help="junta ao índice os documentos de índices parciais")
+    m.add_argument("parts", nargs="*", metavar="FICHEIRO")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.index)
+    if args.cmd == "rebuild":
+        log.info(f"✅ {_rebuild(index)} documentos indexados em {args.index}")
+        return 0
+    if args.cmd == "merge":
+        for part in args.parts:
+            if not os.path.isfile(part):
+                log.warning(f"  ⚠️  {part}: não existe (shard sem índice?)")
+                continue
+            log.info(f"  🔗 {part}: {index.merge(part)} documento(s)")
+        index.optimize()
+        log.info(f"✅ {index.count()} documentos em {args.index}")
+        return 0
+
+    t0 = time.perf_counter()
+    results = index.search(
+        args.text, kind=args.kind, categoria=args.categoria, location=args.location,
+        since=args.since, until=args.until, priority_only=args.priority, limit=args.limit,
+    )
+    elapsed = (time.perf_counter() - t0) * 1000
+    for r in results:
+        where = f" | {r['location']}" if r["location"] else ""
+        print(f"{r['rank']:7.2f}  [{r['kind']}] {r['title'][:70]} — {r['company'] or r['fonte']}{where}")
+        print(f"         {r['snippet']}")
+        print(f"         {r['url']}")
+    print(f"\n{len(results)} resultado(s) em {elapsed:.1f} ms ({index.count()} documentos)")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
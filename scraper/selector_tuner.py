@@ -0,0 +1,350 @@
+"""
+SelectorTuner — Afinação Persistente de Seletores de Cards
+==========================================================
+Antes, quando o `job_card_selector` de uma fonte deixava de devolver cards,
+`_auto_detect_selector` experimentava 11 seletores genéricos EM CADA EXECUÇÃO,
+ficava com o primeiro que tivesse 2+ resultados (muitas vezes `article` ou
+`.post`, que apanham menus e widgets) e esquecia a escolha.
+
+Agora cada seletor candidato é PONTUADO numa página de listagem:
+  • volume      — nº de elementos (satura aos 10: uma listagem real tem vários)
+  • links       — fração de elementos com link navegável (não #, javascript:, mailto:),
+                  com meio ponto para links que saem do domínio da fonte
+  • unicidade   — links distintos / links válidos (menus repetem sempre o mesmo)
+  • títulos     — fração com texto de título plausível (8–200 caracteres, 2+ palavras);
+                  meio ponto quando o title_selector da fonte não existe dentro do card
+
+O vencedor fica em state_store (selectors_jobs.json) com um grau de confiança,
+por isso as execuções seguintes usam-no diretamente sem voltar a detetar.
+A mesma pontuação é registada para o seletor CONFIGURADO (média móvel): quando
+cai para menos de metade da sua referência, o relatório de regressão avisa antes
+de a fonte secar por completo. Só se pontua quando ainda não há referência ou
+quando os cards extraídos parecem degradados (`cards_look_healthy`); uma
+listagem saudável conta como estando na referência, sem custo de pontuação.
+
+Afinação offline sobre o arquivo de respostas (ver response_archive.py):
+    python scraper/selector_tuner.py --archive scraper/.archive
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from state_store import load_json, save_json
+
+log = logging.getLogger("SelectorTuner")
+
+# Seletores genéricos de sempre (WordPress/WP Job Manager, LinkedIn, temas comuns)
+GENERIC_CANDIDATES = [
+    "li.job_listing", "article.job_listing", ".job-listing",
+    ".job-item", ".vacancy-item", "li.job", ".job_item",
+    ".base-card", "article.post", ".post", "article",
+]
+
+_CSS_IDENT = re.compile(r"^-?[A-Za-z_][\w-]*$")
+_MAX_SAMPLE = 100
+_ZERO = {"matches": 0, "links": 0.0, "unique": 0.0, "titles": 0.0, "score": 0.0}
+
+
+def _host(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _plausible_title(text: str) -> bool:
+    text = " ".join(text.split())
+    return 8 <= len(text) <= 200 and len(text.split()) >= 2 and sum(c.isalpha() for c in text) >= len(text) / 2
+
+
+def score_selector(soup, selector: str, cfg: dict) -> dict:
+    """Pontuação 0..1 de `selector` como seletor de cards nesta página (ver cabeçalho)."""
+    try:
+        nodes = soup.select(selector)
+    except Exception:  # seletor inválido para o soupsieve
+        return dict(_ZERO)
+    if len(nodes) < 2:
+        return dict(_ZERO, matches=len(nodes))
+
+    base_url = cfg.get("base_url", "")
+    base_host = _host(base_url)
+    link_selector = cfg.get("link_selector") or "a"
+    title_selector = cfg.get("title_selector")
+    sample = nodes[:_MAX_SAMPLE]
+    link_points, linked, urls, titled = 0.0, 0, set(), 0.0
+
+    for node in sample:
+        try:
+            link = node if node.name == "a" else (node.select_one(link_selector) or node.find("a"))
+        except Exception:
+            link = node.find("a")
+        href = (link.get("href") or "").strip() if link else ""
+        if href and not href.startswith(("#", "javascript:", "mailto:", "tel:")):
+            url = urljoin(base_url, href)
+            if url.startswith("http"):
+                link_points += 1.0 if _host(url).endswith(base_host) else 0.5
+                linked += 1
+                urls.add(url.split("#")[0])
+
+        title_tag = None
+        if title_selector:
+            try:
+                title_tag = node.select_one(title_selector)
+            except Exception:
+                title_tag = None
+        if title_tag is not None:
+            titled += _plausible_title(title_tag.get_text(" ", strip=True))
+        else:
+            # Sem o title_selector da fonte, o texto do link vale meio ponto ("Ver vaga"...)
+            titled += 0.5 * _plausible_title((link or node).get_text(" ", strip=True))
+
+    n = len(sample)
+    links = link_points / n
+    unique = len(urls) / linked if linked else 0.0
+    titles = titled / n
+    volume = min(1.0, len(nodes) / 10)
+    return {
+        "matches": len(nodes),
+        "links": round(links, 3),
+        "unique": round(unique, 3),
+        "titles": round(titles, 3),
+        "score": round(links * unique * titles * (0.5 + 0.5 * volume), 4),
+    }
+
+
+def cards_look_healthy(cards: int, records: List[Tuple[str, str]]) -> bool:
+    """
+    Verificação barata sobre o que a extração já produziu ((url, título) por card):
+    2+ registos, a maioria dos cards com link, links distintos e títulos plausíveis.
+    """
+    if len(records) < 2 or len(records) * 2 < cards:
+        return False
+    urls = {url for url, _ in records}
+    titled = sum(_plausible_title(title) for _, title in records)
+    return len(urls) * 2 >= len(records) and titled * 2 >= len(records)
+
+
+def candidate_selectors(soup, limit: int = 15) -> List[str]:
+    """
+    Genéricos + assinaturas `tag.classe` que se repetem (3+ vezes) nos antepassados
+    próximos dos links da página — é aí que vivem os cards de qualquer tema.
+    """
+    signatures = Counter()
+    for a in soup.find_all("a", href=True):
+        node = a
+        for _ in range(3):
+            node = node.parent
+            if node is None or node.name in ("body", "html", "[document]"):
+                break
+            for cls in (node.get("class") or [])[:1]:
+                if _CSS_IDENT.match(cls):
+                    signatures[f"{node.name}.{cls}"] += 1
+    repeated = [sig for sig, count in signatures.most_common() if count >= 3][:limit]
+    return GENERIC_CANDIDATES + [s for s in repeated if s not in GENERIC_CANDIDATES]
+
+
+def best_selector(soup, cfg: dict, exclude: Iterable[str] = ()) -> Optional[Tuple[str, dict]]:
+    """Melhor candidato numa única página: (seletor, pontuação) ou None."""
+    exclude = set(exclude)
+    ranked = [
+        (sel, score_selector(soup, sel, cfg))
+        for sel in candidate_selectors(soup) if sel not in exclude
+    ]
+    ranked = [r for r in ranked if r[1]["score"] > 0]
+    if not ranked:
+        return None
+    return max(ranked, key=lambda r: r[1]["score"])
+
+
+class SelectorTuner:
+    def __init__(
+        self,
+        namespace: str = "jobs",
+        min_confidence: float = 0.2,
+        decay_ratio: float = 0.5,
+        alpha: float = 0.3,
+    ):
+        self.state_file = f"selectors_{namespace}.json"
+        self.min_confidence = min_confidence
+        self.decay_ratio = decay_ratio
+        self.alpha = alpha
+        self.sources: Dict[str, dict] = load_json(self.state_file, {}) or {}
+        # observe()/remember() chegam das threads de discover em paralelo
+        self._lock = threading.Lock()
+
+    # ── Seletor de recurso (em cache) ─────────────────────────────────────
+    def cached(self, source: str) -> Optional[str]:
+        """Seletor afinado para a fonte, se a confiança chegar; senão None."""
+        e = self.sources.get(source, {}).get("tuned")
+        if e and e["confidence"] >= self.min_confidence:
+            return e["selector"]
+        return None
+
+    def invalidate(self, source: str) -> None:
+        """O seletor em cache deixou de encontrar cards: esquece-o."""
+        with self._lock:
+            tuned = self.sources.get(source, {}).pop("tuned", None)
+        if tuned:
+            log.warning(f"  🗑️  Seletor afinado '{tuned['selector']}' deixou de funcionar em {source}")
+
+    def remember(self, source: str, selector: str, score: float) -> None:
+        """Deteção feita ao vivo numa só página: guarda com meia confiança (uma amostra)."""
+        with self._lock:
+            entry = self.sources.setdefault(source, {})
+            current = entry.get("tuned")
+            if current and current["confidence"] >= score / 2:
+                return
+            entry["tuned"] = {
+                "selector": selector, "score": score, "confidence": round(score / 2, 3),
+                "pages": 1, "tuned_at": time.time(),
+            }
+            log.info(f"  💾 Seletor de recurso para {source}: '{selector}' (score {score:.2f})")
+
+    def tune(self, source: str, soups: List, cfg: dict) -> Optional[dict]:
+        """
+        Afinação sobre várias páginas arquivadas da fonte. O vencedor é o candidato com
+        melhor pontuação média; a confiança desconta a fração de páginas onde falhou e a
+        margem sobre o segundo melhor (dois candidatos empatados = escolha frágil).
+        """
+        if not soups:
+            return None
+        candidates = set()
+        for soup in soups:
+            candidates.update(candidate_selectors(soup))
+        configured = cfg.get("job_card_selector")
+        candidates.discard(configured)
+
+        totals: Dict[str, List[float]] = {sel: [] for sel in candidates}
+        baseline = []
+        for soup in soups:
+            for sel in candidates:
+                totals[sel].append(score_selector(soup, sel, cfg)["score"])
+            if configured:
+                baseline.append(score_selector(soup, configured, cfg)["score"])
+
+        ranked = sorted(
+            ((sum(s) / len(s), sum(1 for x in s if x > 0) / len(s), sel) for sel, s in totals.items()),
+            reverse=True,
+        )
+        with self._lock:
+            entry = self.sources.setdefault(source, {})
+            if configured and baseline:
+                self._set_baseline(entry, configured, sum(baseline) / len(baseline))
+            if not ranked or ranked[0][0] <= 0:
+                return None
+            mean, hit_rate, selector = ranked[0]
+            runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+            margin = 1.0 - runner_up / mean if runner_up < mean else 0.0
+            confidence = mean * hit_rate * (0.5 + 0.5 * margin) * min(1.0, math.log2(1 + len(soups)) / 3)
+            entry["tuned"] = {
+                "selector": selector, "score": round(mean, 4), "confidence": round(confidence, 3),
+                "pages": len(soups), "tuned_at": time.time(),
+            }
+            return dict(entry["tuned"])
+
+    # ── Saúde do seletor configurado ──────────────────────────────────────
+    def needs_score(self, source: str, selector: str) -> bool:
+        """Sem referência para este seletor (primeira execução, seletor novo): pontuar sempre."""
+        health = self.sources.get(source, {}).get("configured")
+        return not health or health["selector"] != selector or not health["baseline"]
+
+    def _set_baseline(self, entry: dict, selector: str, score: float) -> None:
+        health = entry.get("configured")
+        if not health or health["selector"] != selector:
+            # Seletor novo em JOBS_CONFIG: referência e histórico recomeçam
+            health = entry["configured"] = {"selector": selector, "baseline": 0.0, "ewma": score, "runs": 0}
+        health["baseline"] = max(health["baseline"], score)
+
+    def observe(self, source: str, selector: str, score: Optional[float]) -> None:
+        """Pontuação do seletor configurado numa execução real (None: saudável, não pontuado)."""
+        with self._lock:
+            entry = self.sources.setdefault(source, {})
+            if score is None:
+                health = entry.get("configured")
+                if not health or health["selector"] != selector:
+                    return
+                score = health["baseline"]
+            self._set_baseline(entry, selector, score)
+            health = entry["configured"]
+            if health["runs"]:
+                health["ewma"] = (1 - self.alpha) * health["ewma"] + self.alpha * score
+            else:
+                health["ewma"] = score
+            health["runs"] += 1
+            health["last"] = score
+
+    def regressions(self) -> List[str]:
+        """Fontes cujo seletor configurado caiu abaixo de `decay_ratio` × referência."""
+        lines = []
+        for source in sorted(self.sources):
+            health = self.sources[source].get("configured")
+            if not health or not health["baseline"]:
+                continue
+            if health["ewma"] < self.decay_ratio * health["baseline"]:
+                tuned = self.sources[source].get("tuned")
+                hint = f" | sugestão: '{tuned['selector']}' ({tuned['confidence']:.0%})" if tuned else ""
+                lines.append(
+                    f"{source}: '{health['selector']}' em {health['ewma']:.2f} "
+                    f"(referência {health['baseline']:.2f}){hint}"
+                )
+        return lines
+
+    def save(self) -> None:
+        with self._lock:
+            save_json(self.state_file, self.sources)
+
+
+# ─────────────────────────────────────────────
+# AFINAÇÃO OFFLINE (arquivo de respostas)
+# ─────────────────────────────────────────────
+def main(argv=None) -> int:
+    import argparse
+    from bs4 import BeautifulSoup
+    from response_archive import ResponseArchive
+    from ango_job_scraper import JOBS_CONFIG
+
+    parser = argparse.ArgumentParser(description="Afina os seletores de cards sobre listagens arquivadas")
+    parser.add_argument("--archive", metavar="DIR", required=True)
+    parser.add_argument("--source", help="só esta fonte (nome em JOBS_CONFIG)")
+    parser.add_argument("--since", metavar="AAAA-MM-DD")
+    parser.add_argument("--pages", type=int, default=20, help="máx. de listagens (mais recentes) por fonte")
+    args = parser.parse_args(argv)
+
+    archive = ResponseArchive(args.archive)
+    pages: Dict[str, List[Tuple[bytes, str]]] = {}
+    for rec in archive.iter_records(source=args.source, since=args.since):
+        cfg = JOBS_CONFIG.get(rec.source)
+        if cfg and rec.url == cfg["list_url"] and rec.status < 400:
+            pages.setdefault(rec.source, []).append((rec.content, rec.encoding))
+
+    tuner = SelectorTuner("jobs")
+    for source, raw_pages in sorted(pages.items()):
+        cfg = JOBS_CONFIG[source]
+        soups = [BeautifulSoup(c.decode(enc, errors="replace"), "html.parser") for c, enc in raw_pages[-args.pages:]]
+        tuned = tuner.tune(source, soups, cfg)
+        health = tuner.sources.get(source, {}).get("configured", {})
+        for soup in soups:
+            soup.decompose()
+        if tuned:
+            log.info(
+                f"🎯 {source}: configurado '{cfg['job_card_selector']}' {health.get('baseline', 0):.2f} | "
+                f"melhor alternativa '{tuned['selector']}' {tuned['score']:.2f} "
+                f"(confiança {tuned['confidence']:.0%}, {tuned['pages']} pág.)"
+            )
+        else:
+            log.info(f"🎯 {source}: nenhum candidato viável em {len(soups)} pág.")
+    tuner.save()
+
+    for line in tuner.regressions():
+        log.warning(f"📉 Seletor em degradação — {line}")
+    return 0 if pages else 1
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
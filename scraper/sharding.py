@@ -0,0 +1,61 @@
+"""
+Sharding — Uma Varredura Repartida por Vários Runners (--shard i/N)
+===================================================================
+Todas as fontes corriam num só processo, num só runner: o tempo de parede
+crescia com cada fonte nova. Com `--shard i/N` (i de 1 a N) cada processo fica
+só com a sua parte do trabalho, decidida por um hash estável (blake2b, igual
+em qualquer máquina e execução — não o hash() do Python, que muda por processo):
+
+  • fontes (JOBS_CONFIG / SITES_CONFIG): ordenadas pelo hash do nome e
+    distribuídas em rodízio — com poucas fontes, o hash sozinho deixava um
+    shard com 6 de 8. Cada portal é visitado por um único shard, que guarda
+    também o seu estado (agendador, cortesia); a partição só muda quando se
+    acrescenta ou retira uma fonte
+  • --update: pela URL de origem de cada linha re-verificada
+
+Um item que chegue a dois shards (a mesma URL em listagens de fontes
+diferentes, ou duas execuções durante uma mudança de partição) é resolvido na
+escrita: o upsert com `on_conflict` + ignore-duplicates (outbox.py) é
+idempotente. No workflow, uma matriz do Actions corre os N shards em paralelo.
+
+    python scraper/ango_job_scraper.py --shard 1/2
+"""
+
+import argparse
+import hashlib
+from typing import Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def stable_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Shard:
+    def __init__(self, index: int, count: int):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"shard inválido: {index}/{count} (esperado 1 ≤ i ≤ N)")
+        self.index = index
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, key: str) -> bool:
+        return self.count == 1 or stable_hash(key) % self.count == self.index - 1
+
+    def sources(self, config: Dict[str, T]) -> Dict[str, T]:
+        """Subconjunto do dicionário de adaptadores que cabe a este shard (ordem preservada)."""
+        ranked = sorted(config, key=lambda name: (stable_hash(name), name))
+        mine = set(ranked[self.index - 1::self.count])
+        return {name: cfg for name, cfg in config.items() if name in mine}
+
+
+def parse_shard(spec: str) -> Shard:
+    """Tipo do argparse para `--shard i/N`."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+        return Shard(index, count)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"--shard espera i/N (p.ex. 1/3): {e}")
@@ -0,0 +1,244 @@
+"""
+Sinks — Destino dos Registos Extraídos
+======================================
+O estágio `write` dos dois motores deixa de falar diretamente com o Supabase
+e passa a escrever num sink:
+
+  SupabaseSink  → INSERT linha a linha via REST; com uma Outbox (outbox.py)
+                  cada linha passa primeiro pela fila durável em .state e
+                  é reenviada com backoff até a base a aceitar
+  LocalSink     → ficheiros locais, à velocidade do disco:
+                    <dir>/<tabela>/<execução>.ndjson    (omissão)
+                    <dir>/<tabela>/<execução>.parquet   (--sink parquet, requer pyarrow)
+
+Os ficheiros locais são depois enviados em lotes grandes com bulk_load.py
+(upserts em array via REST, ou COPY direto no Postgres), o que desacopla a
+velocidade de scraping da latência da base de dados e permite execuções
+offline e benchmarks sem credenciais.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from outbox import CONFLICT_KEYS, Entry, Outbox
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # dependência opcional: só necessária para --sink parquet
+    pyarrow = None
+
+log = logging.getLogger("Sinks")
+
+SINK_KINDS = ("supabase", "ndjson", "parquet")
+
+
+class SupabaseSink:
+    """Escrita via REST (cliente SupabaseRestClient do motor).
+
+    Sem `outbox`: db.insert linha a linha, como sempre. Com `outbox`: a linha é
+    gravada na fila e enviada logo como upsert idempotente (`on_conflict` na URL
+    de origem); se a base falhar fica na fila e `write` devolve True na mesma —
+    o registo já não se perde. Depois de uma falha transitória deixa de tentar
+    o envio imediato até ao fim do backoff (as escritas só enfileiram) e a fila
+    é drenada em lotes de BATCH linhas.
+    """
+
+    BATCH = 200
+    # Espera máxima no close() pelo fim de um backoff curto antes do último envio
+    CLOSE_GRACE = 30.0
+    PREFER = "resolution=ignore-duplicates,missing=default,return=minimal"
+
+    def __init__(self, db, outbox: Optional[Outbox] = None):
+        self.db = db
+        self.outbox = outbox
+        self.session = requests.Session()
+        self.counts = {"sent": 0, "queued": 0, "rejected": 0}
+        self._hold_until = 0.0
+        self._next_retry = float("inf")
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+
+    def write(self, table: str, row: dict) -> bool:
+        if self.outbox is None:
+            return self.db.insert(table, row)
+        entry = (self.outbox.put(table, row), table, row)
+        now = time.time()
+        if now < self._hold_until:
+            self._count("queued")
+            return True
+        sent, rejected = self._deliver(table, [entry])
+        self._count("sent" if sent else "rejected" if rejected else "queued")
+        if sent and self._next_retry <= now:
+            self.drain()
+        return not rejected
+
+    def drain(self) -> int:
+        """Envia em lotes as linhas da fila cujo próximo envio já chegou."""
+        if self.outbox is None or not self._drain_lock.acquire(blocking=False):
+            return 0
+        sent = 0
+        try:
+            while True:
+                entries = self.outbox.due(self.BATCH)
+                if not entries:
+                    break
+                by_table: Dict[str, List[Entry]] = {}
+                for entry in entries:
+                    by_table.setdefault(entry[1], []).append(entry)
+                failed = False
+                for table, group in by_table.items():
+                    ok, rejected = self._deliver(table, group)
+                    sent += ok
+                    failed = failed or ok + rejected < len(group)
+                if failed:
+                    break
+            with self._lock:
+                next_due = self.outbox.next_due()
+                self._next_retry = next_due if next_due is not None else float("inf")
+        finally:
+            self._drain_lock.release()
+        if sent:
+            self._count("sent", sent)
+            log.info(f"📮 Fila: {sent} linha(s) pendente(s) enviada(s)")
+        return sent
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[key] += n
+
+    def _deliver(self, table: str, entries: List[Entry]) -> Tuple[int, int]:
+        """Um lote → (aceites, rejeitadas); 4xx divide ao meio para isolar a linha inválida."""
+        ids = [e[0] for e in entries]
+        status, text = self._post(table, [e[2] for e in entries])
+        if status is not None and status < 400:
+            self.outbox.done(ids)
+            return len(entries), 0
+        if status is None or status >= 500 or status in (408, 429):
+            next_at = self.outbox.retry(ids, f"{status or 'rede'}: {text[:300]}")
+            with self._lock:
+                first = self._hold_until <= time.time()
+                self._hold_until = max(self._hold_until, next_at)
+                self._next_retry = min(self._next_retry, next_at)
+            if first:
+                log.warning(f"📮 Base indisponível ({status or text[:120]}): escritas na fila, "
+                            f"novo envio em {next_at - time.time():.0f}s")
+            return 0, 0
+        if len(entries) == 1:
+            self.outbox.reject(ids, f"{status}: {text[:300]}")
+            log.error(f"❌ Erro na inserção: {text[:300]}")
+            log.error(f"Payload com erro: {json.dumps(entries[0][2], ensure_ascii=False)[:300]}")
+            return 0, 1
+        mid = len(entries) // 2
+        a = self._deliver(table, entries[:mid])
+        b = self._deliver(table, entries[mid:])
+        return a[0] + b[0], a[1] + b[1]
+
+    def _post(self, table: str, rows: List[dict]) -> Tuple[Optional[int], str]:
+        try:
+            resp = self.session.post(
+                f"{self.db.base_url}/rest/v1/{table}",
+                params={
+                    "on_conflict": CONFLICT_KEYS[table],
+                    "columns": ",".join(sorted({c for row in rows for c in row})),
+                },
+                headers={**self.db.headers, "Prefer": self.PREFER},
+                data=json.dumps(rows, ensure_ascii=False).encode("utf-8"),
+                timeout=(6, 30),
+            )
+        except requests.RequestException as e:
+            return None, str(e)
+        return resp.status_code, resp.text
+
+    def close(self) -> None:
+        if self.outbox is None:
+            return
+        wait = self._next_retry - time.time()
+        if 0 < wait <= self.CLOSE_GRACE:
+            time.sleep(wait)
+        self.drain()
+        left = self.outbox.counts()
+        log.info(f"📮 Escritas: {self.counts['sent']} enviada(s), {self.counts['queued']} enfileirada(s), "
+                 f"{self.counts['rejected']} rejeitada(s)")
+        if left["pending"] or left["dead"]:
+            log.warning(f"📮 Ficam na fila {left['pending']} linha(s) para a próxima execução "
+                        f"({left['dead']} rejeitada(s)) em {self.outbox.path}")
+        self.outbox.close()
+
+
+class LocalSink:
+    def __init__(self, root: str, fmt: str = "ndjson", run_id: Optional[str] = None):
+        if fmt == "parquet" and pyarrow is None:
+            log.warning("⚠️  pyarrow não instalado: a escrever NDJSON em vez de Parquet")
+            fmt = "ndjson"
+        self.root = root
+        self.fmt = fmt
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.counts: Dict[str, int] = {}
+        self._files = {}
+        self._buffers: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.root, table, f"{self.run_id}.{self.fmt}")
+
+    def write(self, table: str, row: dict) -> bool:
+        with self._lock:
+            if self.fmt == "parquet":
+                self._buffers.setdefault(table, []).append(row)
+            else:
+                f = self._files.get(table)
+                if f is None:
+                    os.makedirs(os.path.dirname(self.path(table)), exist_ok=True)
+                    f = self._files[table] = open(self.path(table), "a", encoding="utf-8")
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.counts[table] = self.counts.get(table, 0) + 1
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+            for table, rows in self._buffers.items():
+                os.makedirs(os.path.dirname(self.path(table)), exist_ok=True)
+                pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), self.path(table), compression="zstd")
+            self._buffers.clear()
+        for table, n in self.counts.items():
+            log.info(f"💾 {n} registo(s) de {table} em {self.path(table)}")
+
+
+def make_sink(kind: str, db=None, out_dir: Optional[str] = None, outbox: Optional[Outbox] = None):
+    """Sink pedido na linha de comandos (--sink / --out); com `outbox` drena já as sobras da execução anterior."""
+    if kind == "supabase":
+        sink = SupabaseSink(db, outbox)
+        sink.drain()
+        return sink
+    return LocalSink(out_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".out"), fmt=kind)
+
+
+def read_rows(path: str) -> List[dict]:
+    """Lê um ficheiro escrito por LocalSink (NDJSON ou Parquet)."""
+    if path.endswith(".parquet"):
+        if pyarrow is None:
+            raise RuntimeError(f"{path}: instale 'pyarrow' para ler Parquet")
+        return pyarrow.parquet.read_table(path).to_pylist()
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Última linha cortada (execução interrompida a meio da escrita)
+                log.warning(f"⚠️  Linha inválida ignorada em {path}")
+    return rows
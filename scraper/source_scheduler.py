@@ -0,0 +1,123 @@
+"""
+SourceScheduler — Agendamento Adaptativo por Fonte
+==================================================
+O cron dos workflows passa a ser apenas um "relógio" frequente; é este módulo
+que decide, em cada execução, QUE fontes visitar e POR QUE ORDEM.
+
+Para cada fonte guarda-se (em state_store) uma média móvel exponencial de:
+  • itens novos por visita (yield)
+  • taxa de erro (fetch falhado / zero cards)
+
+O intervalo seguinte é ajustado para que cada visita traga, em média,
+`target_new` itens novos:  intervalo ∝ target_new / (itens novos por segundo).
+Fontes com erros recuam (intervalo × (1 + 2·erro)). Fontes nunca vistas
+entram sempre primeiro (exploração).
+"""
+
+import time
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from state_store import load_json, save_json
+
+log = logging.getLogger("SourceScheduler")
+
+
+class SourceScheduler:
+    def __init__(
+        self,
+        namespace: str,
+        min_interval: int = 3600,
+        max_interval: int = 48 * 3600,
+        default_interval: int = 12 * 3600,
+        target_new: float = 5.0,
+        alpha: float = 0.3,
+    ):
+        self.state_file = f"schedule_{namespace}.json"
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.target_new = target_new
+        self.alpha = alpha
+        self.sources: Dict[str, dict] = load_json(self.state_file, {}) or {}
+
+    # ── Estado por fonte ──────────────────────────────────────────────────
+    def _entry(self, source: str) -> dict:
+        return self.sources.setdefault(source, {
+            "visits": 0,
+            "yield_ewma": 0.0,
+            "error_ewma": 0.0,
+            "last_run": 0.0,
+            "interval": self.default_interval,
+        })
+
+    def record(self, source: str, new_items: int, error: bool = False, now: Optional[float] = None) -> None:
+        """Regista o resultado de uma visita e recalcula o intervalo da fonte."""
+        now = now or time.time()
+        e = self._entry(source)
+        a = self.alpha
+        if e["visits"] == 0:
+            e["yield_ewma"] = float(new_items)
+            e["error_ewma"] = 1.0 if error else 0.0
+        else:
+            e["yield_ewma"] = (1 - a) * e["yield_ewma"] + a * new_items
+            e["error_ewma"] = (1 - a) * e["error_ewma"] + a * (1.0 if error else 0.0)
+
+        elapsed = now - e["last_run"] if e["last_run"] else e["interval"]
+        e["visits"] += 1
+        e["last_run"] = now
+        e["last_new"] = new_items
+        e["interval"] = self._next_interval(e, max(elapsed, self.min_interval))
+
+    def _next_interval(self, e: dict, elapsed: float) -> int:
+        previous = e["interval"]
+        if e["yield_ewma"] > 0:
+            rate = e["yield_ewma"] / elapsed          # itens novos por segundo
+            wanted = self.target_new / rate
+        else:
+            wanted = previous * 2                     # nada novo → recua
+        wanted *= 1 + 2 * e["error_ewma"]
+        # Passos suaves: no máximo ×2 ou ÷2 por visita
+        wanted = max(previous / 2, min(previous * 2, wanted))
+        return int(max(self.min_interval, min(self.max_interval, wanted)))
+
+    # ── Decisão ───────────────────────────────────────────────────────────
+    def score(self, source: str) -> float:
+        """Itens novos esperados por visita, penalizados pela taxa de erro."""
+        e = self.sources.get(source)
+        if not e or e["visits"] == 0:
+            return float("inf")
+        return e["yield_ewma"] * (1 - e["error_ewma"])
+
+    def is_due(self, source: str, now: Optional[float] = None) -> bool:
+        e = self.sources.get(source)
+        if not e or not e["last_run"]:
+            return True
+        now = now or time.time()
+        return now - e["last_run"] >= e["interval"]
+
+    def order(self, sources: Iterable[str]) -> List[str]:
+        """Ordena as fontes por yield esperado (maior primeiro). Ordem estável."""
+        return sorted(sources, key=self.score, reverse=True)
+
+    def plan(self, sources: Iterable[str], force: bool = False, now: Optional[float] = None) -> List[str]:
+        """Fontes a visitar nesta execução, já ordenadas por yield."""
+        sources = list(sources)
+        due = sources if force else [s for s in sources if self.is_due(s, now)]
+        skipped = [s for s in sources if s not in due]
+        if skipped:
+            log.info(f"⏸️  Fora de janela (agendador): {', '.join(skipped)}")
+        return self.order(due)
+
+    def save(self) -> None:
+        save_json(self.state_file, self.sources)
+
+    def summary(self) -> str:
+        rows = []
+        for name in self.order(self.sources):
+            e = self.sources[name]
+            rows.append(
+                f"{name}: {e['yield_ewma']:.1f} novos/visita | erro {e['error_ewma']:.0%} | "
+                f"próximo em {e['interval'] / 3600:.1f}h"
+            )
+        return "\n".join(rows)
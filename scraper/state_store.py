@@ -0,0 +1,52 @@
+"""
+Estado persistente dos scrapers entre execuções
+===============================================
+Pequenos ficheiros JSON (agendador, saúde dos hosts, seletores, ...) guardados
+num único diretório. Nos workflows do GitHub Actions esse diretório é
+restaurado/guardado com actions/cache, por isso tudo o que se escreve aqui
+tem de ser pequeno e tolerante a ficheiros em falta ou corrompidos.
+
+Diretório: $SCRAPER_STATE_DIR (por omissão scraper/.state)
+"""
+
+import os
+import json
+import logging
+from typing import Any
+
+log = logging.getLogger("ScraperState")
+
+STATE_DIR = os.getenv(
+    "SCRAPER_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state"),
+)
+
+
+def state_path(name: str) -> str:
+    """Caminho absoluto de um ficheiro de estado (cria o diretório se preciso)."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
+
+
+def load_json(name: str, default: Any = None) -> Any:
+    """Lê um ficheiro de estado; devolve `default` se não existir ou estiver inválido."""
+    try:
+        with open(state_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        log.warning(f"⚠️  Estado '{name}' ilegível ({e}). A recomeçar do zero.")
+        return default
+
+
+def save_json(name: str, data: Any) -> None:
+    """Escrita atómica (tmp + rename) para não deixar estado meio escrito."""
+    path = state_path(name)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning(f"⚠️  Não foi possível guardar o estado '{name}': {e}")
@@ -0,0 +1,324 @@
+"""
+StoryClusters — A Mesma Notícia em Várias Fontes → Uma História
+===============================================================
+ANGOP, Jornal de Angola, TPA, Expansão, Novo Jornal... cobrem o mesmo
+acontecimento e o feed mostrava-o dez vezes. Cada artigo novo recebe uma
+impressão MinHash (NUM_PERM permutações) do título + lead, em unigramas e
+bigramas sem acentos nem palavras vazias. O índice LSH (BANDS bandas de ROWS
+linhas) devolve em milissegundos as histórias candidatas da janela de
+WINDOW_HOURS; a mais parecida acima de JOIN_THRESHOLD (Jaccard estimado)
+recebe o artigo, senão nasce uma história nova.
+
+Acontecimentos diferentes com o mesmo molde de título ("… recebe embaixador
+de Portugal" / "… da China", "Chuvas causam 5 mortos no Huambo" / "3 mortos
+em Benguela") partilham quase todas as palavras: nenhum limiar os separa das
+paráfrases. Por isso um candidato é vetado quando os títulos se contradizem —
+números sem nenhum em comum, ou nomes próprios exclusivos de cada lado — e
+os números curtos ("5", "3") contam como palavras na assinatura. O limiar
+foi calibrado na amostra anotada de test_story_clusters.py.
+
+  story_id   = "st_" + url_key do primeiro artigo da história
+  story_rank = nº de fontes distintas + PRIORITY_BONUS se algum for prioritário
+
+O índice (assinaturas em hex, janela de 72 h) vive em .state/story_index.json.
+Quando uma história cresce, `pending_ranks()` dá os story_rank a atualizar nas
+linhas já gravadas (um PATCH por história).
+
+Com a varredura repartida (--shard i/N) há um só índice partilhado: o job
+`publish` restaura-o, junta as notícias novas de todos os shards (`backfill`,
+que só grava as linhas cuja história ou rank mudou) e guarda-o; os shards e a
+via rápida restauram-no só para leitura no início de cada execução.
+
+    python scraper/story_clusters.py backfill --days 3    # agrupa as notícias recentes
+"""
+
+import os
+import re
+import sys
+import time
+import zlib
+import random
+import logging
+import argparse
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+from state_store import load_json, save_json
+
+log = logging.getLogger("StoryClusters")
+
+STATE_FILE = "story_index.json"
+NUM_PERM = 64
+BANDS, ROWS = 32, 2          # candidato com ≥95% de probabilidade a partir de Jaccard 0.3
+JOIN_THRESHOLD = 0.3         # Jaccard estimado mínimo (paráfrases com lead entre fontes: 0.35-0.55)
+WINDOW_HOURS = 72
+LEAD_WORDS = 80              # palavras do corpo/resumo usadas além do título
+PRIORITY_BONUS = 2
+
+_PRIME = (1 << 31) - 1
+_rng = random.Random(20261019)   # semente fixa: assinaturas estáveis entre execuções
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+STOPWORDS = set("""
+a ao aos as com como da das de do dos e ela ele em entre era essa esse esta este foi for
+ha isso ja la lhe mais mas na nas nao no nos num numa o os ou para pela pelas pelo pelos
+por quando que se sem ser seu sua sao sobre tambem tem ter um uma uns umas foram sera
+estao esta pode hoje ontem apos ate segundo disse afirmou angola angolano angolana luanda
+""".split())
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_RAW_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _tokens(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(_fold(text)) if w not in STOPWORDS and (len(w) > 2 or w.isdigit())]
+
+
+def shingles(title: str, lead: str = "") -> Set[str]:
+    """Unigramas + bigramas do título e das primeiras LEAD_WORDS palavras do lead."""
+    words = _tokens(title) + _tokens(_TAG_RE.sub(" ", lead))[:LEAD_WORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def key_tokens(title: str) -> Tuple[frozenset, frozenset]:
+    """
+    (números, nomes próprios) do título. Nome próprio = palavra com maiúscula
+    fora do início; num título Em Maiúsculas Iniciais não há como os distinguir.
+    """
+    raw = _RAW_WORD_RE.findall(title or "")
+    nums = frozenset(w for w in raw if w.isdigit())
+    words = [w for w in raw if not w.isdigit()]
+    capitalized = [w for w in words[1:] if w[0].isupper()]
+    if len(capitalized) * 2 > len(words):
+        return nums, frozenset()
+    return nums, frozenset(f for f in (_fold(w) for w in capitalized) if f not in STOPWORDS)
+
+
+def contradicts(a: Tuple[frozenset, frozenset], b: Tuple[frozenset, frozenset]) -> bool:
+    """Títulos de acontecimentos diferentes: números disjuntos ou nomes próprios exclusivos dos dois lados."""
+    (nums_a, names_a), (nums_b, names_b) = a, b
+    if nums_a and nums_b and not nums_a & nums_b:
+        return True
+    return bool(names_a - names_b) and bool(names_b - names_a)
+
+
+def minhash(tokens: Set[str]) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(t.encode("utf-8")) for t in tokens] or [0]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a, sig_b) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _bands(sig) -> List[Tuple[int, ...]]:
+    return [(i,) + tuple(sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+
+def _pack(sig) -> str:
+    return "".join(f"{v:08x}" for v in sig)
+
+
+def _unpack(text: str) -> Tuple[int, ...]:
+    return tuple(int(text[i:i + 8], 16) for i in range(0, len(text), 8))
+
+
+class StoryIndex:
+    """Artigos recentes (assinatura + história) com buckets LSH em memória."""
+
+    def __init__(self, persist: bool = True, now: Optional[float] = None):
+        self.persist = persist
+        self._lock = threading.Lock()
+        self.articles: Dict[str, dict] = {}     # url_key → {sig, keys, story, site, priority, ts}
+        self.stories: Dict[str, dict] = {}      # story_id → {sites, priority, rank, ts}
+        self._buckets: Dict[tuple, Set[str]] = {}
+        self._dirty_ranks: Set[str] = set()
+        state = load_json(STATE_FILE, {}) if persist else {}
+        cutoff = (now or time.time()) - WINDOW_HOURS * 3600
+        for key, a in (state.get("articles") or {}).items():
+            if a.get("ts", 0) >= cutoff:
+                keys = a.get("keys") or [[], []]
+                self._add(key, _unpack(a["sig"]), a["story"], a["site"], a["priority"], a["ts"],
+                          (frozenset(keys[0]), frozenset(keys[1])))
+
+    def _add(self, key: str, sig, story_id: str, site: str, priority: bool, ts: float,
+             keys: Tuple[frozenset, frozenset] = (frozenset(), frozenset())) -> None:
+        self.articles[key] = {"sig": sig, "keys": keys, "story": story_id, "site": site,
+                              "priority": priority, "ts": ts}
+        for band in _bands(sig):
+            self._buckets.setdefault(band, set()).add(key)
+        story = self.stories.setdefault(story_id, {"sites": set(), "priority": False, "ts": ts})
+        story["sites"].add(site)
+        story["priority"] = story["priority"] or priority
+        story["ts"] = max(story["ts"], ts)
+
+    @staticmethod
+    def rank_of(story: dict) -> int:
+        return len(story["sites"]) + (PRIORITY_BONUS if story["priority"] else 0)
+
+    def match(self, sig, keys: Tuple[frozenset, frozenset] = (frozenset(), frozenset())) -> Tuple[Optional[str], float]:
+        """(story_id, Jaccard estimado) da história mais parecida, ou (None, 0)."""
+        best, best_sim = None, 0.0
+        seen = set()
+        for band in _bands(sig):
+            for key in self._buckets.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if contradicts(keys, self.articles[key]["keys"]):
+                    continue
+                sim = similarity(sig, self.articles[key]["sig"])
+                if sim > best_sim:
+                    best, best_sim = self.articles[key]["story"], sim
+        return (best, best_sim) if best_sim >= JOIN_THRESHOLD else (None, best_sim)
+
+    def assign(self, key: str, site: str, title: str, lead: str = "",
+               priority: bool = False, ts: Optional[float] = None) -> Tuple[str, int]:
+        """Junta o artigo à história mais parecida (ou abre uma) → (story_id, story_rank)."""
+        sig = minhash(shingles(title, lead))
+        keys = key_tokens(title)
+        with self._lock:
+            if key in self.articles:
+                story_id = self.articles[key]["story"]
+                return story_id, self.rank_of(self.stories[story_id])
+            story_id, _ = self.match(sig, keys)
+            grew = story_id is not None
+            story_id = story_id or f"st_{key}"
+            before = self.rank_of(self.stories[story_id]) if grew else 0
+            self._add(key, sig, story_id, site, priority, ts or time.time(), keys)
+            rank = self.rank_of(self.stories[story_id])
+            if grew and rank != before:
+                self._dirty_ranks.add(story_id)
+            return story_id, rank
+
+    def discard(self, key: str) -> None:
+        """Retira um artigo cuja escrita falhou (a história fica como estava)."""
+        with self._lock:
+            a = self.articles.pop(key, None)
+            if not a:
+                return
+            for band in _bands(a["sig"]):
+                self._buckets.get(band, set()).discard(key)
+            members = [x for x in self.articles.values() if x["story"] == a["story"]]
+            if not members:
+                self.stories.pop(a["story"], None)
+                return
+            story = self.stories[a["story"]]
+            story["sites"] = {x["site"] for x in members}
+            story["priority"] = any(x["priority"] for x in members)
+
+    def pending_ranks(self) -> Dict[str, int]:
+        """{story_id: story_rank} das histórias que cresceram desde o último flush."""
+        with self._lock:
+            dirty, self._dirty_ranks = self._dirty_ranks, set()
+            return {s: self.rank_of(self.stories[s]) for s in dirty if s in self.stories}
+
+    def flush_ranks(self, db) -> int:
+        """Atualiza story_rank das linhas já gravadas das histórias que cresceram."""
+        ranks = self.pending_ranks()
+        if db is None:
+            return 0
+        for story_id, rank in ranks.items():
+            db.update("news_articles", {"story_id": f"eq.{story_id}"}, {"story_rank": rank})
+        if ranks:
+            log.info(f"🧩 {len(ranks)} história(s) com novas fontes (story_rank atualizado)")
+        return len(ranks)
+
+    def save(self) -> None:
+        if not self.persist:
+            return
+        cutoff = time.time() - WINDOW_HOURS * 3600
+        with self._lock:
+            articles = {
+                k: {"sig": _pack(a["sig"]), "keys": [sorted(a["keys"][0]), sorted(a["keys"][1])],
+                    "story": a["story"], "site": a["site"],
+                    "priority": a["priority"], "ts": round(a["ts"])}
+                for k, a in self.articles.items() if a["ts"] >= cutoff
+            }
+        save_json(STATE_FILE, {"articles": articles})
+
+
+# ─────────────────────────────────────────────
+# BACKFILL DAS NOTÍCIAS RECENTES
+# ─────────────────────────────────────────────
+def _epoch(iso: Optional[str]) -> float:
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat((iso or "").replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return time.time()
+
+
+def backfill(db, days: int = 3, page: int = 1000, dry_run: bool = False) -> int:
+    """
+    Agrupa as notícias dos últimos `days` dias por ordem cronológica, a partir
+    do índice persistido, e grava story_id/story_rank só nas linhas em que
+    mudaram (um PATCH por par história/rank). Os artigos já no índice mantêm
+    a história; só os novos (p.ex. gravados por shards diferentes) são agrupados.
+    """
+    from datetime import datetime, timedelta, timezone
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    index = StoryIndex(persist=not dry_run)
+    rows, offset = [], 0
+    while True:
+        batch = db.select("news_articles", {
+            "published_at": f"gte.{since}", "order": "published_at.asc,id.asc",
+            "limit": str(page), "offset": str(offset),
+        }, columns="id,titulo,resumo,fonte,url_key,is_priority,published_at,story_id,story_rank")
+        rows.extend(batch)
+        offset += len(batch)
+        if len(batch) < page:
+            break
+    for row in rows:
+        row["story"] = index.assign(row.get("url_key") or str(row["id"]), row.get("fonte") or "",
+                                    row.get("titulo") or "", row.get("resumo") or "",
+                                    bool(row.get("is_priority")), _epoch(row.get("published_at")))[0]
+    index.pending_ranks()
+    stories: Dict[str, int] = {}
+    changed: Dict[Tuple[str, int], List[str]] = {}
+    for row in rows:
+        stories[row["story"]] = stories.get(row["story"], 0) + 1
+        rank = StoryIndex.rank_of(index.stories[row["story"]])
+        if (row.get("story_id"), row.get("story_rank")) != (row["story"], rank):
+            changed.setdefault((row["story"], rank), []).append(str(row["id"]))
+    multi = sum(1 for n in stories.values() if n > 1)
+    log.info(f"🧩 {len(rows)} notícia(s) → {len(stories)} história(s) ({multi} com várias fontes); "
+             f"{sum(len(ids) for ids in changed.values())} linha(s) em {len(changed)} história(s) a atualizar")
+    if not dry_run:
+        for (story_id, rank), ids in changed.items():
+            for i in range(0, len(ids), 200):
+                db.update("news_articles", {"id": f"in.({','.join(ids[i:i + 200])})"},
+                          {"story_id": story_id, "story_rank": rank})
+        index.save()
+    return len(changed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Agrupa notícias de várias fontes em histórias")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--days", type=int, default=WINDOW_HOURS // 24)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from ango_job_scraper import SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+    backfill(SupabaseRestClient(url, key), days=args.days, dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
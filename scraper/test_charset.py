@@ -0,0 +1,37 @@
+from charset import CharsetResolver, detect, meta_charset
+
+
+def test_header_then_bom_then_meta_then_host_memo():
+    r = CharsetResolver()
+    page = "<p>Informação</p>".encode("cp1252")
+    # Content-Type explícito ganha; ISO-8859-1 declarado lê-se como windows-1252
+    assert r.explain("https://a.ao/1", b"<meta charset='utf-8'>", "text/html; charset=ISO-8859-1") == ("windows-1252", "header")
+    assert r.explain("https://a.ao/2", b"\xef\xbb\xbf<p>x</p>", "text/html") == ("utf-8", "bom")
+    assert meta_charset(b'<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">') == "windows-1252"
+    assert meta_charset(b"<meta charset=utf-16>") == "utf-8"
+    # Sem declarações: deteção uma vez, depois o memo do host
+    assert r.explain("https://a.ao/3", page * 50, "text/html") == ("windows-1252", "detect")
+    assert r.explain("https://a.ao/4", b"<p>ok</p>", "text/html") == ("windows-1252", "host")
+    assert r.explain("https://b.ao/4", b"<p>ok</p>", "text/html") == ("utf-8", "detect")
+
+
+def test_detection_is_bounded_and_prefers_latin_code_pages():
+    text = "<p>Não há informação disponível sobre a ação “Técnico”</p>" * 40
+    assert detect(text.encode("utf-8")) == "utf-8"
+    assert detect(text.encode("cp1252")) == "windows-1252"
+    # Um carácter multibyte cortado no limite do prefixo não invalida o UTF-8
+    assert detect(("a" * 16383 + "ç").encode("utf-8")) == "utf-8"
+
+
+def test_ascii_head_is_not_remembered_as_utf8_for_the_host():
+    r = CharsetResolver()
+    head = b"<html><head><script>var x = 1;</script>" + b"<!-- " + b"a" * 20000 + b" -->"
+    late = head + "<p>Informação</p>".encode("cp1252")
+    # A deteção começa no primeiro byte não-ASCII, não nos primeiros 16 KB
+    assert r.explain("https://c.ao/1", late, "text/html") == ("windows-1252", "detect")
+    # Página só ASCII: UTF-8, mas sem memo
+    assert r.explain("https://d.ao/1", head, "text/html") == ("utf-8", "detect")
+    assert r.explain("https://d.ao/2", late, "text/html") == ("windows-1252", "detect")
+    # Memo UTF-8 que falha numa página nova → nova deteção
+    r.explain("https://e.ao/1", "<p>ação</p>".encode("utf-8"), "text/html")
+    assert r.explain("https://e.ao/2", late, "text/html") == ("windows-1252", "detect")
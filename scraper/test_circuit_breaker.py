@@ -0,0 +1,36 @@
+import state_store
+from circuit_breaker import HostCircuitBreaker, OPEN, CLOSED
+
+URL = "https://tpaonline.ao/category/noticias/"
+
+
+def test_opens_after_threshold_and_probes_after_cooldown(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    cb = HostCircuitBreaker(failure_threshold=3, cooldown=600)
+
+    for _ in range(3):
+        assert cb.allow(URL, now=1000.0)
+        cb.record_failure(URL, now=1000.0)
+    assert cb.hosts["tpaonline.ao"]["state"] == OPEN
+    assert not cb.allow(URL, now=1100.0)
+
+    # Cool-down expirado: uma única prova passa
+    assert cb.allow(URL, now=1700.0)
+    assert not cb.allow(URL, now=1700.0)
+    cb.record_failure(URL, now=1700.0)
+    assert cb.hosts["tpaonline.ao"]["cooldown"] == 1200
+
+    assert cb.allow(URL, now=3000.0)
+    cb.record_success(URL)
+    assert cb.hosts["tpaonline.ao"]["state"] == CLOSED
+
+
+def test_state_survives_between_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    cb = HostCircuitBreaker(failure_threshold=1, cooldown=3600)
+    cb.record_failure(URL)
+    cb.save()
+
+    next_run = HostCircuitBreaker(failure_threshold=1, cooldown=3600)
+    assert not next_run.allow(URL)
+    assert next_run.allow("https://www.angop.ao/angola/pt_pt/noticias/")
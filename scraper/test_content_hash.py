@@ -0,0 +1,49 @@
+from content_hash import PatchQueue, changed_columns, content_hash, diff_patch
+
+JOB = {"title": "Contabilista", "description": "Empresa  procura\ncontabilista.",
+       "requirements": ["Licenciatura", "3 anos"], "imagem_url": "https://x.ao/logo.png"}
+
+
+def test_hash_parts_tell_which_columns_changed():
+    old = content_hash("jobs", JOB)
+    assert len(old.split(".")) == 4
+    # Espaços diferentes não contam como alteração
+    assert changed_columns("jobs", old, {**JOB, "description": "Empresa procura contabilista."}) == []
+    assert changed_columns("jobs", old, {**JOB, "requirements": ["Licenciatura", "5 anos"]}) == ["requirements"]
+    # Sem hash anterior: todas as colunas contam como alteradas, mas só o hash é gravado
+    assert changed_columns("jobs", None, JOB) == ["title", "description", "requirements", "imagem_url"]
+    assert diff_patch("jobs", None, JOB) == {"content_hash": content_hash("jobs", JOB)}
+
+    news = {"titulo": "BNA mantém taxa", "corpo": "<p>v1</p>", "resumo": "v1", "imagem_url": None}
+    fixed = {**news, "corpo": "<p>v2</p>", "resumo": "v2"}
+    patch = diff_patch("news_articles", content_hash("news_articles", news), fixed)
+    assert patch == {"corpo": "<p>v2</p>", "resumo": "v2", "content_hash": content_hash("news_articles", fixed)}
+
+
+class _DB:
+    base_url = "http://127.0.0.1:9"   # sem RPC → PATCH linha a linha
+    headers = {}
+
+    def __init__(self):
+        self.calls = []
+
+    def update(self, table, filters, data):
+        self.calls.append((table, filters, data))
+        return True
+
+
+def test_queue_sends_only_changed_rows_and_columns():
+    db = _DB()
+    queue = PatchQueue(db, "jobs", batch_size=2)
+    old = content_hash("jobs", JOB)
+    assert queue.compare("a", old, JOB) is None
+    new_logo = {**JOB, "imagem_url": "https://x.ao/novo.png"}
+    queue.compare("b", old, new_logo)
+    assert queue.flush() == 1
+    assert db.calls == [("jobs", {"id": "eq.b"}, {"imagem_url": "https://x.ao/novo.png",
+                                                  "content_hash": content_hash("jobs", new_logo)})]
+    assert queue.unchanged == 1
+
+    queue.compare("c", None, new_logo)
+    assert queue.flush() == 1 and queue.seeded == 1
+    assert db.calls[-1] == ("jobs", {"id": "eq.c"}, {"content_hash": content_hash("jobs", new_logo)})
@@ -0,0 +1,78 @@
+import state_store
+from expiry_sweeper import ALIVE, EXPIRED, UNKNOWN, ExpirySweeper, classify, listing_paths
+
+LISTINGS = listing_paths({"AngoVagas": {"list_url": "https://www.angovagas.net/vagas/", "base_url": "https://angovagas.net"}})
+
+
+def test_gone_and_redirected_to_listing_are_expired():
+    url = "https://angovagas.net/vagas/123-contabilista/"
+    assert classify(url, 404, url, LISTINGS)[0] == EXPIRED
+    assert classify(url, 410, url, LISTINGS)[0] == EXPIRED
+    assert classify(url, 200, "https://www.angovagas.net/vagas/", LISTINGS)[0] == EXPIRED
+    assert classify(url, 200, "https://angovagas.net/", LISTINGS)[0] == EXPIRED
+    assert classify(url, 200, url, LISTINGS, "<h2>Esta vaga já expirou</h2>".encode())[0] == EXPIRED
+
+
+def test_alive_and_inconclusive_responses_are_not_expired():
+    url = "https://angovagas.net/vagas/123-contabilista"
+    assert classify(url, 200, url, LISTINGS)[0] == ALIVE
+    assert classify(url, 304, url, LISTINGS)[0] == ALIVE
+    # http → https e barra final não são expiração
+    assert classify("http://angovagas.net/vagas/123-contabilista", 200, url + "/", LISTINGS)[0] == ALIVE
+    assert classify(url, 503, url, LISTINGS)[0] == UNKNOWN
+    assert classify(url, 429, url, LISTINGS)[0] == UNKNOWN
+
+
+class FakeResponse:
+    def __init__(self, status, url, body=b""):
+        self.status_code, self.url, self.body, self.headers = status, url, body, {}
+
+    def iter_content(self, size):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+class FakeBreaker:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def request(self, session, method, url, **kwargs):
+        self.calls.append((method, kwargs.get("headers", {}).get("Range")))
+        status, body = self.pages[url]
+        return FakeResponse(status, url, body if method == "GET" else b"")
+
+    def save(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, table, filters, data):
+        self.updates.append((filters["id"], sorted(data)))
+        return True
+
+
+def test_head_200_peeks_the_body_and_unknown_rows_get_an_attempt_stamp(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    soft, live, blocked = (f"https://angovagas.net/vagas/{i}" for i in ("1-soft", "2-live", "3-waf"))
+    breaker = FakeBreaker({
+        soft: (200, "<h1>Contabilista</h1><p>Candidaturas encerradas</p>".encode()),
+        live: (200, b"<h1>Engenheiro</h1>"),
+        blocked: (503, b""),
+    })
+    db = FakeDB()
+    sweeper = ExpirySweeper(db, LISTINGS, workers=2, breaker=breaker)
+    assert sweeper.check(soft) == (EXPIRED, "aviso de vaga encerrada")
+    assert ("GET", "bytes=0-65535") in breaker.calls
+    rows = [{"id": i, "source_url": u} for i, u in enumerate((soft, live, blocked), start=1)]
+    sweeper.sweep(rows, dry_run=False)
+    assert db.updates == [
+        ("in.(1)", ["expired_at", "last_checked_at"]),
+        ("in.(2)", ["last_checked_at"]),
+        ("in.(3)", ["check_attempted_at"]),
+    ]
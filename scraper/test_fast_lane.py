@@ -0,0 +1,43 @@
+import state_store
+from news_scraper import AngoNewsScraper
+from story_clusters import StoryIndex
+
+
+class _Resp:
+    def __init__(self, content, etag=None):
+        self.content = content
+        self.headers = {"ETag": etag} if etag else {}
+
+
+def test_listing_validators_and_unchanged_body(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    scraper = AngoNewsScraper(None, stories=StoryIndex(persist=False))
+    url = "https://www.angop.ao/angola/pt_pt/noticias/"
+    assert scraper._validator_headers(url) == {}
+
+    assert scraper._listing_changed(url, _Resp(b"<ul>1</ul>", etag='"v1"'))
+    assert scraper._validator_headers(url) == {"If-None-Match": '"v1"'}
+    # Host sem 304: o mesmo corpo conta como "sem alterações"
+    assert not scraper._listing_changed(url, _Resp(b"<ul>1</ul>"))
+    assert scraper._listing_changed(url, _Resp(b"<ul>2</ul>"))
+    assert scraper.classify("Última Hora: BNA ajusta câmbio", "Angola")[1]
+    assert not scraper.classify("Festival de música em Benguela", "Angola")[1]
+
+
+def test_validators_are_kept_only_when_every_urgent_item_was_written(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    scraper = AngoNewsScraper(None, stories=StoryIndex(persist=False))
+    angop, tpa = "https://www.angop.ao/noticias/", "https://www.tpa.ao/noticias/"
+    scraper._listing_changed(angop, _Resp(b"<ul>1</ul>"))
+    previous = dict(scraper.listing_validators)
+    scraper._listing_changed(angop, _Resp(b"<ul>2</ul>"))
+    scraper._listing_changed(tpa, _Resp(b"<ul>1</ul>"))
+    urgent = [
+        {"cfg": {"list_url": angop}, "done": True},
+        {"cfg": {"list_url": angop}},                  # fetch ou escrita falhada
+        {"cfg": {"list_url": tpa}, "done": True},
+    ]
+    scraper._revert_validators(previous, urgent)
+    assert scraper.listing_validators[angop] == previous[angop]
+    assert scraper._listing_changed(angop, _Resp(b"<ul>2</ul>"))     # volta a ser processada
+    assert not scraper._listing_changed(tpa, _Resp(b"<ul>1</ul>"))
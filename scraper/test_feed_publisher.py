@@ -0,0 +1,83 @@
+import json
+import os
+
+import feed_publisher
+from feed_publisher import FeedPublisher
+
+
+def _news(i, categoria, priority=False):
+    return {"id": str(i), "titulo": f"Notícia {i}", "categoria": categoria, "is_priority": priority,
+            "published_at": f"2026-10-{10 + i % 10:02d}T08:00:00+00:00", "url_origem": f"https://angop.ao/n/{i}"}
+
+
+def test_paginated_shards_with_hashed_names(tmp_path):
+    rows = [_news(i, "Economia", priority=i < 2) for i in range(5)] + [_news(9, "Desporto")]
+    manifest = FeedPublisher(str(tmp_path), page_size=2).publish({"news": rows})
+
+    assert set(manifest["news"]) == {"todas", "economia", "desporto", "prioritarias"}
+    pages = manifest["news"]["todas"]["pages"]
+    assert len(pages) == 3 and all(p.startswith("news/todas/p") for p in pages)
+    first = json.loads((tmp_path / pages[0]).read_text(encoding="utf-8"))
+    assert first["next"] == pages[1] and first["total"] == 6
+    assert os.path.exists(tmp_path / (pages[0] + ".gz"))
+
+
+def test_only_changed_categories_are_rewritten(tmp_path):
+    rows = [_news(i, "Economia") for i in range(3)] + [_news(7, "Desporto")]
+    FeedPublisher(str(tmp_path)).publish({"news": rows})
+
+    unchanged = FeedPublisher(str(tmp_path))
+    unchanged.publish({"news": rows})
+    assert unchanged.written == []
+
+    changed = FeedPublisher(str(tmp_path))
+    changed.publish({"news": rows + [_news(8, "Desporto")]})
+    assert sorted(p.split("/")[1] for p in changed.written) == ["desporto", "todas"]
+
+
+def test_news_collapse_to_one_card_per_story(tmp_path):
+    rows = [
+        {**_news(1, "Economia"), "fonte": "Expansão", "story_id": "st_a"},
+        {**_news(2, "Economia"), "fonte": "ANGOP", "story_id": "st_a", "is_priority": True},
+        {**_news(3, "Economia"), "fonte": "TPA", "story_id": "st_b"},
+        _news(4, "Desporto"),
+    ]
+    manifest = FeedPublisher(str(tmp_path)).publish({"news": rows})
+    page = json.loads((tmp_path / manifest["news"]["todas"]["pages"][0]).read_text(encoding="utf-8"))
+    assert [i["id"] for i in page["items"]] == ["1", "3", "4"]
+    assert page["items"][0]["story_sources"] == ["Expansão", "ANGOP"] and page["items"][0]["story_size"] == 2
+    assert manifest["news"]["prioritarias"]["total"] == 1
+
+
+class FakeSession:
+    def __init__(self):
+        self.headers = {}
+        self.posts, self.deletes = {}, []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts[url.split("/feeds/", 1)[1]] = headers
+        return type("R", (), {"status_code": 200})()
+
+    def delete(self, url, json=None, timeout=None):
+        self.deletes.extend(json["prefixes"])
+        return type("R", (), {"status_code": 200})()
+
+
+def test_upload_sends_compressed_variants_and_deletes_pruned_pages(tmp_path, monkeypatch):
+    old = FeedPublisher(str(tmp_path), page_size=2)
+    old.publish({"news": [_news(1, "Economia")]})
+    FeedPublisher(str(tmp_path), page_size=2).publish({"news": [_news(2, "Economia")]})
+    # Terceira geração: a primeira sai do manifest atual e do anterior
+    publisher = FeedPublisher(str(tmp_path), page_size=2)
+    publisher.publish({"news": [_news(3, "Economia")]})
+    first = next(p for p in old.written if p.startswith("news/economia/"))
+    assert {first, first + ".gz"} <= set(publisher.removed)
+
+    session = FakeSession()
+    monkeypatch.setattr(feed_publisher.requests, "Session", lambda: session)
+    feed_publisher.upload("https://x.supabase.co", "k", str(tmp_path), publisher.written, publisher.removed)
+    page = publisher.written[0]
+    assert session.posts[page + ".gz"]["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in session.posts[page]
+    assert session.posts["manifest.json"]["cache-control"] == "max-age=60"
+    assert sorted(session.deletes) == sorted(publisher.removed)
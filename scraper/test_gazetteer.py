@@ -0,0 +1,33 @@
+from gazetteer import PROVINCES, resolve, resolve_first
+
+
+def test_resolves_provinces_municipalities_and_aliases():
+    assert len(PROVINCES) == 18
+    assert sum(len(m) for _, m in PROVINCES.values()) == 164
+
+    talatona = resolve("Talatona, Luanda")
+    assert (talatona.province_code, talatona.municipality_code) == ("LUA", "LUA-TALATONA")
+    assert resolve("Lubango - HUILA").municipality_code == "HUI-LUBANGO"
+    assert resolve("Kuito, Bié").municipality_code == "BIE-CUITO"
+    assert resolve("Kwanza Sul").province_code == "CUS"
+    assert resolve("Lunda N.").province_code == "LNO"
+    # Homónimo da província: só a província fica definida
+    luanda = resolve("Luanda, Angola")
+    assert (luanda.province_code, luanda.municipality_code) == ("LUA", None)
+
+
+def test_ambiguous_or_unknown_text_is_not_guessed():
+    assert resolve("Angola") is None
+    assert resolve("12 Outubro 2026") is None
+    assert resolve("Lunda") is None                     # Norte ou Sul?
+    assert resolve("Porto") is None                     # ≠ Porto Amboim
+    assert resolve_first("Angola", "Engenheiro Civil — Obra no Lobito").label == "Lobito, Benguela"
+
+
+def test_free_text_only_matches_exact_names_or_abbreviations():
+    # Prefixos só no campo de localização
+    assert resolve("Massa").municipality_code == "MAL-MASSANGO"
+    assert resolve_first("Gestor de massa salarial") is None
+    assert resolve_first("Professor de Belas Artes") is None
+    assert resolve_first("Técnico comercial — Lunda N.").province_code == "LNO"
+    assert resolve_first("Motorista em Belas").municipality_code == "LUA-BELAS"
@@ -0,0 +1,69 @@
+import json
+
+import state_store
+from outbox import MAX_ATTEMPTS, Outbox
+from sinks import SupabaseSink
+
+
+def test_outbox_survives_reopen_and_backs_off(tmp_path):
+    path = str(tmp_path / "jobs_outbox.sqlite")
+    box = Outbox("jobs", path)
+    first = box.put("jobs", {"source_url": "https://angovagas.net/v/1", "title": "Contabilista"})
+    box.put("jobs", {"source_url": "https://angovagas.net/v/2", "title": "Motorista"})
+    # A mesma URL substitui a linha pendente em vez de a duplicar
+    assert box.put("jobs", {"source_url": "https://angovagas.net/v/1", "title": "Contabilista Sénior"}) == first
+    next_at = box.retry([first], "503: indisponível", now=1000.0)
+    assert 1002.0 <= next_at <= 1003.0
+    box.close()
+
+    box = Outbox("jobs", path)
+    assert [row["title"] for _, _, row in box.due(now=1001.0)] == ["Motorista"]
+    assert len(box.due(now=next_at)) == 2
+    for _ in range(MAX_ATTEMPTS):
+        box.retry([first], "timeout")
+    assert box.counts() == {"pending": 1, "dead": 1}
+
+
+class _Resp:
+    def __init__(self, status):
+        self.status_code = status
+        self.text = "erro"
+
+
+class _DB:
+    base_url = "https://x.supabase.co"
+    headers = {"apikey": "k"}
+
+
+def test_sink_queues_on_outage_and_drains_next_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    posts = []
+
+    def down(url, params, headers, data, timeout):
+        posts.append(len(json.loads(data)))
+        return _Resp(503)
+
+    sink = SupabaseSink(_DB(), Outbox("news"))
+    sink.session.post = down
+    assert sink.write("news_articles", {"url_origem": "https://angop.ao/n/1", "titulo": "A"})
+    # Em backoff: a segunda escrita só enfileira, sem novo pedido
+    assert sink.write("news_articles", {"url_origem": "https://angop.ao/n/2", "titulo": "B"})
+    assert posts == [1] and sink.counts["queued"] == 2
+    sink.CLOSE_GRACE = 0
+    sink.close()
+
+    sent = []
+
+    def up(url, params, headers, data, timeout):
+        rows = json.loads(data)
+        sent.append((params["on_conflict"], headers["Prefer"], [r["titulo"] for r in rows]))
+        return _Resp(400 if any(r["titulo"] == "inválida" for r in rows) else 201)
+
+    box = Outbox("news")
+    box.conn.execute("UPDATE outbox SET next_at = 0")
+    sink = SupabaseSink(_DB(), box)
+    sink.session.post = up
+    assert sink.drain() == 2
+    assert sent[0][0] == "url_origem" and "ignore-duplicates" in sent[0][1] and sent[0][2] == ["A", "B"]
+    assert not sink.write("news_articles", {"url_origem": "https://angop.ao/n/3", "titulo": "inválida"})
+    assert box.counts() == {"pending": 0, "dead": 1}
@@ -0,0 +1,19 @@
+import logging
+
+from parse_pool import ParsePool
+
+
+def _parse_and_log(n: int) -> int:
+    logging.getLogger("Worker").warning(f"página {n} sem título")
+    return n * 2
+
+
+def test_results_and_worker_logs_reach_the_main_process(caplog):
+    caplog.set_level(logging.INFO)
+    with ParsePool(2) as pool:
+        assert [pool.submit(_parse_and_log, i).result() for i in range(3)] == [0, 2, 4]
+    assert sorted(r.getMessage() for r in caplog.records if r.name == "Worker") == [
+        f"página {i} sem título" for i in range(3)
+    ]
+    # Modo em linha: mesmo contrato
+    assert ParsePool(0).submit(_parse_and_log, 5).result() == 10
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from pipeline import HostThrottle, Pipeline, Stage
+
+
+def test_items_flow_through_stages_and_drops_are_counted():
+    written = []
+    lock = threading.Lock()
+
+    def write(x):
+        with lock:
+            written.append(x)
+        return x
+
+    pipe = Pipeline("t", [
+        Stage("dedup", lambda x: None if x % 3 == 0 else x, concurrency=2),
+        Stage("enrich", lambda x: x * 10, concurrency=3, queue_size=2),
+        Stage("write", write, queue_size=1),
+    ], report_every=0)
+    metrics = pipe.run(iter(range(30)))
+
+    assert sorted(written) == [x * 10 for x in range(30) if x % 3]
+    assert metrics["discover"]["out"] == 30
+    assert metrics["dedup"]["dropped"] == 10
+    assert metrics["write"]["in"] == 20
+
+
+def test_bounded_queues_apply_backpressure_and_stop_drains():
+    max_depth = []
+
+    def slow_write(x):
+        max_depth.append(pipe.queue_depths()["write"][0])
+        time.sleep(0.005)
+        if x == 5:
+            pipe.stop()
+        return x
+
+    pipe = Pipeline("t", [
+        Stage("fetch", lambda x: x, concurrency=4),
+        Stage("write", slow_write, queue_size=3),
+    ], report_every=0)
+    metrics = pipe.run(iter(range(1000)))
+
+    assert max(max_depth) <= 3
+    assert metrics["discover"]["out"] < 1000
+    assert metrics["write"]["out"] <= 10
+
+
+def test_host_slot_without_deadline_waits_for_its_turn():
+    throttle = HostThrottle()
+    results = []
+
+    def fetch():
+        with throttle.slot("https://angovagas.net/vaga/1") as on_time:
+            if on_time:
+                time.sleep(0.05)
+            results.append(on_time)
+
+    threads = [threading.Thread(target=fetch) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [True, True]
@@ -0,0 +1,54 @@
+from reclassify import JobCategorizer, NewsClassifier, Reclassifier
+
+
+def test_compiled_keywords_keep_the_insert_time_rules():
+    categorize = JobCategorizer({"Tecnologia": ["Developer", "C++"], "Gestão": ["Gerente", "Developer"]})
+    assert categorize("Senior DEVELOPER / Gerente") == "Tecnologia"     # ordem do mapa
+    assert categorize("Programador c++") == "Tecnologia"                # carateres especiais escapados
+    assert categorize("Gerente de Loja") == "Gestão"
+    assert categorize("Motorista") == "Geral"
+    assert categorize("Developer", fixed_category="Concurso Público") == "Concurso Público"
+
+    classify = NewsClassifier(["Última Hora"], [("Economia", ["BNA"]), ("Cultura", ["Festival"])])
+    assert classify("ÚLTIMA HORA: bna e festival", "Angola") == ("Economia", True)
+    assert classify("Festival em Benguela", "Angola") == ("Cultura", False)
+    assert classify("Chuvas em Luanda", "Angola") == ("Angola", False)
+
+
+class _DB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+
+    def select(self, table, filters, columns):
+        after = int(filters["id"][3:]) if "id" in filters else 0
+        return [r for r in self.rows if r["id"] > after][:int(filters["limit"])]
+
+    def update(self, table, filters, data):
+        self.updates.append((filters, data))
+        return True
+
+
+def test_backfill_rewrites_only_machine_labels_that_changed():
+    rows = [
+        {"id": 1, "titulo": "BNA sobe juros", "categoria": "Angola", "categoria_auto": "Angola"},
+        {"id": 2, "titulo": "BNA mantém câmbio", "categoria": "Angola", "categoria_auto": "Angola"},
+        {"id": 3, "titulo": "Chuvas em Luanda", "categoria": "Angola", "categoria_auto": "Angola"},
+        {"id": 4, "titulo": "BNA e a seca", "categoria": "Sociedade", "categoria_auto": "Angola"},   # corrigida
+        {"id": 5, "titulo": "BNA (notícia manual)", "categoria": "Angola", "categoria_auto": None},
+    ]
+    classify = NewsClassifier([], [("Economia", ["BNA"])])
+    label = lambda row: {"categoria": classify(row["titulo"], "Angola")[0]}
+
+    dry = Reclassifier(_DB(rows), "news_articles", "*", label, dry_run=True, page=2)
+    assert dry.run() == 2 and dry.db.updates == []
+
+    db = _DB(rows)
+    reclassifier = Reclassifier(db, "news_articles", "*", label, page=2)
+    assert reclassifier.run() == 2
+    # Um PATCH para o grupo Angola → Economia, só se a linha ainda tiver o valor antigo
+    assert db.updates == [
+        ({"id": "in.(1,2)", "categoria": "eq.Angola"}, {"categoria": "Economia", "categoria_auto": "Economia"})
+    ]
+    assert reclassifier.corrections == {("categoria", "Angola", "Sociedade"): 1}
+    assert reclassifier.stats["manuais"] == 1
@@ -0,0 +1,71 @@
+from content_hash import content_hash
+from replay import JobsReplay, backfill
+from url_canon import url_key
+
+PLACEHOLDER = "https://img.icons8.com/color/96/000000/engineering.png"
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.selects = []
+        self.updates = []
+
+    def select(self, table, filters=None, columns="*"):
+        if table == "exchange_rates":
+            return [{"currency": "USD", "formal_buy": 900.0}]
+        self.selects.append(filters)
+        keys = filters["url_key"][len("in.("):-1].split(",")
+        return [dict(row) for row in self.rows if row["url_key"] in keys]
+
+    def update(self, table, filters, data):
+        self.updates.append((filters["id"], data))
+        return True
+
+
+def _row(id, url, **columns):
+    row = {"id": id, "url_key": url_key(url), "source_url": url, "title": f"Vaga {id}", "description": "",
+           "requirements": [], "salary": "", "imagem_url": "", "application_email": "", **columns}
+    row["content_hash"] = content_hash("jobs", row)
+    return row
+
+
+def _extracted(**columns):
+    fresh = {"description": "Descrição nova", "requirements": ["Carta de condução"], "salary": "USD 1.500 por mês",
+             "imagem_url": "https://angovagas.net/logo.png", "application_email": "rh@empresa.co.ao"}
+    return {**fresh, **columns}
+
+
+def test_backfill_fills_only_missing_columns_and_rehashes_on_hashed_changes():
+    rows = [
+        _row(1, "https://angovagas.net/vaga/1", imagem_url=PLACEHOLDER),
+        _row(2, "https://angovagas.net/vaga/2", description="Texto do admin", requirements=["Inglês"],
+             imagem_url="https://cdn.ao/a.png", salary="Negociável"),
+        _row(3, "https://angovagas.net/vaga/3", description="Já tem", requirements=["Já tem"],
+             imagem_url="https://cdn.ao/b.png", salary="AOA 200.000", application_email="rh@x.ao"),
+    ]
+    # URLs arquivadas com tracking: o encontro é pela url_key
+    extracted = {
+        "https://angovagas.net/vaga/1?utm_source=fb#top": ("AngoVagas", _extracted()),
+        "https://angovagas.net/vaga/2?utm_source=fb": ("AngoVagas", _extracted()),
+        "https://angovagas.net/vaga/3": ("AngoVagas", _extracted()),
+    }
+    db = FakeDB(rows)
+    assert backfill(JobsReplay(), db, extracted) == 2
+    patches = dict(db.updates)
+
+    full = patches["eq.1"]
+    assert full["description"] == "Descrição nova" and full["imagem_url"] == "https://angovagas.net/logo.png"
+    assert full["salary_currency"] == "USD" and full["salary_aoa_min"] == 1350000.0
+    assert full["content_hash"] == content_hash("jobs", {**rows[0], **full})
+
+    # Valores existentes nunca são reescritos; só o e-mail em falta, que não entra no hash
+    assert patches["eq.2"] == {"application_email": "rh@empresa.co.ao"}
+    assert "eq.3" not in patches
+
+
+def test_backfill_dry_run_writes_nothing():
+    db = FakeDB([_row(1, "https://angovagas.net/vaga/1")])
+    extracted = {"https://angovagas.net/vaga/1": ("AngoVagas", _extracted())}
+    assert backfill(JobsReplay(), db, extracted, dry_run=True) == 1
+    assert db.updates == []
@@ -0,0 +1,33 @@
+import os
+
+from response_archive import ResponseArchive, source_slug
+
+URL = "https://angoemprego.com/vagas/tecnico-de-redes"
+
+
+def test_records_round_trip_per_source(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    archive.record("Ango Emprego", URL, 200, "<h1>Técnico</h1>".encode("utf-8"), "utf-8")
+    archive.record("Ango Emprego", URL + "-2", 200, b"\r\n\r\nbinario\x00", None)
+    archive.record("Jornal de Angola", "https://www.jornaldeangola.ao/", 200, b"<html/>", "windows-1252")
+
+    records = list(archive.iter_records(source="Ango Emprego"))
+    assert [r.url for r in records] == [URL, URL + "-2"]
+    assert records[0].content.decode(records[0].encoding) == "<h1>Técnico</h1>"
+    assert records[1].content == b"\r\n\r\nbinario\x00"
+    assert records[1].encoding == "utf-8"
+    assert len(list(archive.iter_records())) == 3
+    assert source_slug("Jornal de Angola") in os.listdir(tmp_path)
+
+
+def test_truncated_tail_keeps_complete_records(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    archive.record("AngoVagas", URL, 200, b"a" * 5000, "utf-8")
+    archive.record("AngoVagas", URL + "-2", 200, b"b" * 5000, "utf-8")
+    folder = tmp_path / source_slug("AngoVagas")
+    path = folder / os.listdir(folder)[0]
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])  # execução interrompida a meio da escrita
+
+    records = list(archive.iter_records(source="AngoVagas"))
+    assert [r.url for r in records] == [URL]
@@ -0,0 +1,30 @@
+import json
+import logging
+
+from pipeline import Pipeline, Stage
+from run_logging import RunLogging, item_logger
+
+
+def test_records_are_tagged_sampled_and_written_as_json(tmp_path):
+    path = tmp_path / "news_scraper.jsonl"
+    logs = RunLogging(str(path)).start()
+    items, warn = item_logger("TesteMotor"), logging.getLogger("TesteMotor")
+
+    def fetch(item):
+        items.info(f"✨ Capturando {item['n']}")
+        if item["n"] == 3:
+            warn.warning("⚠️  Falha no request")
+        return item
+
+    Pipeline("news", [Stage("fetch", fetch, concurrency=2)], report_every=0).run(
+        {"site": "ANGOP", "n": i} for i in range(120)
+    )
+    logs.stop()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    captured = [r for r in records if r["logger"] == "TesteMotor.itens"]
+    # 20 primeiras + as múltiplas de 50 (50, 100); o aviso passa sempre
+    assert len(captured) == 22 and logs.sampler.suppressed == 98
+    assert {(r["source"], r["stage"]) for r in captured} == {("ANGOP", "fetch")}
+    assert [r["msg"] for r in records if r["level"] == "WARNING"] == ["⚠️  Falha no request"]
+    assert "omitida(s) pela amostragem" in records[-1]["msg"]
@@ -0,0 +1,39 @@
+import marshal
+import os
+import pstats
+from collections import Counter
+
+from run_profiler import RunProfiler
+
+MAIN = ("engine.py", 10, "run")
+FETCH = ("engine.py", 40, "_stage_fetch")
+PARSE = ("engine.py", 80, "_stage_parse")
+
+
+def test_collapsed_and_pstats_from_weighted_stacks(tmp_path):
+    prof = RunProfiler(str(tmp_path), "jobs")
+    stacks = Counter({(MAIN, FETCH): 30, (MAIN, PARSE): 10, (MAIN,): 5})
+    assert prof.collapsed(stacks)[0] == "engine.py:run:10;engine.py:_stage_fetch:40 30"
+
+    stats = prof.pstats_dict(stacks)
+    path = tmp_path / "x.prof"
+    with open(path, "wb") as f:
+        marshal.dump(stats, f)
+    loaded = pstats.Stats(str(path)).stats
+    # (cc, nc, tt, ct, callers): próprio vs inclusivo, em segundos (pesos em ms)
+    assert loaded[MAIN][2:4] == (0.005, 0.045)
+    assert loaded[FETCH][2:4] == (0.03, 0.03)
+    assert loaded[FETCH][4] == {MAIN: (30, 30, 0.0, 0.03)}
+
+
+def test_samples_are_attributed_to_the_marked_source(tmp_path):
+    prof = RunProfiler(str(tmp_path), "news", interval=0.001)
+    prof.start()
+    spin = lambda item: sum(i * i for i in range(200_000))
+    prof.stage(spin)({"site": "ANGOP"})
+    prof.task("Novo Jornal", spin, None)
+    prof.stop()
+    assert set(prof._stacks) == {"ANGOP", "Novo Jornal"}
+    files = set(os.listdir(prof.dir))
+    assert {"angop.prof", "novo-jornal.collapsed", "todas.prof", "resumo.txt"} <= files
+    assert {"memoria-1-inicio.snapshot", "memoria-2-fim.snapshot"} <= files
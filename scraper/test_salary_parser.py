@@ -0,0 +1,37 @@
+from salary_parser import find_salary, parse_salary
+
+
+def test_parses_amounts_multipliers_ranges_and_currencies():
+    rates = {"USD": 900.0}
+    s = parse_salary("200.000 - 300.000 Kz/mês")
+    assert (s.salary_min, s.salary_max, s.currency, s.period) == (200000, 300000, "AOA", "month")
+    assert parse_salary("150 mil Kz").salary_min == 150000
+    assert parse_salary("1,5M AOA").salary_max == 1500000
+    assert parse_salary("Salário: 350.000,00 KZ").salary_min == 350000
+
+    usd = parse_salary("entre 2 e 3 mil USD")
+    assert (usd.salary_min, usd.salary_max, usd.currency) == (2000, 3000, "USD")
+    assert usd.to_columns(rates)["salary_aoa_max"] == 2_700_000
+
+    yearly = parse_salary("€ 24.000 / ano")
+    assert (yearly.currency, yearly.period) == ("EUR", "year")
+    assert yearly.to_aoa_monthly({}) == (None, None)     # sem taxa para EUR
+
+    assert parse_salary("até 500 mil Kz").salary_min is None
+    assert parse_salary("a partir de 80.000 Kz").salary_max is None
+
+
+def test_page_text_keeps_open_bounds_when_stored_and_parsed_again():
+    # O motor guarda found.text e volta a analisá-lo com parse_salary
+    upper = parse_salary(find_salary("Oferecemos até 500 mil Kz por mês.").text)
+    assert (upper.salary_min, upper.salary_max) == (None, 500000)
+    lower = parse_salary(find_salary("Salário a partir de 80.000 Kz").text)
+    assert (lower.salary_min, lower.salary_max) == (80000, None)
+
+
+def test_ignores_negotiable_and_numbers_without_salary_context():
+    assert parse_salary("Negociável") is None
+    assert parse_salary("A combinar") is None
+    assert find_salary("Publicado em 2026, 3 vagas. Tel. 923 456 789") is None
+    assert find_salary("Remuneração: 120 mil por mês").salary_min == 120000
+    assert find_salary("150.000 Kz e 2 dias de folga").salary_max == 150000
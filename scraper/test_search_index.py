@@ -0,0 +1,46 @@
+from search_index import SearchIndex, match_expression
+
+
+def _job(i, title, location, categoria, posted_at):
+    return {
+        "title": title, "company": "Unitel", "location": location, "categoria": categoria,
+        "description": "Experiência em gestão de equipas.", "requirements": ["Licenciatura", "Inglês"],
+        "source_url": f"https://angovagas.net/v/{i}", "posted_at": posted_at,
+    }
+
+
+def test_search_with_filters_and_accents():
+    index = SearchIndex(":memory:")
+    index.add_job(_job(1, "Técnico de Redes", "Luanda, Angola", "Tecnologia", "2026-10-10T08:00:00+00:00"))
+    index.add_job(_job(2, "Técnico de Manutenção", "Lubango, Huíla", "Engenharia", "2026-09-01T08:00:00+00:00"))
+    index.add_news({"titulo": "Unitel abre concurso para técnicos", "resumo": "", "corpo": "<p>Luanda</p>",
+                    "categoria": "Oportunidades", "fonte": "ANGOP", "url_origem": "https://angop.ao/n/1",
+                    "is_priority": True})
+
+    assert len(index.search("tecnico")) == 3
+    assert [r["url"] for r in index.search("tecnico", kind="job", location="huila")] == ["https://angovagas.net/v/2"]
+    assert [r["title"] for r in index.search("tecnico", kind="job", since="2026-10-01")] == ["Técnico de Redes"]
+    assert [r["kind"] for r in index.search("técnicos", priority_only=True)] == ["news"]
+    assert index.search("inglês", categoria="Engenharia")[0]["url"].endswith("/2")
+
+
+def test_reindexing_same_url_replaces_document():
+    index = SearchIndex(":memory:")
+    index.add_job(_job(1, "Contabilista", "Luanda", "Finanças", "2026-10-10T08:00:00+00:00"))
+    index.add_job(_job(1, "Contabilista Sénior", "Luanda", "Finanças", "2026-10-11T08:00:00+00:00"))
+    assert index.count() == 1
+    assert index.search("senior")[0]["title"] == "Contabilista Sénior"
+    assert match_expression('"; DROP -- OR') == '"DROP"* "OR"*'
+
+
+def test_merge_joins_shard_indexes(tmp_path):
+    shard = SearchIndex(str(tmp_path / "shard.db"))
+    shard.add_job(_job(1, "Contabilista Sénior", "Luanda", "Finanças", "2026-10-11T08:00:00+00:00"))
+    shard.add_job(_job(2, "Engenheiro Civil", "Benguela", "Engenharia", "2026-10-11T08:00:00+00:00"))
+    shard.close()
+    index = SearchIndex(":memory:")
+    index.add_job(_job(1, "Contabilista", "Luanda", "Finanças", "2026-10-10T08:00:00+00:00"))
+    assert index.merge(str(tmp_path / "shard.db")) == 2
+    assert index.count() == 2
+    assert index.search("senior")[0]["title"] == "Contabilista Sénior"
+    assert index.search("ingles", location="benguela")[0]["url"].endswith("/2")
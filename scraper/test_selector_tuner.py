@@ -0,0 +1,78 @@
+import re
+
+from bs4 import BeautifulSoup
+
+import state_store
+from selector_tuner import SelectorTuner, best_selector, score_selector
+
+CFG = {
+    "base_url": "https://angoemprego.com",
+    "job_card_selector": "li.job_listing",
+    "link_selector": "a",
+    "title_selector": "h3",
+}
+
+
+def _listing(card_class: str, n: int = 12) -> BeautifulSoup:
+    nav = "".join(f'<li class="menu-item"><a href="/p{i}">Menu</a></li>' for i in range(6))
+    cards = "".join(
+        f'<div class="{card_class}"><a href="/vagas/vaga-{i}"><h3>Técnico de Redes {i} — Luanda</h3></a></div>'
+        for i in range(n)
+    )
+    return BeautifulSoup(f"<html><body><ul>{nav}</ul><section>{cards}</section></body></html>", "html.parser")
+
+
+def test_scores_real_cards_above_navigation():
+    soup = _listing("vaga-card")
+    sel, score = best_selector(soup, CFG, exclude=[CFG["job_card_selector"]])
+    assert sel == "div.vaga-card"
+    assert score["score"] > score_selector(soup, "li.menu-item", CFG)["score"]
+
+
+def test_tuned_selector_is_cached_and_decay_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    tuner = SelectorTuner("jobs")
+    tuned = tuner.tune("Ango Emprego", [_listing("vaga-card") for _ in range(7)], CFG)
+    assert tuned["selector"] == "div.vaga-card"
+    tuner.observe("Ango Emprego", CFG["job_card_selector"], 0.9)
+    tuner.save()
+
+    next_run = SelectorTuner("jobs")
+    assert next_run.cached("Ango Emprego") == "div.vaga-card"
+    assert not next_run.regressions()
+    for _ in range(4):
+        next_run.observe("Ango Emprego", CFG["job_card_selector"], 0.0)
+    assert "Ango Emprego" in next_run.regressions()[0]
+
+
+def test_configured_selector_is_scored_only_without_baseline_or_when_degraded(monkeypatch):
+    import selector_tuner
+    from ango_job_scraper import parse_listing_page
+
+    calls = []
+    real = selector_tuner.score_selector
+    monkeypatch.setattr("ango_job_scraper.score_selector", lambda *a: calls.append(a[1]) or real(*a))
+    cfg = {**CFG, "job_card_selector": "div.vaga-card"}
+    healthy = str(_listing("vaga-card")).encode()
+
+    assert parse_listing_page(healthy, "utf-8", "Ango Emprego", cfg)["configured_score"] is None
+    assert calls == []
+    assert parse_listing_page(healthy, "utf-8", "Ango Emprego", {**cfg, "score_configured": True})["configured_score"] > 0
+    assert calls == ["div.vaga-card"]
+
+    # Cards sem título plausível: degradado, volta a pontuar
+    degraded = re.sub(r"<h3>.*?</h3>", "<h3>Ver</h3>", str(_listing("vaga-card"))).encode()
+    parse_listing_page(degraded, "utf-8", "Ango Emprego", cfg)
+    assert calls == ["div.vaga-card"] * 2
+
+
+def test_unscored_healthy_run_counts_as_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    tuner = SelectorTuner("jobs")
+    assert tuner.needs_score("Ango Emprego", CFG["job_card_selector"])
+    tuner.observe("Ango Emprego", CFG["job_card_selector"], 0.8)
+    assert not tuner.needs_score("Ango Emprego", CFG["job_card_selector"])
+    tuner.observe("Ango Emprego", CFG["job_card_selector"], 0.1)
+    for _ in range(5):
+        tuner.observe("Ango Emprego", CFG["job_card_selector"], None)
+    assert not tuner.regressions()
@@ -0,0 +1,31 @@
+import argparse
+
+import pytest
+
+from ango_job_scraper import JOBS_CONFIG
+from news_scraper import SITES_CONFIG
+from sharding import Shard, parse_shard, stable_hash
+
+
+@pytest.mark.parametrize("config, count", [(JOBS_CONFIG, 2), (SITES_CONFIG, 3), (SITES_CONFIG, 5)])
+def test_sources_are_partitioned_disjoint_and_balanced(config, count):
+    parts = [list(Shard(i, count).sources(config)) for i in range(1, count + 1)]
+    assert sorted(name for part in parts for name in part) == sorted(config)
+    assert max(map(len, parts)) - min(map(len, parts)) <= 1
+    # Ordem do dicionário de adaptadores preservada dentro de cada shard
+    assert all(part == [name for name in config if name in part] for part in parts)
+
+
+def test_url_ownership_is_stable_and_spec_is_validated():
+    # blake2b: o mesmo valor em qualquer processo (ao contrário de hash())
+    assert stable_hash("https://angop.ao/noticias/1") == stable_hash("https://angop.ao/noticias/1")
+    urls = [f"https://angovagas.net/vaga/{i}" for i in range(1000)]
+    owners = [[i for i in (1, 2, 3) if Shard(i, 3).owns(u)] for u in urls]
+    assert all(len(o) == 1 for o in owners)
+    assert all(250 < sum(o == [i] for o in owners) < 420 for i in (1, 2, 3))
+    assert all(Shard(1, 1).owns(u) for u in urls)
+
+    assert repr(parse_shard("2/3")) == "2/3"
+    for bad in ("0/3", "4/3", "1", "a/b", "1/0"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(bad)
@@ -0,0 +1,38 @@
+import json
+
+import bulk_load
+from sinks import LocalSink, read_rows
+
+
+def test_local_sink_round_trip_and_pending_files(tmp_path):
+    sink = LocalSink(str(tmp_path), run_id="20261019T120000Z")
+    sink.write("jobs", {"title": "Técnico de Redes", "source_url": "https://angovagas.net/v/1", "requirements": ["CCNA"]})
+    sink.write("news_articles", {"titulo": "BNA mantém taxa", "url_origem": "https://www.angop.ao/n/1"})
+    sink.close()
+
+    assert read_rows(sink.path("jobs"))[0]["requirements"] == ["CCNA"]
+    assert bulk_load.pending_files(str(tmp_path), bulk_load.CONFLICT_KEYS) == [
+        "jobs/20261019T120000Z.ndjson", "news_articles/20261019T120000Z.ndjson",
+    ]
+    bulk_load.mark_loaded(str(tmp_path), "jobs/20261019T120000Z.ndjson")
+    assert bulk_load.pending_files(str(tmp_path), ["jobs"]) == []
+
+
+def test_rest_loader_isolates_rejected_rows(tmp_path):
+    class Resp:
+        def __init__(self, status):
+            self.status_code = status
+            self.text = "violates check constraint"
+
+    sent = []
+
+    def post(url, params, headers, data, timeout):
+        rows = json.loads(data)
+        sent.append(len(rows))
+        return Resp(400 if any(r["status"] == "invalido" for r in rows) else 201)
+
+    loader = bulk_load.RestLoader("https://x.supabase.co", "key")
+    loader.session.post = post
+    rows = [{"source_url": f"u{i}", "status": "pendente"} for i in range(7)] + [{"source_url": "x", "status": "invalido"}]
+    assert loader.load("jobs", rows, batch=4) == 7
+    assert sent[:2] == [4, 4]
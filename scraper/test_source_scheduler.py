@@ -0,0 +1,33 @@
+import state_store
+from source_scheduler import SourceScheduler
+
+
+def test_high_yield_sources_come_first_and_poll_sooner(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    sched = SourceScheduler("test", min_interval=600, default_interval=6 * 3600)
+
+    t0 = 1_000_000.0
+    for i in range(4):
+        now = t0 + i * 6 * 3600
+        sched.record("LinkedIn", new_items=20, now=now)
+        sched.record("INEFOP", new_items=0, now=now)
+
+    assert sched.order(["INEFOP", "LinkedIn", "Nova"]) == ["Nova", "LinkedIn", "INEFOP"]
+    assert sched.sources["LinkedIn"]["interval"] < sched.sources["INEFOP"]["interval"]
+
+    # Persistência entre execuções
+    sched.save()
+    reloaded = SourceScheduler("test")
+    assert reloaded.sources["LinkedIn"]["visits"] == 4
+
+
+def test_errors_back_off_and_plan_skips_sources_not_due(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    sched = SourceScheduler("test", min_interval=600, default_interval=3600)
+
+    sched.record("TPA", new_items=3, error=False, now=1000.0)
+    sched.record("ANGOP", new_items=3, error=True, now=1000.0)
+    assert sched.sources["ANGOP"]["interval"] > sched.sources["TPA"]["interval"]
+
+    assert sched.plan(["TPA", "ANGOP"], now=1001.0) == []
+    assert set(sched.plan(["TPA", "ANGOP"], force=True, now=1001.0)) == {"TPA", "ANGOP"}
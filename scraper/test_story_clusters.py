@@ -0,0 +1,112 @@
+import state_store
+from story_clusters import StoryIndex, backfill
+
+BNA = [
+    ("a1", "ANGOP", "BNA mantém taxa básica de juro em 19,5%",
+     "O Comité de Política Monetária do Banco Nacional de Angola (BNA) decidiu manter a taxa básica "
+     "de juro em 19,5 por cento, anunciou o governador Manuel Tiago Dias.", True),
+    ("j1", "Jornal de Angola", "Banco Nacional de Angola mantém taxa de juro nos 19,5 por cento",
+     "O Banco Nacional de Angola manteve a taxa básica de juro em 19,5 por cento, segundo o comunicado "
+     "do Comité de Política Monetária divulgado pelo governador Manuel Tiago Dias.", False),
+]
+OTHER = ("n1", "NovaGazeta", "Governo lança programa de vacinação contra o sarampo",
+         "O Ministério da Saúde lançou uma campanha de vacinação dirigida a crianças em todo o país.", False)
+
+
+def test_same_event_from_two_outlets_shares_a_story(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    index = StoryIndex()
+    story, rank = index.assign(*BNA[0])
+    assert (story, rank) == ("st_a1", 3)          # 1 fonte + bónus de prioridade
+    assert index.assign(*BNA[1]) == ("st_a1", 4)
+    assert index.assign(*OTHER) == ("st_n1", 1)
+    # A linha já gravada de a1 precisa do novo rank
+    assert index.pending_ranks() == {"st_a1": 4}
+    assert index.pending_ranks() == {}
+
+    # O índice sobrevive entre execuções (.state)
+    index.save()
+    again = StoryIndex()
+    assert again.assign("e1", "Expansão", *BNA[1][2:4]) == ("st_a1", 5)
+
+# Amostra anotada (calibração de JOIN_THRESHOLD): (título, lead) de duas fontes
+LOURENCO_PT = ("Presidente João Lourenço recebe embaixador de Portugal",
+               "O Presidente da República, João Lourenço, recebeu esta segunda-feira no Palácio da Cidade "
+               "Alta o embaixador de Portugal, que apresentou cartas credenciais.")
+HUAMBO = ("Chuvas causam 5 mortos no Huambo",
+          "As chuvas intensas que caíram na madrugada de domingo na cidade do Huambo provocaram cinco "
+          "mortos e dezenas de casas destruídas, segundo a Protecção Civil.")
+SAME_EVENT = [
+    (BNA[0][2:4], BNA[1][2:4]),
+    (HUAMBO, ("Cinco mortos no Huambo após chuvas intensas",
+              "Cinco pessoas morreram e dezenas de casas ficaram destruídas na cidade do Huambo devido às "
+              "chuvas intensas de domingo, informou a Protecção Civil.")),
+    (LOURENCO_PT, ("João Lourenço recebe cartas credenciais do embaixador português",
+                   "O embaixador de Portugal apresentou esta segunda-feira as cartas credenciais ao Presidente "
+                   "João Lourenço, no Palácio da Cidade Alta.")),
+]
+NEAR_MISS = [
+    (LOURENCO_PT, ("Presidente João Lourenço recebe embaixador da China",
+                   "O Presidente da República, João Lourenço, recebeu hoje no Palácio da Cidade Alta o "
+                   "embaixador da China, que se despediu no fim da sua missão.")),
+    (HUAMBO, ("Chuvas causam 3 mortos em Benguela",
+              "As chuvas que caíram na noite de terça-feira em Benguela provocaram três mortos e várias "
+              "casas inundadas no bairro da Graça, segundo a Protecção Civil.")),
+    ((LOURENCO_PT[0], ""), ("Presidente João Lourenço recebe embaixador da China", "")),
+    ((HUAMBO[0], ""), ("Chuvas causam 3 mortos em Benguela", "")),
+]
+
+
+def _joined(first, second) -> bool:
+    index = StoryIndex(persist=False)
+    index.assign("x1", "ANGOP", *first)
+    return index.assign("x2", "Jornal de Angola", *second)[0] == "st_x1"
+
+
+def test_labelled_sample_joins_paraphrases_but_not_near_misses():
+    assert all(_joined(a, b) for a, b in SAME_EVENT)
+    assert not any(_joined(a, b) for a, b in NEAR_MISS)
+
+
+def test_failed_write_is_discarded_from_its_story():
+    index = StoryIndex(persist=False)
+    index.assign(*BNA[0])
+    index.assign(*BNA[1])
+    index.discard("j1")
+    assert index.stories["st_a1"]["sites"] == {"ANGOP"}
+    index.discard("a1")
+    assert index.stories == {} and index.articles == {}
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+
+    def select(self, table, filters, columns="*"):
+        start = int(filters["offset"])
+        return self.rows[start:start + int(filters["limit"])]
+
+    def update(self, table, filters, data):
+        self.updates.append((filters["id"], data))
+        ids = filters["id"][len("in.("):-1].split(",")
+        for row in self.rows:
+            if str(row["id"]) in ids:
+                row.update(data)
+        return True
+
+
+def test_backfill_writes_only_rows_whose_story_changed(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", str(tmp_path))
+    now = "2099-01-01T00:00:00+00:00"
+    rows = [
+        {"id": i, "url_key": key, "fonte": site, "titulo": title, "resumo": lead, "is_priority": prio,
+         "published_at": now, "story_id": None, "story_rank": None}
+        for i, (key, site, title, lead, prio) in enumerate(BNA + [OTHER], start=1)
+    ]
+    db = FakeDB(rows)
+    assert backfill(db) == 2
+    assert [r["story_id"] for r in rows] == ["st_a1", "st_a1", "st_n1"]
+    # Segunda passagem com o índice guardado: nada mudou, nada é escrito
+    db.updates.clear()
+    assert backfill(db) == 0 and db.updates == []
@@ -0,0 +1,56 @@
+import time
+
+from pipeline import HostThrottle, Pipeline, Stage
+from time_budget import TimeBudget
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_plan_ranks_by_yield_per_second_and_drops_what_does_not_fit():
+    clock = _Clock()
+    budget = TimeBudget(100, "news", reserve=10, persist=False, clock=clock)
+    budget.observe("LENTO", "listing", 20.0)
+    budget.observe("RAPIDO", "listing", 1.0)
+    budget.observe("CARO", "listing", 95.0)
+    expected = {"LENTO": 5.0, "RAPIDO": 3.0, "NOVO": float("inf"), "CARO": 50.0}
+    # NOVO (nunca visitada) primeiro; CARO já não cabe nos 90 s de trabalho
+    assert budget.plan(expected, expected.get, lambda s: 2.0) == ["NOVO", "RAPIDO", "LENTO"]
+    assert budget.start_by("RAPIDO") == 100.0 + 90.0 - 3.0
+
+    clock.now += 80
+    with budget.timed("RAPIDO", "detail"):
+        clock.now += 5
+    assert budget.cost("RAPIDO", "detail") == 5.0
+    budget.postpone("RAPIDO")
+    assert "1 item(ns) para a próxima execução (RAPIDO 1)" in budget.summary()
+
+
+def test_deadline_skips_host_waits_and_finishes_fetched_items():
+    throttle = HostThrottle()
+    with throttle.slot("https://angop.ao/a", (5, 5)) as ok:
+        assert ok
+    start = time.monotonic()
+    with throttle.slot("https://angop.ao/b", (5, 5), deadline=start + 1) as ok:
+        assert not ok
+    assert time.monotonic() - start < 0.5
+
+    written = []
+
+    def slow_fetch(item):
+        time.sleep(0.2)
+        return item
+
+    pipeline = Pipeline("teste", [
+        Stage("fetch", slow_fetch),
+        Stage("write", written.append, finish_on_stop=True),
+    ])
+    metrics = pipeline.run(iter([{"site": "ANGOP", "n": i} for i in range(20)]), deadline=time.monotonic() + 0.5)
+    # Parou antes das 20 (prazo), mas tudo o que foi descarregado chegou ao write
+    assert 1 <= len(written) < 20
+    assert metrics["fetch"]["out"] == len(written)
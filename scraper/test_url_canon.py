@@ -0,0 +1,36 @@
+from url_canon import canonical_url, url_key
+
+
+def test_tracking_fragments_scheme_and_www_share_one_key():
+    variants = [
+        "https://angovagas.net/vaga/contabilista-123/",
+        "http://www.angovagas.net/vaga/contabilista-123",
+        "https://AngoVagas.net:443/vaga/contabilista-123/?utm_source=facebook&utm_medium=social#candidatar",
+        "https://angovagas.net/vaga/contabilista-123/?fbclid=IwAR0",
+    ]
+    assert len({url_key(u) for u in variants}) == 1
+    assert canonical_url(variants[2]) == "https://angovagas.net/vaga/contabilista-123/"
+    # Parâmetros com significado continuam a distinguir páginas
+    assert url_key("https://angovagas.net/?p=1") != url_key("https://angovagas.net/?p=2")
+    assert canonical_url("https://x.ao/a?b=2&a=1") == "https://x.ao/a?a=1&b=2"
+
+
+def test_linkedin_job_links_collapse_to_job_id():
+    raw = ("https://ao.linkedin.com/jobs/view/contabilista-at-unitel-3791234567"
+           "?refId=abc&trackingId=Zz%3D%3D&position=3&pageNum=0&trk=public_jobs")
+    assert canonical_url(raw) == "https://www.linkedin.com/jobs/view/3791234567"
+    assert url_key(raw) == url_key("https://www.linkedin.com/jobs/view/3791234567/")
+    assert canonical_url("mailto:rh@empresa.ao") == ""
+
+
+def test_dedup_falls_back_to_raw_urls_while_url_key_is_missing():
+    from url_canon import dedup_filters, url_variants
+
+    url = "https://angovagas.net/vaga/1?utm_source=fb"
+    variants = url_variants(url)
+    # Linhas antigas guardaram a URL em bruto, com www. e barra final
+    assert "https://www.angovagas.net/vaga/1/" in variants and "http://angovagas.net/vaga/1" in variants
+    assert variants[0] == url
+    filters = dedup_filters("jobs", url)["or"]
+    assert filters.startswith(f"(url_key.eq.{url_key(url)},and(url_key.is.null,source_url.in.(")
+    assert '"https://angovagas.net/vaga/1"' in filters
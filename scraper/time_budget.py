@@ -0,0 +1,121 @@
+"""
+TimeBudget — Execuções com Prazo (--time-budget)
+================================================
+Sem limite de tempo, uma execução com portais lentos (atrasos de até 12 s por
+pedido, timeouts de 31 s) podia ocupar o job inteiro do Actions e ser morta
+a meio, sem gravar o estado. Com `--time-budget SEGUNDOS`:
+
+  • prazo de trabalho = início + orçamento − reserva (SHUTDOWN_RESERVE, no
+    máximo 25% do orçamento): o tempo da reserva fica para o pedido em curso
+    acabar, o último envio da fila de escritas e a gravação do estado
+  • custo esperado de cada ação por fonte (EWMA persistida em .state):
+    listagem e fetch de detalhe; o custo de um item é o fetch + o atraso de
+    cortesia do host
+  • as fontes são visitadas por yield esperado por segundo (novos/visita do
+    agendador ÷ custo da visita); as listagens que já não cabem no prazo não
+    são pedidas
+  • cada fetch de detalhe tem de começar até `start_by` (prazo − o seu custo
+    esperado): se a vez no host (pedidos ao mesmo host em série + espera de
+    cortesia) só chegaria depois, o item não espera e fica para a próxima
+    execução — e a fonte não é penalizada no agendador
+  • no prazo o Pipeline pára de aceitar trabalho novo, mas termina o que já
+    foi descarregado (parse, enrich, write)
+"""
+
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from state_store import load_json, save_json
+
+log = logging.getLogger("TimeBudget")
+
+SHUTDOWN_RESERVE = 45.0
+DEFAULT_COSTS = {"listing": 5.0, "detail": 3.0}
+ALPHA = 0.3
+
+
+class TimeBudget:
+    def __init__(self, seconds: float, namespace: str, reserve: Optional[float] = None,
+                 persist: bool = True, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.started = clock()
+        self.shutdown_reserve = reserve if reserve is not None else min(SHUTDOWN_RESERVE, seconds * 0.25)
+        self.work_deadline = self.started + seconds - self.shutdown_reserve
+        self.persist = persist
+        self.state_file = f"time_costs_{namespace}.json"
+        self.costs: Dict[str, Dict[str, float]] = (load_json(self.state_file, {}) or {}) if persist else {}
+        # Itens deixados para a próxima execução, por fonte
+        self.cut: Counter = Counter()
+        self._lock = threading.Lock()
+
+    # ── Tempo ─────────────────────────────────────────────────────────────
+    def remaining(self) -> float:
+        """Segundos até ao prazo de trabalho (negativo depois dele)."""
+        return self.work_deadline - self.clock()
+
+    def fits(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    # ── Custos ────────────────────────────────────────────────────────────
+    def cost(self, source: str, action: str) -> float:
+        return self.costs.get(source, {}).get(action, DEFAULT_COSTS[action])
+
+    def observe(self, source: str, action: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.costs.setdefault(source, {})
+            old = entry.get(action)
+            entry[action] = round(seconds if old is None else (1 - ALPHA) * old + ALPHA * seconds, 3)
+
+    @contextmanager
+    def timed(self, source: str, action: str):
+        t0 = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(source, action, self.clock() - t0)
+
+    # ── Decisão ───────────────────────────────────────────────────────────
+    def yield_per_second(self, source: str, expected_new: float, item_cost: float) -> float:
+        """Itens novos esperados por segundo de visita (fontes nunca vistas: infinito)."""
+        if expected_new == float("inf"):
+            return expected_new
+        return expected_new / (self.cost(source, "listing") + max(expected_new, 1.0) * item_cost)
+
+    def plan(self, sources: Iterable[str], expected_new: Callable[[str], float],
+             item_cost: Callable[[str], float]) -> List[str]:
+        """Fontes por yield/segundo (maior primeiro), sem as listagens que já não cabem no prazo."""
+        ranked = sorted(
+            sources, key=lambda s: self.yield_per_second(s, expected_new(s), item_cost(s)), reverse=True
+        )
+        planned = [s for s in ranked if self.fits(self.cost(s, "listing"))]
+        dropped = [s for s in ranked if s not in planned]
+        if dropped:
+            log.info(f"⌛ Sem tempo para as listagens de: {', '.join(dropped)}")
+        return planned
+
+    def start_by(self, source: str, action: str = "detail") -> float:
+        """Último instante (relógio) para começar a ação da fonte e ainda acabar antes do prazo."""
+        return self.work_deadline - self.cost(source, action)
+
+    def postpone(self, source: str) -> None:
+        """Conta um item deixado para a próxima execução."""
+        with self._lock:
+            self.cut[source] += 1
+
+    # ── Estado / relatório ────────────────────────────────────────────────
+    def save(self) -> None:
+        if self.persist:
+            save_json(self.state_file, self.costs)
+
+    def summary(self) -> str:
+        used = self.clock() - self.started
+        text = f"⌛ Orçamento: {used:.0f}s de {self.seconds:.0f}s (reserva de {self.shutdown_reserve:.0f}s)"
+        if self.cut:
+            left = ", ".join(f"{s} {n}" for s, n in self.cut.most_common())
+            text += f" | {sum(self.cut.values())} item(ns) para a próxima execução ({left})"
+        return text
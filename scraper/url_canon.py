@@ -0,0 +1,237 @@
+"""
+URLCanon — URLs Canónicas e Chaves de Deduplicação
+==================================================
+A deduplicação comparava `source_url` / `url_origem` tal como vinham do
+HTML: a mesma vaga com `?utm_source=...`, um `#fragmento`, `http` vs `https`,
+`www.` ou barra final era pedida e guardada outra vez (os links públicos do
+LinkedIn trazem sempre `refId`, `trackingId`, `position`, `pageNum`...).
+
+  canonical_url(url) → URL limpa e ainda pedível, guardada na base:
+      • esquema/host em minúsculas, porta omissão e fragmento removidos
+      • parâmetros de tracking removidos, os restantes ordenados
+      • regras por host (HOST_RULES): parâmetros a manter e reescrita do
+        caminho — p.ex. LinkedIn → https://www.linkedin.com/jobs/view/<id>
+  url_key(url)       → 16 hex (SHA-1) da forma canónica sem esquema, sem
+      `www.` e sem barra final; é a chave de todos os caminhos de dedup
+      (coluna `url_key` indexada, conjuntos de vistos, caches em memória)
+
+    python scraper/url_canon.py "https://ao.linkedin.com/jobs/view/x-123?trk=abc"
+    python scraper/url_canon.py backfill          # url_key das linhas antigas
+
+Enquanto houver linhas sem `url_key` (anteriores à migração 20261019000500 ou
+inseridas pela app/admin, que não a calculam), `dedup_filters()` procura
+também pela URL em bruto nessas linhas — nas variantes http/https, www. e
+barra final da forma canónica. Os motores preenchem as chaves em falta no
+arranque (`ensure_url_keys`), em lotes pela RPC do content_hash.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import logging
+import argparse
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+log = logging.getLogger("URLCanon")
+
+KEY_LENGTH = 16
+
+# Parâmetros de tracking/sessão removidos em qualquer host
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "source", "share", "amp", "_ga", "_gl", "spm", "feature",
+    "phpsessid", "sessionid", "sid", "jsessionid",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_", "__hs")
+
+# host (sem www.) → regras. "keep": só estes parâmetros sobrevivem (set vazio = nenhum);
+# "path": (regex, substituição) aplicado ao caminho; "host": host canónico
+HOST_RULES: Dict[str, dict] = {
+    "linkedin.com": {
+        "host": "www.linkedin.com",
+        "keep": set(),
+        # /jobs/view/contabilista-at-acme-3791234567 → /jobs/view/3791234567
+        "path": (re.compile(r"^/jobs/view/(?:[^/]*-)?(\d{6,})/?.*$"), r"/jobs/view/\1"),
+    },
+    "jobartis.com": {"keep": {"page"}},
+    "angoemprego.com": {"keep": {"p", "page_id", "job_listing"}},
+    "angovagas.net": {"keep": {"p", "page_id", "job_listing"}},
+    "angop.ao": {"path": (re.compile(r"/amp/?$"), "/")},
+}
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def _rules_for(host: str) -> dict:
+    bare = host.removeprefix("www.")
+    if bare in HOST_RULES:
+        return HOST_RULES[bare]
+    # Subdomínios de país (ao.linkedin.com, pt.linkedin.com...)
+    for suffix, rules in HOST_RULES.items():
+        if bare.endswith("." + suffix):
+            return rules
+    return {}
+
+
+def _is_tracking(name: str) -> bool:
+    lower = name.lower()
+    return lower in TRACKING_PARAMS or lower.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """URL limpa para guardar e pedir; '' se não for http(s)."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return ""
+    host = (parts.hostname or "").lower().rstrip(".")
+    if not host:
+        return ""
+    rules = _rules_for(host)
+    host = rules.get("host", host)
+    netloc = host
+    if parts.port and str(parts.port) != _DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if "path" in rules:
+        pattern, repl = rules["path"]
+        path = pattern.sub(repl, path) or "/"
+
+    keep = rules.get("keep")
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if (k in keep if keep is not None else not _is_tracking(k))
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ""))
+
+
+def url_key(url: str) -> str:
+    """Chave curta e estável: iguala http/https, www./sem www. e barra final."""
+    canon = canonical_url(url)
+    if not canon:
+        return ""
+    parts = urlsplit(canon)
+    host = parts.netloc.removeprefix("www.")
+    path = parts.path.rstrip("/") or "/"
+    ident = f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()[:KEY_LENGTH]
+
+
+def canonical(url: str) -> Tuple[str, str]:
+    """(canonical_url, url_key) numa só chamada."""
+    canon = canonical_url(url)
+    return canon, url_key(canon) if canon else ""
+
+
+# ─────────────────────────────────────────────
+# DEDUPLICAÇÃO NA BASE
+# ─────────────────────────────────────────────
+URL_COLUMNS = {"jobs": "source_url", "news_articles": "url_origem"}
+
+
+def url_variants(url: str) -> List[str]:
+    """A URL recebida + a canónica com/sem https, www. e barra final (como as linhas antigas a guardaram)."""
+    variants = [url]
+    canon = canonical_url(url)
+    if canon:
+        parts = urlsplit(canon)
+        host = parts.netloc.removeprefix("www.")
+        path = parts.path.rstrip("/")
+        for scheme in ("https", "http"):
+            for netloc in (host, "www." + host):
+                for p in (path or "/", path + "/"):
+                    variants.append(urlunsplit((scheme, netloc, p, parts.query, "")))
+    return list(dict.fromkeys(variants))
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def dedup_filters(table: str, url: str) -> dict:
+    """Filtro PostgREST: a url_key, ou a URL em bruto nas linhas que ainda não têm url_key."""
+    column = URL_COLUMNS[table]
+    raw = ",".join(_quote(v) for v in url_variants(url))
+    return {"or": f"(url_key.eq.{url_key(url)},and(url_key.is.null,{column}.in.({raw})))"}
+
+
+# ─────────────────────────────────────────────
+# BACKFILL DAS LINHAS EXISTENTES
+# ─────────────────────────────────────────────
+def backfill(db, table: str, page: int = 1000, dry_run: bool = False) -> int:
+    """Preenche `url_key` nas linhas que ainda não o têm (lotes pela RPC scraper_apply_patches)."""
+    from content_hash import PatchQueue
+    column = URL_COLUMNS[table]
+    queue = PatchQueue(db, table)
+    last_id, touched = None, 0
+    while True:
+        filters = {"url_key": "is.null", column: "not.is.null", "order": "id.asc", "limit": str(page)}
+        if last_id is not None:
+            filters["id"] = f"gt.{last_id}"
+        rows = db.select(table, filters, columns=f"id,{column}")
+        for row in rows:
+            key = url_key(row[column])
+            if key:
+                touched += 1
+                if not dry_run:
+                    queue.add(row["id"], {"url_key": key})
+        if len(rows) < page:
+            break
+        last_id = rows[-1]["id"]
+    queue.flush()
+    log.info(f"🔑 {table}: {touched} linha(s) {'sem' if dry_run else 'com'} url_key")
+    return touched
+
+
+def ensure_url_keys(db, table: str) -> int:
+    """No arranque dos motores: preenche as url_key em falta (um SELECT quando já não há nenhuma)."""
+    if db is None:
+        return 0
+    try:
+        missing = db.select(table, {"url_key": "is.null", URL_COLUMNS[table]: "not.is.null", "limit": "1"},
+                            columns="id")
+    except Exception as e:
+        log.warning(f"⚠️  Não foi possível verificar url_key em {table}: {e}")
+        return 0
+    if not missing:
+        return 0
+    log.info(f"🔑 {table}: há linhas sem url_key — a preencher antes da varredura")
+    return backfill(db, table)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] != "backfill":
+        for url in argv:
+            canon, key = canonical(url)
+            print(f"{key}  {canon}")
+        return 0
+
+    parser = argparse.ArgumentParser(description="Preenche url_key nas vagas e notícias existentes")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--table", choices=sorted(URL_COLUMNS), help="só esta tabela")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from ango_job_scraper import SupabaseRestClient
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.local"))
+    url = os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        log.critical("❌ Defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env.local")
+        return 1
+    db = SupabaseRestClient(url, key)
+    for table in [args.table] if args.table else URL_COLUMNS:
+        backfill(db, table, dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
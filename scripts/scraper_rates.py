@@ -1,6 +1,11 @@
 import requests
 import os
+import sys
+import json
 import time
+import calendar
+import argparse
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,64 +25,238 @@ headers = {
     "Prefer": "return=representation"
 }
 
+RATES_API_URL = "https://open.er-api.com/v6/latest/USD"
+
+# (connect, read) — the upstream API must never hang the poller
+RATES_TIMEOUT = (5, 15)
+
+# Upstream response is considered fresh for this many seconds
+RATES_CACHE_TTL = int(os.environ.get("RATES_CACHE_TTL", "1800"))
+
+# Minimum movement (in AOA) before a rate is written to Supabase
+RATES_EPSILON = float(os.environ.get("RATES_EPSILON", "0.01"))
+
+# Rows untouched for longer than this get a heartbeat PATCH of last_updated,
+# even if the rate did not move, so freshness shown in the app stays bounded.
+# last_updated is always the time the rates were fetched upstream, never "now":
+# a heartbeat is only sent when the rates in hand are newer than the row
+RATES_MAX_STALENESS = int(os.environ.get("RATES_MAX_STALENESS", "21600"))
+
+RATES_CACHE_FILE = os.environ.get(
+    "RATES_CACHE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rates_cache.json"),
+)
+
+
+def compute_rates(data):
+    """Builds the formal USD/EUR -> AOA rates from an open.er-api payload."""
+    usd_aoa = data['rates']['AOA']
+    # EUR is often derived or fetched.
+    # To get EUR->AOA: 1 EUR = X USD * USD->AOA
+    eur_usd = 1 / data['rates']['EUR']
+    eur_aoa = eur_usd * usd_aoa
+
+    # Informal often has a spread.
+    # Getting real informal data requires scraping specific local sites which might be blocked or change often.
+    # We will estimate informal based on current market spread (~30-40% higher) OR keep the previous logic if no source logic provided.
+    # User asked for EXACT BNA for the *formal* part.
+
+    return {
+        'USD': {
+            'formal_buy': round(usd_aoa, 2),
+            'formal_sell': round(usd_aoa * 1.02, 2), # Spread defaults usually 2%
+        },
+        'EUR': {
+            'formal_buy': round(eur_aoa, 2),
+            'formal_sell': round(eur_aoa * 1.02, 2),
+        }
+    }
+
+
 def get_bna_rates():
     # Attempt to get official BNA rate via a reliable financial API
     # Open Exchange Rates or similar usually mirror Central Bank rates
     try:
-        response = requests.get("https://open.er-api.com/v6/latest/USD")
-        data = response.json()
-        
-        usd_aoa = data['rates']['AOA']
-        # EUR is often derived or fetched. 
-        # To get EUR->AOA: 1 EUR = X USD * USD->AOA
-        eur_usd = 1 / data['rates']['EUR']
-        eur_aoa = eur_usd * usd_aoa
-        
-        # Informal often has a spread. 
-        # Getting real informal data requires scraping specific local sites which might be blocked or change often.
-        # We will estimate informal based on current market spread (~30-40% higher) OR keep the previous logic if no source logic provided.
-        # User asked for EXACT BNA for the *formal* part.
-        
-        return {
-            'USD': {
-                'formal_buy': round(usd_aoa, 2),
-                'formal_sell': round(usd_aoa * 1.02, 2), # Spread defaults usually 2%
-            },
-            'EUR': {
-                'formal_buy': round(eur_aoa, 2),
-                'formal_sell': round(eur_aoa * 1.02, 2),
-            }
-        }
+        response = requests.get(RATES_API_URL, timeout=RATES_TIMEOUT)
+        response.raise_for_status()
+        return compute_rates(response.json())
     except Exception as e:
         print(f"[-] Error fetching BNA rates: {e}")
         return None
 
-def update_rates():
+
+class RatesCache:
+    """
+    In-memory + on-disk TTL cache of the last good upstream rates.
+    The disk copy lets a restarted poller serve immediately instead of
+    blocking on (or failing with) the upstream API.
+    """
+
+    def __init__(self, path=RATES_CACHE_FILE, ttl=RATES_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.rates = None
+        self.fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+            self.rates = stored["rates"]
+            self.fetched_at = float(stored["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def put(self, rates):
+        with self._lock:
+            self.rates = rates
+            self.fetched_at = time.time()
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"rates": rates, "fetched_at": self.fetched_at}, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[-] Could not persist rates cache: {e}")
+
+    def get(self):
+        """Returns (rates, age_in_seconds); rates is None if nothing was ever cached."""
+        with self._lock:
+            if self.rates is None:
+                return None, None
+            return self.rates, time.time() - self.fetched_at
+
+    def is_fresh(self):
+        _, age = self.get()
+        return age is not None and age < self.ttl
+
+
+class RatesPoller:
+    """
+    Stale-while-revalidate poller for the upstream rates.
+    get_rates() always answers from the cache when it has something; an expired
+    entry triggers a single background refresh. Failed refreshes back off
+    exponentially (capped) and the last good value keeps being served.
+    """
+
+    def __init__(self, cache=None, fetcher=get_bna_rates, base_backoff=60, max_backoff=3600):
+        self.cache = cache or RatesCache()
+        self.fetcher = fetcher
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self._refreshing = threading.Lock()
+
+    def _backoff(self):
+        return min(self.max_backoff, self.base_backoff * (2 ** max(0, self.failures - 1)))
+
+    def refresh(self):
+        """Fetches upstream now. Returns True on success."""
+        if not self._refreshing.acquire(blocking=False):
+            return False  # another refresh is already in flight
+        try:
+            rates = self.fetcher()
+            if rates:
+                self.cache.put(rates)
+                self.failures = 0
+                self.next_attempt_at = 0.0
+                return True
+            self.failures += 1
+            self.next_attempt_at = time.time() + self._backoff()
+            print(f"[-] Rates refresh failed ({self.failures}x). Next attempt in {self._backoff()}s.")
+            return False
+        finally:
+            self._refreshing.release()
+
+    def get_rates(self):
+        rates, age = self.cache.get()
+        if rates is None:
+            # Cold start: nothing to serve, must fetch synchronously
+            self.refresh()
+            return self.cache.get()[0]
+
+        if age >= self.cache.ttl and time.time() >= self.next_attempt_at:
+            threading.Thread(target=self.refresh, daemon=True).start()
+        if age >= self.cache.ttl:
+            print(f"[!] Serving stale rates ({int(age)}s old, TTL {self.cache.ttl}s).")
+        return rates
+
+
+def _parse_ts(value):
+    try:
+        return calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S"))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _rate_moved(old, new, epsilon):
+    if old is None:
+        return True
+    return abs(float(old) - float(new)) > epsilon
+
+
+def _format_ts(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(ts))
+
+
+def update_rates(rates=None, fetched_at=None, epsilon=RATES_EPSILON, max_staleness=RATES_MAX_STALENESS):
+    """
+    Writes the formal rates to Supabase. `fetched_at` (epoch) is when the rates
+    were obtained upstream; rates served from an old cache keep their own age.
+    """
     print("[*] Updating Exchange Rates with BNA Data (Formal Only)...")
-    rates = get_bna_rates()
-    
+    if rates is None:
+        rates = get_bna_rates()
+        fetched_at = time.time()
+    if fetched_at is None:
+        fetched_at = time.time()
+
     if not rates:
         print("[-] Failed to fetch rates. Aborting update.")
         return
 
+    api_url = f"{url}/rest/v1/exchange_rates"
     for currency, values in rates.items():
         try:
             # Check if exists
-            api_url = f"{url}/rest/v1/exchange_rates"
-            check_response = requests.get(f"{api_url}?currency=eq.{currency}", headers=headers)
-            
+            check_response = requests.get(
+                f"{api_url}?currency=eq.{currency}", headers=headers, timeout=RATES_TIMEOUT
+            )
+
             existing = check_response.json() if check_response.status_code == 200 else []
-            
+
             if existing:
+                row = existing[0]
+                moved = any(
+                    _rate_moved(row.get(field), values[field], epsilon)
+                    for field in ('formal_buy', 'formal_sell')
+                )
+                row_ts = _parse_ts(row.get('last_updated'))
+                if fetched_at <= row_ts:
+                    # Upstream down and the cache is no newer than the row: writing it would lie
+                    print(f"[!] {currency} rates from {_format_ts(fetched_at)} are not newer than the row. "
+                          f"Skipping PATCH.")
+                    continue
+                stale = time.time() - row_ts > max_staleness
+                if not moved and not stale:
+                    print(f"[=] {currency} unchanged (< {epsilon} AOA). Skipping PATCH.")
+                    continue
+
                 # Update ONLY formal rates, preserving informal
-                record_id = existing[0]['id']
+                record_id = row['id']
                 update_data = {
                     'formal_buy': values['formal_buy'],
                     'formal_sell': values['formal_sell'],
-                    'last_updated': time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                    'last_updated': _format_ts(fetched_at)
                 }
-                requests.patch(f"{api_url}?id=eq.{record_id}", headers=headers, json=update_data)
-                print(f"[+] Updated BNA rates for {currency}")
+                requests.patch(
+                    f"{api_url}?id=eq.{record_id}", headers=headers, json=update_data, timeout=RATES_TIMEOUT
+                )
+                reason = "moved" if moved else "heartbeat"
+                print(f"[+] Updated BNA rates for {currency} ({reason})")
             else:
                 # Insert (For new records, we might need default informal values or null)
                 new_record = {
@@ -85,10 +264,10 @@ def update_rates():
                     'formal_buy': values['formal_buy'],
                     'formal_sell': values['formal_sell'],
                     # Default informal to 0 or same as formal if not exists, user will edit later
-                    'informal_buy': values['formal_buy'], 
+                    'informal_buy': values['formal_buy'],
                     'informal_sell': values['formal_sell'],
                 }
-                requests.post(api_url, headers=headers, json=new_record)
+                requests.post(api_url, headers=headers, json=new_record, timeout=RATES_TIMEOUT)
                 print(f"[+] Inserted new BNA rates for {currency}")
 
         except Exception as e:
@@ -96,5 +275,43 @@ def update_rates():
 
     print("[*] Rates update finished.")
 
+
+def run_daemon(interval=300):
+    """Long-lived mode: serve cached rates, refresh in background, sync on change."""
+    poller = RatesPoller()
+    print(f"[*] Rates poller started (interval {interval}s, TTL {poller.cache.ttl}s, epsilon {RATES_EPSILON}).")
+    while True:
+        rates = poller.get_rates()
+        if rates:
+            update_rates(rates, fetched_at=poller.cache.fetched_at)
+        else:
+            print("[-] No rates available yet (upstream down, empty cache).")
+        time.sleep(interval)
+
+
+def run_once():
+    """One-shot: refresh now, but fall back to the last good cached value if upstream fails."""
+    poller = RatesPoller()
+    poller.refresh()
+    rates, _ = poller.cache.get()
+    if not rates:
+        # update_rates(None) would hit upstream a second time in the same run
+        print("[-] No rates available (upstream down, empty cache). Nothing to update.")
+        return 1
+    update_rates(rates, fetched_at=poller.cache.fetched_at)
+    return 0
+
+
 if __name__ == "__main__":
-    update_rates()
+    parser = argparse.ArgumentParser(description="BNA formal exchange rates updater")
+    parser.add_argument("--daemon", action="store_true", help="run as a long-lived poller")
+    parser.add_argument("--interval", type=int, default=300, help="seconds between sync cycles in daemon mode")
+    args = parser.parse_args()
+
+    if args.daemon:
+        try:
+            run_daemon(args.interval)
+        except KeyboardInterrupt:
+            sys.exit(0)
+    else:
+        sys.exit(run_once())
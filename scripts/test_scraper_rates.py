@@ -0,0 +1,74 @@
+import importlib
+import os
+import sys
+import time
+
+import pytest
+
+
+@pytest.fixture
+def rates(monkeypatch, tmp_path):
+    monkeypatch.setenv("VITE_SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+    monkeypatch.setenv("RATES_CACHE_FILE", str(tmp_path / "rates.json"))
+    monkeypatch.syspath_prepend(os.path.dirname(os.path.abspath(__file__)))
+    sys.modules.pop("scraper_rates", None)
+    return importlib.import_module("scraper_rates")
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+def _rows(monkeypatch, module, row):
+    patches = []
+    monkeypatch.setattr(module.requests, "get", lambda *a, **k: FakeResponse([row]))
+    monkeypatch.setattr(module.requests, "patch", lambda url, json=None, **k: patches.append(json))
+    return patches
+
+
+USD = {"USD": {"formal_buy": 912.5, "formal_sell": 930.75}}
+
+
+def test_heartbeat_uses_fetch_time_and_skips_cache_older_than_row(rates, monkeypatch):
+    week_ago = time.time() - 7 * 86400
+    row = {"id": 1, "formal_buy": 912.5, "formal_sell": 930.75, "last_updated": rates._format_ts(week_ago)}
+
+    # Upstream down, 2h-old cache still newer than the row: heartbeat carries the fetch time
+    patches = _rows(monkeypatch, rates, row)
+    fetched_at = time.time() - 7200
+    rates.update_rates(USD, fetched_at=fetched_at)
+    assert [p["last_updated"] for p in patches] == [rates._format_ts(fetched_at)]
+
+    # Cache older than the row: no heartbeat, and no old rate written over it
+    patches = _rows(monkeypatch, rates, row)
+    rates.update_rates({"USD": {"formal_buy": 800.0, "formal_sell": 816.0}}, fetched_at=week_ago - 60)
+    assert patches == []
+
+
+def test_one_shot_falls_back_to_cache_with_its_own_age(rates, tmp_path):
+    cache = rates.RatesCache(path=str(tmp_path / "rates.json"), ttl=60)
+    cache.put(USD)
+    cache.fetched_at -= 3600
+    poller = rates.RatesPoller(cache=cache, fetcher=lambda: None)
+    assert poller.refresh() is False
+    assert poller.cache.get()[0] == USD and not poller.cache.is_fresh()
+    assert poller.cache.fetched_at < time.time() - 3500
+
+
+def test_one_shot_with_empty_cache_and_failed_refresh_fetches_once(rates, monkeypatch):
+    calls = []
+
+    def down(url, **kwargs):
+        calls.append(url)
+        raise rates.requests.ConnectionError("upstream down")
+
+    monkeypatch.setattr(rates.requests, "get", down)
+    monkeypatch.setattr(rates.requests, "patch", lambda *a, **k: pytest.fail("no PATCH expected"))
+    assert rates.run_once() == 1
+    assert calls == [rates.RATES_API_URL]
@@ -46,9 +46,12 @@ export const JobsService = {
   ): Promise<Job[]> => {
     let query = supabase.from("jobs").select("*");
     if (!isAdmin) {
-      query = query.or(
-        "status.eq.publicado,status.eq.published,status.eq.aprovado,status.eq.approved",
-      );
+      query = query
+        .or(
+          "status.eq.publicado,status.eq.published,status.eq.aprovado,status.eq.approved",
+        )
+        // Vagas cuja página de origem desapareceu (scraper/expiry_sweeper.py)
+        .is("expired_at", null);
       if (options.search && options.search.trim()) {
         const term = options.search.trim();
         query = query.or(
@@ -0,0 +1,65 @@
+-- ==========================================
+-- Scrapers — chaves de upsert por URL de origem
+--
+-- jobs.source_url e news_articles.url_origem passam a ser únicos, para que
+-- a carga em lote (scraper/bulk_load.py) e as reexecuções possam usar
+-- INSERT ... ON CONFLICT / on_conflict do PostgREST em vez de um SELECT
+-- por linha. Duplicados já existentes são removidos antes, ficando a linha
+-- mais antiga (a que os utilizadores já viram). NULLs continuam permitidos.
+--
+-- Cada linha removida fica arquivada, inteira, em
+-- public.scraper_removed_duplicates (com a URL, que leva à linha que ficou), e a
+-- migração regista quantas removeu por tabela. Para repor uma linha:
+--   SELECT jsonb_populate_record(NULL::public.jobs, row_data)
+--   FROM public.scraper_removed_duplicates WHERE source_table = 'jobs';
+-- ==========================================
+
+CREATE TABLE IF NOT EXISTS public.scraper_removed_duplicates (
+  id           bigserial PRIMARY KEY,
+  source_table text        NOT NULL,
+  url          text        NOT NULL,
+  row_data     jsonb       NOT NULL,
+  removed_at   timestamptz NOT NULL DEFAULT now()
+);
+-- Só o service role (sem políticas: RLS ativo nega o acesso público)
+ALTER TABLE public.scraper_removed_duplicates ENABLE ROW LEVEL SECURITY;
+
+DO $$
+DECLARE
+  n_jobs integer;
+  n_news integer;
+BEGIN
+  WITH removed AS (
+    DELETE FROM public.jobs a
+    USING public.jobs b
+    WHERE a.source_url IS NOT NULL
+      AND a.source_url = b.source_url
+      AND (a.posted_at, a.id) > (b.posted_at, b.id)
+    RETURNING a.*
+  ), archived AS (
+    INSERT INTO public.scraper_removed_duplicates (source_table, url, row_data)
+    SELECT 'jobs', r.source_url, to_jsonb(r) FROM removed r
+    RETURNING 1
+  )
+  SELECT count(*) INTO n_jobs FROM archived;
+
+  WITH removed AS (
+    DELETE FROM public.news_articles a
+    USING public.news_articles b
+    WHERE a.url_origem IS NOT NULL
+      AND a.url_origem = b.url_origem
+      AND (a.published_at, a.id) > (b.published_at, b.id)
+    RETURNING a.*
+  ), archived AS (
+    INSERT INTO public.scraper_removed_duplicates (source_table, url, row_data)
+    SELECT 'news_articles', r.url_origem, to_jsonb(r) FROM removed r
+    RETURNING 1
+  )
+  SELECT count(*) INTO n_news FROM archived;
+
+  RAISE NOTICE 'scraper_upsert_keys: % vaga(s) e % notícia(s) duplicadas removidas (arquivadas em scraper_removed_duplicates)',
+    n_jobs, n_news;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_source_url ON public.jobs (source_url);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_articles_url_origem ON public.news_articles (url_origem);
@@ -0,0 +1,12 @@
+-- ==========================================
+-- Feeds estáticos — bucket público 'feeds'
+--
+-- scraper/feed_publisher.py publica aqui, após cada execução dos scrapers,
+-- as páginas JSON por categoria (vagas e notícias) e o manifest.json.
+-- Leitura pública (servido pela CDN do Storage); escrita só com a service
+-- role (workflows), que ignora RLS — não são precisas policies de escrita.
+-- ==========================================
+
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('feeds', 'feeds', true)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,24 @@
+-- ==========================================
+-- Vagas — província e município normalizados
+--
+-- O scraper resolve o texto livre de `location` contra o gazetteer das 18
+-- províncias e respetivos municípios (scraper/gazetteer.py) e grava:
+--   province_code      código ISO 3166-2:AO sem prefixo ('LUA', 'HUI', ...)
+--   municipality_code  província + município ('LUA-TALATONA'), NULL se só
+--                      a província for conhecida
+-- Os filtros por localização passam a ser igualdades indexadas em vez de
+-- `location ilike '%...%'`. Vagas antigas: python scraper/gazetteer.py backfill
+-- ==========================================
+
+ALTER TABLE public.jobs
+  ADD COLUMN IF NOT EXISTS province_code text,
+  ADD COLUMN IF NOT EXISTS municipality_code text;
+
+-- Listagem pública filtrada por província/município, mais recentes primeiro
+CREATE INDEX IF NOT EXISTS idx_jobs_province_posted
+  ON public.jobs (province_code, posted_at DESC)
+  WHERE province_code IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_municipality_posted
+  ON public.jobs (municipality_code, posted_at DESC)
+  WHERE municipality_code IS NOT NULL;
@@ -0,0 +1,31 @@
+-- ==========================================
+-- Vagas — salário estruturado
+--
+-- O texto livre de `salary` continua a ser guardado para apresentação; o
+-- scraper (scraper/salary_parser.py) grava também o intervalo numérico:
+--   salary_min / salary_max    valores na moeda do anúncio
+--   salary_currency            'AOA' | 'USD' | 'EUR'
+--   salary_period              'month' | 'year' | 'day' | 'hour'
+--   salary_aoa_min / _max      equivalente mensal em AOA (exchange_rates.formal_buy)
+-- Filtros e ordenação por salário passam a ser queries numéricas indexadas.
+-- Vagas antigas: python scraper/salary_parser.py backfill
+-- ==========================================
+
+ALTER TABLE public.jobs
+  ADD COLUMN IF NOT EXISTS salary_min numeric(14, 2),
+  ADD COLUMN IF NOT EXISTS salary_max numeric(14, 2),
+  ADD COLUMN IF NOT EXISTS salary_currency text
+    CHECK (salary_currency IN ('AOA', 'USD', 'EUR')),
+  ADD COLUMN IF NOT EXISTS salary_period text
+    CHECK (salary_period IN ('month', 'year', 'day', 'hour')),
+  ADD COLUMN IF NOT EXISTS salary_aoa_min numeric(14, 2),
+  ADD COLUMN IF NOT EXISTS salary_aoa_max numeric(14, 2);
+
+-- "Salário mínimo ≥ X" / ordenar por salário
+CREATE INDEX IF NOT EXISTS idx_jobs_salary_aoa_min
+  ON public.jobs (salary_aoa_min)
+  WHERE salary_aoa_min IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_salary_aoa_max
+  ON public.jobs (salary_aoa_max)
+  WHERE salary_aoa_max IS NOT NULL;
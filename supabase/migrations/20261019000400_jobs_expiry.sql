@@ -0,0 +1,41 @@
+-- ==========================================
+-- Vagas — expiração detetada pelo scraper
+--
+-- scraper/expiry_sweeper.py revalida `source_url` das vagas e grava:
+--   expired_at       página da vaga desaparecida (404/410, redireciona para a
+--                    listagem, aviso de vaga encerrada)
+--   last_checked_at  última verificação conclusiva (ordena o próximo lote)
+-- A listagem pública passa a excluir expired_at IS NOT NULL e as vagas
+-- expiradas há mais de 7 dias são apagadas pelo pg_cron, antes dos 30 dias
+-- de cleanup-old-jobs (20260806000000_auto_cleanup.sql).
+-- ==========================================
+
+ALTER TABLE public.jobs
+  ADD COLUMN IF NOT EXISTS expired_at timestamptz,
+  ADD COLUMN IF NOT EXISTS last_checked_at timestamptz;
+
+-- Lote seguinte do sweeper: nunca verificadas primeiro, depois as mais antigas
+CREATE INDEX IF NOT EXISTS idx_jobs_sweep_order
+  ON public.jobs (last_checked_at ASC NULLS FIRST, id)
+  WHERE expired_at IS NULL;
+
+-- Listagem pública (status + data) só sobre vagas vivas
+CREATE INDEX IF NOT EXISTS idx_jobs_live_status_posted
+  ON public.jobs (status, posted_at DESC)
+  WHERE expired_at IS NULL;
+
+DO $$
+DECLARE
+  j RECORD;
+BEGIN
+  FOR j IN SELECT jobid FROM cron.job WHERE jobname = 'cleanup-expired-jobs' LOOP
+    PERFORM cron.unschedule(j.jobid);
+  END LOOP;
+END $$;
+
+--    Vagas expiradas: diariamente às 04:30 (WAT) -> expired_at há mais de 7 dias.
+SELECT cron.schedule(
+  'cleanup-expired-jobs',
+  '30 4 * * *',
+  $$ DELETE FROM public.jobs WHERE expired_at < now() - interval '7 days' $$
+);
@@ -0,0 +1,17 @@
+-- ==========================================
+-- Scrapers — chave de URL canónica (url_key)
+--
+-- scraper/url_canon.py reduz cada URL de origem à forma canónica (sem
+-- tracking, fragmento, esquema, www. nem barra final, com regras por host)
+-- e grava os primeiros 16 hex do SHA-1 em `url_key`. A deduplicação dos
+-- motores passa a procurar por esta coluna em vez da URL em bruto.
+-- Índice não único: linhas antigas podem partilhar a chave até serem
+-- limpas; o upsert continua a usar source_url / url_origem (já canónicas).
+-- Linhas existentes: python scraper/url_canon.py backfill
+-- ==========================================
+
+ALTER TABLE public.jobs ADD COLUMN IF NOT EXISTS url_key text;
+ALTER TABLE public.news_articles ADD COLUMN IF NOT EXISTS url_key text;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_url_key ON public.jobs (url_key);
+CREATE INDEX IF NOT EXISTS idx_news_articles_url_key ON public.news_articles (url_key);
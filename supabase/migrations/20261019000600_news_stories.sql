@@ -0,0 +1,24 @@
+-- ==========================================
+-- Notícias — histórias entre fontes (story_id / story_rank)
+--
+-- scraper/story_clusters.py junta a mesma notícia publicada por várias
+-- fontes (MinHash do título + lead, LSH numa janela de 72 h):
+--   story_id   = 'st_' + url_key do primeiro artigo da história
+--   story_rank = nº de fontes distintas + 2 se alguma a marcou como prioritária
+-- O motor atualiza story_rank das linhas antigas quando a história cresce.
+-- Os feeds estáticos mostram um cartão por história.
+-- Linhas existentes: python scraper/story_clusters.py backfill --days 3
+-- ==========================================
+
+ALTER TABLE public.news_articles ADD COLUMN IF NOT EXISTS story_id text;
+ALTER TABLE public.news_articles ADD COLUMN IF NOT EXISTS story_rank smallint NOT NULL DEFAULT 1;
+
+ALTER TABLE public.news_articles DROP CONSTRAINT IF EXISTS chk_news_story_rank;
+ALTER TABLE public.news_articles ADD CONSTRAINT chk_news_story_rank CHECK (story_rank >= 1);
+
+CREATE INDEX IF NOT EXISTS idx_news_articles_story_id
+  ON public.news_articles (story_id) WHERE story_id IS NOT NULL;
+
+-- "Destaques": histórias com mais fontes primeiro, depois as mais recentes
+CREATE INDEX IF NOT EXISTS idx_news_articles_story_rank
+  ON public.news_articles (story_rank DESC, published_at DESC);
@@ -0,0 +1,53 @@
+-- ==========================================
+-- Scrapers — content_hash e PATCH mínimo em lote
+--
+-- scraper/content_hash.py grava em cada linha um digest por coluna de
+-- conteúdo ("<d1>.<d2>...": jobs → title, description, requirements,
+-- imagem_url; news_articles → titulo, corpo, imagem_url). O modo --update
+-- dos motores re-pede os itens recentes e envia só as colunas alteradas.
+--
+-- scraper_apply_patches(target, patches) aplica um lote desses PATCHes num
+-- único pedido: cada elemento é {"id": ..., <coluna>: <valor>, ...} e só as
+-- colunas presentes são escritas (tipos pelo jsonb_populate_record da
+-- própria tabela, p.ex. requirements text[]). Devolve o nº de linhas
+-- atualizadas. Só para o service_role.
+-- ==========================================
+
+ALTER TABLE public.jobs ADD COLUMN IF NOT EXISTS content_hash text;
+ALTER TABLE public.news_articles ADD COLUMN IF NOT EXISTS content_hash text;
+
+CREATE OR REPLACE FUNCTION public.scraper_apply_patches(target text, patches jsonb)
+RETURNS integer
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  patch jsonb;
+  assignments text;
+  touched integer;
+  total integer := 0;
+BEGIN
+  IF target NOT IN ('jobs', 'news_articles') THEN
+    RAISE EXCEPTION 'scraper_apply_patches: tabela não suportada: %', target;
+  END IF;
+
+  FOR patch IN SELECT value FROM jsonb_array_elements(patches) LOOP
+    SELECT string_agg(format('%1$I = r.%1$I', key), ', ')
+      INTO assignments
+      FROM jsonb_object_keys(patch - 'id') AS key
+     WHERE key <> 'id';
+    CONTINUE WHEN assignments IS NULL;
+
+    EXECUTE format(
+      'UPDATE public.%1$I AS t SET %2$s FROM jsonb_populate_record(NULL::public.%1$I, $1) AS r WHERE t.id = r.id',
+      target, assignments
+    ) USING patch;
+    GET DIAGNOSTICS touched = ROW_COUNT;
+    total := total + touched;
+  END LOOP;
+  RETURN total;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.scraper_apply_patches(text, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.scraper_apply_patches(text, jsonb) TO service_role;
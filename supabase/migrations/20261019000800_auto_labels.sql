@@ -0,0 +1,21 @@
+-- ==========================================
+-- Scrapers — rótulos automáticos (categoria_auto / is_priority_auto)
+--
+-- Os motores gravam, ao lado de `categoria` (e de `is_priority` nas
+-- notícias), o valor que o classificador de palavras-chave atribuiu.
+-- Um valor diferente do automático foi corrigido pelo admin:
+-- scraper/reclassify.py (backfill depois de mudar CATEGORY_MAP ou as listas
+-- das notícias) nunca o reescreve, e usa essas correções no relatório.
+-- Linhas existentes: o valor atual passa a ser o automático (correções
+-- anteriores a esta migração não são distinguíveis).
+-- ==========================================
+
+ALTER TABLE public.jobs ADD COLUMN IF NOT EXISTS categoria_auto text;
+ALTER TABLE public.news_articles ADD COLUMN IF NOT EXISTS categoria_auto text;
+ALTER TABLE public.news_articles ADD COLUMN IF NOT EXISTS is_priority_auto boolean;
+
+UPDATE public.jobs SET categoria_auto = categoria WHERE categoria_auto IS NULL;
+UPDATE public.news_articles
+   SET categoria_auto = COALESCE(categoria_auto, categoria),
+       is_priority_auto = COALESCE(is_priority_auto, is_priority)
+ WHERE categoria_auto IS NULL OR is_priority_auto IS NULL;
@@ -0,0 +1,12 @@
+-- ==========================================
+-- Vagas — tentativas de verificação sem veredicto
+--
+-- O sweeper só grava last_checked_at quando a verificação é conclusiva. As
+-- vagas de um host bloqueado (WAF, 5xx, disjuntor aberto) ficavam com
+-- last_checked_at NULL à cabeça de todos os lotes, e o resto da tabela nunca
+-- era verificado. check_attempted_at guarda a última tentativa por decidir:
+-- o sweeper deixa essas vagas de fora durante UNKNOWN_RETRY (6 h).
+-- ==========================================
+
+ALTER TABLE public.jobs
+  ADD COLUMN IF NOT EXISTS check_attempted_at timestamptz;